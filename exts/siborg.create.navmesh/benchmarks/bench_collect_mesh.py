@@ -0,0 +1,108 @@
+'''
+Benchmark for collecting stage geometry with usd_utils.get_all_stage_mesh on a synthetic stage.
+
+Needs pxr and omni importable, so run it with the Kit python:
+    ./app/python.sh exts/siborg.create.navmesh/benchmarks/bench_collect_mesh.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+from pxr import Usd, UsdGeom, Gf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import usd_utils
+
+
+def make_stage(num_meshes, grid=4):
+    '''Make an in-memory stage with `num_meshes` quad grid meshes, each under its own transformed Xform'''
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, '/World')
+
+    xs, zs = np.meshgrid(np.arange(grid + 1, dtype=np.float32), np.arange(grid + 1, dtype=np.float32))
+    points = np.stack([xs.ravel(), np.zeros(xs.size, dtype=np.float32), zs.ravel()], axis=1)
+    idx = np.arange((grid + 1) * (grid + 1)).reshape(grid + 1, grid + 1)
+    quads = np.stack([idx[:-1, :-1], idx[1:, :-1], idx[1:, 1:], idx[:-1, 1:]], axis=-1).reshape(-1)
+    counts = [4] * (grid * grid)
+
+    for i in range(num_meshes):
+        xform = UsdGeom.Xform.Define(stage, f'/World/Shelf{i}')
+        xform.AddTranslateOp().Set(Gf.Vec3d(i % 100 * 5.0, 0, i // 100 * 5.0))
+        xform.AddRotateYOp().Set(float(i % 360))
+        mesh = UsdGeom.Mesh.Define(stage, f'/World/Shelf{i}/Mesh')
+        mesh.CreatePointsAttr(points)
+        mesh.CreateFaceVertexIndicesAttr(quads.tolist())
+        mesh.CreateFaceVertexCountsAttr(counts)
+
+    return stage
+
+
+def make_instanced_stage(num_prototypes, num_instances, grid=4):
+    '''Make a stage with `num_instances` instanceable Xforms referencing `num_prototypes` source meshes'''
+    stage = make_stage(num_prototypes, grid)
+    UsdGeom.Xform.Define(stage, '/World/Instances')
+
+    for i in range(num_instances):
+        xform = UsdGeom.Xform.Define(stage, f'/World/Instances/Inst{i}')
+        xform.AddTranslateOp().Set(Gf.Vec3d(i % 300 * 5.0, 0, i // 300 * 5.0))
+        xform.GetPrim().GetReferences().AddInternalReference(f'/World/Shelf{i % num_prototypes}')
+        xform.GetPrim().SetInstanceable(True)
+
+    return stage
+
+
+def collect_meshes(stage):
+    return [p for p in Usd.PrimRange(stage.GetPseudoRoot(), Usd.TraverseInstanceProxies()) if p.IsA(UsdGeom.Mesh)]
+
+
+def legacy_get_mesh(objs):
+    '''The previous collection: a new XformCache per prim, homogeneous 4x4 transform and list.extend'''
+    points, faces = [], []
+    for prim in objs:
+        mesh = UsdGeom.Mesh(prim)
+        tris = mesh.GetFaceVertexIndicesAttr().Get()
+        tris_cnt = mesh.GetFaceVertexCountsAttr().Get()
+        points_np = np.array(mesh.GetPointsAttr().Get(), dtype=np.float64)
+        points_np = np.hstack((points_np, np.ones((len(points_np), 1))))
+        matrix_np = np.array(UsdGeom.XformCache().GetLocalToWorldTransform(prim)).reshape((4, 4))
+        world_points = np.dot(points_np, matrix_np)[:, :3]
+        f = usd_utils.convert_to_triangle_mesh(tris, tris_cnt)
+
+        f_offset = len(points)
+        points.extend(world_points)
+        faces.extend(f + f_offset)
+    return points, faces
+
+
+def compare(meshes):
+    start = time.perf_counter()
+    legacy_get_mesh(meshes)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    usd_utils.get_mesh(meshes)
+    t_new = time.perf_counter() - start
+
+    return t_legacy, t_new
+
+
+def main():
+    print('Unique meshes')
+    print(f'{"meshes":>8} {"legacy (s)":>11} {"get_mesh (s)":>13}')
+    for num_meshes in (1000, 5000, 20000):
+        stage = make_stage(num_meshes)
+        t_legacy, t_new = compare(collect_meshes(stage))
+        print(f'{num_meshes:>8} {t_legacy:>11.3f} {t_new:>13.3f}')
+
+    print('Instanced meshes (100 prototypes)')
+    print(f'{"instances":>10} {"legacy (s)":>11} {"get_mesh (s)":>13}')
+    for num_instances in (1000, 10000, 50000):
+        stage = make_instanced_stage(100, num_instances)
+        t_legacy, t_new = compare(collect_meshes(stage))
+        print(f'{num_instances:>10} {t_legacy:>11.3f} {t_new:>13.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+'''
+Benchmark for the cold start of a query worker: import time of pyrecast and core in a fresh
+interpreter, with and without loading usd_utils (pxr), and the time until the first path query.
+
+Each case runs in its own process so nothing is cached between them. Runs outside of Kit with the
+same python the binaries were built for (3.10), pxr is only needed for the usd_utils case:
+    python benchmarks/bench_import.py
+'''
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+
+EXT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Every case prints its time in seconds, then the heavy packages that ended up imported
+CASES = {
+    'pyrecast': '''
+from siborg.create.navmesh import pyrecast
+''',
+    'core': '''
+from siborg.create.navmesh import core
+''',
+    'core + usd_utils': '''
+from siborg.create.navmesh import core
+core.usd_utils.get_mesh
+''',
+    'core + first query': '''
+from siborg.create.navmesh import core
+import numpy as np
+xs, zs = np.meshgrid(np.arange(11), np.arange(11))
+idx = np.arange(xs.size).reshape(xs.shape)
+a, b, c, d = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel(), idx[1:, :-1].ravel(), idx[1:, 1:].ravel()
+navmesh = core.NavmeshInterface()
+navmesh.navmesh.load_mesh(np.stack([xs.ravel(), np.zeros(xs.size), zs.ravel()], axis=1),
+                          np.concatenate([np.stack([a, c, b], axis=1), np.stack([b, c, d], axis=1)]))
+navmesh.build_navmesh()
+navmesh.find_paths([[1, 0, 1]], [[9, 0, 9]])
+''',
+}
+
+RUNNER = '''
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(' '.join(name for name in ('pxr', 'omni', 'asyncio') if name in sys.modules))
+'''
+
+
+def run_case(code):
+    '''Run a case in a fresh interpreter, returns (seconds, heavy packages imported) or raises'''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = EXT_ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    result = subprocess.run([sys.executable, '-c', RUNNER.format(code=code)], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    lines = result.stdout.strip().splitlines()
+    return float(lines[-2]), lines[-1]
+
+
+def main(repeats=7):
+    print(f'{"case":>20} {"median (ms)":>12} {"min (ms)":>9}  imported')
+    for name, code in CASES.items():
+        try:
+            runs = [run_case(code) for _ in range(repeats)]
+        except RuntimeError as e:
+            print(f'{name:>20} failed: {e}')
+            continue
+        times = np.array([t for t, _ in runs]) * 1e3
+        print(f'{name:>20} {np.median(times):>12.1f} {times.min():>9.1f}  {runs[-1][1] or "-"}')
+
+
+if __name__ == '__main__':
+    main()
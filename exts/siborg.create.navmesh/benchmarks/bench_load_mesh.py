@@ -0,0 +1,52 @@
+'''
+Benchmark for pyrecast.Navmesh.load_mesh, load time against triangle count.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_load_mesh.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Import pyrecast directly so the Kit extension module is not pulled in
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import pyrecast as rd
+
+
+def make_grid(n):
+    '''Make a flat (n x n) quad grid in the xz plane, returns (verts, tris) with 2*n*n triangles'''
+    xs, zs = np.meshgrid(np.arange(n + 1, dtype=np.float32), np.arange(n + 1, dtype=np.float32))
+    verts = np.stack([xs.ravel(), np.zeros(xs.size, dtype=np.float32), zs.ravel()], axis=1)
+
+    idx = np.arange((n + 1) * (n + 1), dtype=np.int32).reshape(n + 1, n + 1)
+    a, b = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel()
+    c, d = idx[1:, :-1].ravel(), idx[1:, 1:].ravel()
+    tris = np.concatenate([np.stack([a, c, b], axis=1), np.stack([b, c, d], axis=1)])
+    return verts, tris
+
+
+def timeit(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    navmesh = rd.Navmesh()
+    print(f'{"triangles":>12} {"load_mesh (s)":>14} {"write_obj (s)":>14}')
+
+    for n in (32, 128, 512, 1024):
+        verts, tris = make_grid(n)
+        t_load = timeit(lambda: navmesh.load_mesh(verts, tris))
+        t_write = timeit(lambda: os.remove(rd.write_obj(verts, tris)))
+        print(f'{len(tris):>12} {t_load:>14.4f} {t_write:>14.4f}')
+
+
+if __name__ == '__main__':
+    main()
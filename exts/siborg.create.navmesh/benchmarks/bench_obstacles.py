@@ -0,0 +1,72 @@
+'''
+Benchmark for dynamic obstacles on a tiled NavmeshInterface: latency of update_obstacles against the
+number of obstacles, for unbudgeted updates and with a per frame tile budget, compared with a full rebuild.
+
+Imports the extension, so run it inside Kit (e.g. paste it into the Script Editor).
+'''
+
+import time
+
+import numpy as np
+
+from siborg.create.navmesh import core
+
+
+def make_floor(size_x, size_z, step=2.0):
+    xs, zs = np.meshgrid(np.arange(0, size_x + step, step), np.arange(0, size_z + step, step))
+    vertices = np.stack([xs.ravel(), np.zeros(xs.size), zs.ravel()], axis=1)
+    idx = np.arange(xs.size).reshape(xs.shape)
+    quads = np.stack([idx[:-1, :-1], idx[1:, :-1], idx[1:, 1:], idx[:-1, 1:]], axis=-1).reshape(-1, 4)
+    return vertices, np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])
+
+
+def make_interface(size_x, size_z, tile_size):
+    navmesh = core.NavmeshInterface(tile_size=tile_size)
+    vertices, triangles = make_floor(size_x, size_z)
+    navmesh.navmesh.load_mesh(vertices, triangles)
+    navmesh.build_navmesh()
+    return navmesh
+
+
+def frame_latencies(navmesh, obstacle_ids, rng, size_x, size_z, num_frames, moves_per_frame, max_tiles):
+    '''Move a few obstacles every frame and update with the tile budget, returns per frame latencies'''
+    latencies = []
+    for _ in range(num_frames):
+        for i in rng.choice(len(obstacle_ids), moves_per_frame, replace=False):
+            navmesh.remove_obstacle(obstacle_ids[i])
+            obstacle_ids[i] = navmesh.add_cylinder_obstacle((rng.uniform(0, size_x), 0, rng.uniform(0, size_z)), 0.8, 2.0)
+        start = time.perf_counter()
+        navmesh.update_obstacles(max_tiles=max_tiles)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies)
+
+
+def main(size_x=300.0, size_z=200.0, tile_size=16.0, num_frames=60, max_tiles=4):
+    rng = np.random.default_rng(0)
+
+    navmesh = make_interface(size_x, size_z, tile_size)
+    start = time.perf_counter()
+    navmesh.build_navmesh()
+    full_build = time.perf_counter() - start
+    print(f'full rebuild: {full_build * 1e3:.1f} ms for {len(navmesh.navmesh.tiles)} tiles')
+
+    print(f'{"obstacles":>10} {"add all (ms)":>13} {"frame mean (ms)":>16} {"frame max (ms)":>15} {"pending":>8}')
+    for num_obstacles in (10, 100, 1000):
+        navmesh = make_interface(size_x, size_z, tile_size)
+
+        obstacle_ids = [
+            navmesh.add_cylinder_obstacle((rng.uniform(0, size_x), 0, rng.uniform(0, size_z)), 0.8, 2.0)
+            for _ in range(num_obstacles)
+        ]
+        start = time.perf_counter()
+        navmesh.update_obstacles()
+        add_all = time.perf_counter() - start
+
+        moves = max(1, num_obstacles // 20)
+        latencies = frame_latencies(navmesh, obstacle_ids, rng, size_x, size_z, num_frames, moves, max_tiles)
+        print(f'{num_obstacles:>10} {add_all * 1e3:>13.1f} {latencies.mean() * 1e3:>16.2f} '
+              f'{latencies.max() * 1e3:>15.2f} {navmesh.pending_tiles:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+'''
+Benchmark for batch path queries, paths per second for the serial query and the openmp
+query against the number of threads.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_paths.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import pyrecast as rd
+
+from bench_tiles import make_facility
+
+
+def build_facility(size_x=200.0, size_z=120.0, num_pallets=100):
+    floor_v, floor_t, pallets = make_facility(size_x, size_z, num_pallets)
+
+    all_v, all_t, offset = [floor_v], [floor_t], len(floor_v)
+    for v, t in pallets:
+        all_v.append(v)
+        all_t.append(t + offset)
+        offset += len(v)
+
+    navmesh = rd.Navmesh()
+    navmesh.load_mesh(np.concatenate(all_v), np.concatenate(all_t))
+    navmesh.build_navmesh()
+    return navmesh
+
+
+def rate(fn, num_paths):
+    start = time.perf_counter()
+    fn()
+    return num_paths / (time.perf_counter() - start)
+
+
+def main(num_paths=20000, max_threads=None):
+    max_threads = max_threads or os.cpu_count()
+    navmesh = build_facility()
+
+    starts = navmesh.get_random_points(num_paths)
+    ends = navmesh.get_random_points(num_paths)
+
+    print(f'{num_paths} paths')
+    print(f'{"query":>16} {"threads":>8} {"paths/s":>10}')
+    print(f'{"find_paths":>16} {1:>8} {rate(lambda: navmesh.find_paths(starts, ends), num_paths):>10.0f}')
+
+    threads = 1
+    while threads <= max_threads:
+        paths_per_sec = rate(lambda: navmesh.find_paths_parallel(starts, ends, num_threads=threads), num_paths)
+        print(f'{"find_paths_par":>16} {threads:>8} {paths_per_sec:>10.0f}')
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main()
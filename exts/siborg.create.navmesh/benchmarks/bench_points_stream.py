@@ -0,0 +1,66 @@
+'''
+Benchmark for streaming agent positions: redefining the Points prim every frame (create_geompoints style)
+versus usd_utils.PointsStream, live and recorded as time samples.
+
+Needs pxr and omni importable, so run it with the Kit python:
+    ./app/python.sh exts/siborg.create.navmesh/benchmarks/bench_points_stream.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+from pxr import Usd, UsdGeom, Vt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import usd_utils
+
+
+def frames(num_agents, num_frames, seed=0):
+    '''float64 agent positions moving a little every frame, like a crowd sim hands them over'''
+    rng = np.random.default_rng(seed)
+    positions = rng.random((num_agents, 3)) * 100
+    for _ in range(num_frames):
+        positions += rng.normal(scale=0.1, size=positions.shape)
+        yield positions
+
+
+def legacy(stage, num_agents, num_frames):
+    latencies = []
+    for positions in frames(num_agents, num_frames):
+        t0 = time.perf_counter()
+        prim = UsdGeom.Points.Define(stage, '/World/Points')
+        prim.CreatePointsAttr()
+        prim.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant).Set([(1, 0, 0)])
+        prim.GetPointsAttr().Set(Vt.Vec3fArray.FromNumpy(np.asarray(positions, dtype=float)))
+        latencies.append(time.perf_counter() - t0)
+    return np.mean(latencies), np.max(latencies)
+
+
+def streamed(stage, num_agents, num_frames, record=False, decimation=1):
+    stream = usd_utils.PointsStream(num_agents, record=record, decimation=decimation, stage=stage)
+    for positions in frames(num_agents, num_frames):
+        stream.update(positions)
+    stream.finish()
+    stats = stream.stats
+    return stats['mean_latency'], stats['max_latency']
+
+
+def main(num_frames=200):
+    print(f'{"agents":>8} {"mode":>14} {"mean (ms)":>10} {"max (ms)":>10}')
+    for num_agents in (1000, 10000, 100000):
+        modes = (
+            ('legacy', lambda s: legacy(s, num_agents, num_frames)),
+            ('stream', lambda s: streamed(s, num_agents, num_frames)),
+            ('record', lambda s: streamed(s, num_agents, num_frames, record=True)),
+            ('record 1/4', lambda s: streamed(s, num_agents, num_frames, record=True, decimation=4)),
+        )
+        for name, run in modes:
+            stage = Usd.Stage.CreateInMemory()
+            mean, worst = run(stage)
+            print(f'{num_agents:>8} {name:>14} {mean * 1e3:>10.3f} {worst * 1e3:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+'''
+Benchmark for building navmeshes for several agent profiles: one Navmesh per profile, each loaded and
+built in turn, versus a NavmeshSet that loads the geometry once and then builds the profiles in turn.
+
+The memory of each profile is the growth of the process RSS over its build, as the binding doesn't
+report its allocations. Memory freed by the allocator during a build may stay resident, so these are
+upper bounds on what the profile keeps.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_profiles.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import pyrecast as rd
+
+from bench_tiles import make_facility
+
+
+PROFILES = {
+    'forklift': {'agentRadius': 1.2, 'agentHeight': 2.5, 'agentMaxClimb': 0.2},
+    'pedestrian': {'agentRadius': 0.3, 'agentHeight': 1.8},
+    'amr': {'agentRadius': 0.5, 'agentHeight': 0.6, 'agentMaxClimb': 0.05, 'agentMaxSlope': 10.0},
+}
+
+
+def facility_mesh(size_x, size_z, num_pallets):
+    floor_v, floor_t, pallets = make_facility(size_x, size_z, num_pallets)
+
+    all_v, all_t, offset = [floor_v], [floor_t], len(floor_v)
+    for v, t in pallets:
+        all_v.append(v)
+        all_t.append(t + offset)
+        offset += len(v)
+    return np.concatenate(all_v), np.concatenate(all_t)
+
+
+def separate(vertices, triangles):
+    navmeshes = {}
+    for name, profile in PROFILES.items():
+        navmesh = rd.Navmesh()
+        navmesh.load_mesh(vertices, triangles)
+        navmesh.build_navmesh(profile)
+        navmeshes[name] = navmesh
+    return navmeshes
+
+
+def as_set(vertices, triangles):
+    navmesh_set = rd.NavmeshSet(PROFILES)
+    navmesh_set.load_mesh(vertices, triangles)
+    navmesh_set.build_navmesh()
+    return navmesh_set
+
+
+def current_rss():
+    '''Resident memory of this process in bytes, None where it can't be read'''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def profile_rss(vertices, triangles):
+    '''RSS growth over the build of each profile of a set, in bytes'''
+    navmesh_set = rd.NavmeshSet(PROFILES)
+    navmesh_set.load_mesh(vertices, triangles)
+
+    growth = {}
+    for name in navmesh_set:
+        before = current_rss()
+        navmesh_set[name].build_navmesh(navmesh_set.profile_settings(name))
+        after = current_rss()
+        growth[name] = None if before is None else after - before
+    return growth
+
+
+def main():
+    print(f'{"floor":>10} {"separate (s)":>13} {"set (s)":>8}')
+    for size_x, size_z, num_pallets in ((100.0, 60.0, 50), (200.0, 120.0, 200), (400.0, 240.0, 800)):
+        vertices, triangles = facility_mesh(size_x, size_z, num_pallets)
+
+        start = time.perf_counter()
+        separate(vertices, triangles)
+        t_separate = time.perf_counter() - start
+
+        start = time.perf_counter()
+        navmesh_set = as_set(vertices, triangles)
+        t_set = time.perf_counter() - start
+
+        print(f'{f"{size_x:.0f}x{size_z:.0f}":>10} {t_separate:>13.3f} {t_set:>8.3f}')
+
+    input_bytes = navmesh_set.array_bytes()['input']
+    print(f'{"input":>12}: {input_bytes / 1024**2:.2f} MiB of arrays, shared by all profiles')
+    for name, nbytes in profile_rss(vertices, triangles).items():
+        rss_text = f'{nbytes / 1024**2:.2f} MiB' if nbytes is not None else 'n/a'
+        print(f'{name:>12}: RSS growth over its build {rss_text}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''
+Benchmark for sampling.sample_triangles, points per second with and without a bounding box,
+against the native get_random_points.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_sampling.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import sampling
+
+from bench_paths import build_facility
+
+
+def rate(fn, num_points):
+    start = time.perf_counter()
+    fn()
+    return num_points / (time.perf_counter() - start)
+
+
+def consume(chunks):
+    for _ in chunks:
+        pass
+
+
+def main(num_points=5000000):
+    navmesh = build_facility()
+    trivert, _, _ = navmesh.get_navmesh_polygons()
+    triangles = np.asarray(trivert, dtype=np.float32).reshape(-1, 3, 3)
+    bbox = (triangles.min(axis=(0, 1)), (triangles.min(axis=(0, 1)) + triangles.max(axis=(0, 1))) / 2)
+
+    print(f'{len(triangles)} navmesh triangles, {num_points} points')
+    print(f'{"sampler":>24} {"points/s":>12}')
+
+    t = rate(lambda: consume(sampling.sample_triangles(triangles, num_points, seed=0)), num_points)
+    print(f'{"sample_triangles":>24} {t:>12.0f}')
+
+    t = rate(lambda: consume(sampling.sample_triangles(triangles, num_points, seed=0, bbox=bbox)), num_points)
+    print(f'{"sample_triangles (bbox)":>24} {t:>12.0f}')
+
+    n = num_points // 50
+    t = rate(lambda: navmesh.get_random_points(n), n)
+    print(f'{"native get_random_points":>24} {t:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
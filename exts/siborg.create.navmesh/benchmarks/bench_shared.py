@@ -0,0 +1,117 @@
+'''
+Benchmark for serving queries from several worker processes: every worker building its own navmesh
+from geometry it is sent, versus attaching to a navmesh published once with pyrecast.publish_shared.
+Reports the time from starting the workers to each worker's first path query, and the peak RSS of
+the workers.
+
+The binary can't save or load a built navmesh, so the shared workers still build, from the obj file
+published with the geometry. Only the copies of the geometry and writing an obj file per worker are saved,
+and the native build dwarfs both. On a 1 CPU Linux box with the default facility (28800 triangles, a
+0.5 MB published file), attaching was no faster and used the same memory:
+
+    workers   ttfq build (s)   ttfq attach (s)   rss per worker (MB)
+          1             0.61              0.59                  75.2
+          4             2.42              3.08                  75.2
+          8             4.28              5.62                  75.2
+
+The time to the first query grows with the workers because their builds share the CPU.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_shared.py
+'''
+
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import pyrecast as rd
+
+from bench_profiles import facility_mesh
+
+
+def peak_rss_mb():
+    '''Peak resident memory of this process in MB, None if it can't be read'''
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2**20
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 2**20 if sys.platform == 'darwin' else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def first_query(navmesh, queue):
+    starts = navmesh.get_random_points(1)
+    navmesh.find_paths(starts, navmesh.get_random_points(1))
+    queue.put((time.time(), peak_rss_mb()))
+
+
+def build_worker(vertices, triangles, queue):
+    navmesh = rd.Navmesh()
+    navmesh.load_mesh(vertices, triangles)
+    navmesh.build_navmesh()
+    first_query(navmesh, queue)
+
+
+def attach_worker(path, queue):
+    shared = rd.SharedNavmesh(path)
+    first_query(shared.navmesh(), queue)
+
+
+def run_workers(target, args, num_workers):
+    '''Start the workers together, returns their times to first query (s) and peak RSS (MB)'''
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    start = time.time()
+    workers = [ctx.Process(target=target, args=args + (queue,)) for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    ttfq = np.array([done - start for done, _ in results])
+    rss = [mem for _, mem in results if mem is not None]
+    return ttfq, np.array(rss) if rss else None
+
+
+def report(name, ttfq, rss):
+    rss_text = f'{rss.mean():>10.1f} {rss.sum():>10.1f}' if rss is not None else f'{"-":>10} {"-":>10}'
+    print(f'{name:>10} {ttfq.mean():>10.2f} {ttfq.max():>10.2f} {rss_text}')
+
+
+def main(size_x=300.0, size_z=200.0, num_pallets=2000):
+    vertices, triangles = facility_mesh(size_x, size_z, num_pallets)
+    vertices = vertices.astype(np.float32)
+    triangles = triangles.astype(np.int32)
+    print(f'{len(triangles)} input triangles')
+
+    start = time.perf_counter()
+    navmesh = rd.Navmesh()
+    navmesh.load_mesh(vertices, triangles)
+    navmesh.build_navmesh()
+    path = rd.publish_shared(navmesh)
+    publish = time.perf_counter() - start
+
+    print(f'publish (build + write): {publish:.2f} s, workers build from {os.path.getsize(path) / 2**20:.1f} MB at {path}')
+
+    try:
+        for num_workers in (1, 4, 8):
+            print(f'{num_workers} workers')
+            print(f'{"mode":>10} {"ttfq (s)":>10} {"max (s)":>10} {"rss (MB)":>10} {"total":>10}')
+            report('build', *run_workers(build_worker, (vertices, triangles), num_workers))
+            report('attach', *run_workers(attach_worker, (path,), num_workers))
+    finally:
+        rd.SharedNavmesh.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
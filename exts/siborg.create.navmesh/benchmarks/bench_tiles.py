@@ -0,0 +1,91 @@
+'''
+Benchmark for the tiled navmesh, full rebuild against moving a single obstacle.
+
+Runs outside of Kit with the same python the binaries were built for (3.10):
+    python benchmarks/bench_tiles.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import pyrecast as rd
+
+
+def make_floor(size_x, size_z, step=5.0):
+    '''Flat floor in y-up split into step sized quads'''
+    xs, zs = np.meshgrid(np.arange(0, size_x + step, step), np.arange(0, size_z + step, step))
+    nx, nz = xs.shape[1] - 1, xs.shape[0] - 1
+    verts = np.stack([xs.ravel(), np.zeros(xs.size), zs.ravel()], axis=1).astype(np.float32)
+
+    idx = np.arange(xs.size, dtype=np.int32).reshape(nz + 1, nx + 1)
+    a, b = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel()
+    c, d = idx[1:, :-1].ravel(), idx[1:, 1:].ravel()
+    tris = np.concatenate([np.stack([a, c, b], axis=1), np.stack([b, c, d], axis=1)])
+    return verts, tris
+
+
+def make_box(center, size=(1.2, 1.0, 1.2)):
+    '''Closed box mesh (a pallet), y-up'''
+    half = np.asarray(size, dtype=np.float32) / 2
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (0, 2) for z in (-1, 1)], dtype=np.float32)
+    verts = np.asarray(center, dtype=np.float32) + corners * half
+    tris = np.array([[0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+                     [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]], dtype=np.int32)
+    return verts, tris
+
+
+def make_facility(size_x, size_z, num_pallets):
+    rng = np.random.default_rng(0)
+    floor_v, floor_t = make_floor(size_x, size_z)
+    pallets = [make_box((rng.uniform(0, size_x), 0, rng.uniform(0, size_z))) for _ in range(num_pallets)]
+    return floor_v, floor_t, pallets
+
+
+def make_tiled(floor_v, floor_t, pallets, tile_size):
+    tiled = rd.TiledNavmesh(tile_size)
+    tiled.set_source('floor', floor_v, floor_t)
+    for i, (v, t) in enumerate(pallets):
+        tiled.set_source(f'pallet{i}', v, t)
+    return tiled
+
+
+def main(size_x=500.0, size_z=300.0, tile_size=32.0, num_pallets=200):
+    floor_v, floor_t, pallets = make_facility(size_x, size_z, num_pallets)
+
+    # Solo navmesh over everything
+    all_v, all_t, offset = [floor_v], [floor_t], len(floor_v)
+    for v, t in pallets:
+        all_v.append(v)
+        all_t.append(t + offset)
+        offset += len(v)
+    solo = rd.Navmesh()
+    solo.load_mesh(np.concatenate(all_v), np.concatenate(all_t))
+    start = time.perf_counter()
+    solo.build_navmesh()
+    t_solo = time.perf_counter() - start
+
+    # Tiled navmesh, one source per pallet
+    tiled = make_tiled(floor_v, floor_t, pallets, tile_size)
+    start = time.perf_counter()
+    tiled.build_navmesh()
+    t_tiled = time.perf_counter() - start
+
+    # Move one pallet and only rebuild what it touched
+    v, t = pallets[0]
+    tiled.set_source('pallet0', v + np.array([3.0, 0, 0], dtype=np.float32), t)
+    start = time.perf_counter()
+    rebuilt = tiled.rebuild_dirty()
+    t_update = time.perf_counter() - start
+
+    print(f'facility {size_x:.0f} x {size_z:.0f}, {len(tiled.tiles)} tiles of {tile_size}')
+    print(f'solo full build:      {t_solo:.3f} s')
+    print(f'tiled full build:     {t_tiled:.3f} s')
+    print(f'single pallet update: {t_update:.3f} s ({rebuilt} tiles rebuilt)')
+
+
+if __name__ == '__main__':
+    main()
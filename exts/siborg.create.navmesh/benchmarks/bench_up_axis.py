@@ -0,0 +1,49 @@
+'''
+Benchmark for NavmeshInterface._convert_up_axis, time per call against the previous float64 version.
+
+Imports the extension, so run it inside Kit (e.g. paste it into the Script Editor).
+'''
+
+import time
+
+import numpy as np
+
+from siborg.create.navmesh import core
+
+
+def legacy_convert(vertices, inverse=False):
+    '''The previous conversion: copy to a new array, allocate a float64 result, three column assignments'''
+    vertices = np.array(vertices)
+    v_copy = np.empty(shape=vertices.shape)
+    if inverse:
+        v_copy[:, 0], v_copy[:, 1], v_copy[:, 2] = vertices[:, 0], -vertices[:, 2], vertices[:, 1]
+    else:
+        v_copy[:, 0], v_copy[:, 1], v_copy[:, 2] = vertices[:, 0], vertices[:, 2], -vertices[:, 1]
+    return v_copy
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    navmesh = core.NavmeshInterface(up_axis='Z')
+
+    print(f'{"points":>8} {"legacy (us)":>12} {"new (us)":>10} {"out= (us)":>10} {"in place (us)":>14}')
+    for num_points in (10, 1000, 100000):
+        points = np.random.rand(num_points, 3).astype(np.float32)
+        out = np.empty_like(points)
+        repeat = max(10, 1000000 // num_points)
+
+        t_legacy = per_call(lambda: legacy_convert(points, inverse=True), repeat)
+        t_new = per_call(lambda: navmesh._convert_up_axis(points, inverse=True), repeat)
+        t_out = per_call(lambda: navmesh._convert_up_axis(points, inverse=True, out=out), repeat)
+        t_inplace = per_call(lambda: navmesh._convert_up_axis(out, inverse=True, out=out), repeat)
+
+        print(f'{num_points:>8} {t_legacy:>12.1f} {t_new:>10.1f} {t_out:>10.1f} {t_inplace:>14.1f}')
+
+
+main()
@@ -0,0 +1,72 @@
+'''
+Benchmark for authoring many agent paths: one UsdGeom.BasisCurves.Define per path (usd_utils.create_curve
+style) versus the bulk Sdf level writer usd_utils.write_paths, for the first draw and for redraws.
+
+Needs pxr and omni importable, so run it with the Kit python:
+    ./app/python.sh exts/siborg.create.navmesh/benchmarks/bench_usd_write.py
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+from pxr import Usd, UsdGeom, Vt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'siborg', 'create', 'navmesh'))
+import usd_utils
+
+
+def make_paths(num_paths, points_per_path=16, seed=0):
+    '''Random walk paths in the CSR layout of NavmeshInterface.find_paths_batch'''
+    rng = np.random.default_rng(seed)
+    points = np.cumsum(rng.normal(size=(num_paths * points_per_path, 3)), axis=0).astype(np.float32)
+    offsets = np.arange(0, num_paths * points_per_path + 1, points_per_path, dtype=np.int64)
+    return points, offsets
+
+
+def legacy_write(stage, points, offsets, prim_path='/World/Paths'):
+    '''One Define and a handful of attribute sets per path, like create_curve'''
+    for i in range(len(offsets) - 1):
+        nodes = points[offsets[i]:offsets[i + 1]]
+        prim = UsdGeom.BasisCurves.Define(stage, f'{prim_path}/Path_{i}')
+        prim.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(nodes))
+        prim.CreateCurveVertexCountsAttr().Set([len(nodes)])
+        prim.CreateTypeAttr().Set('linear')
+        prim.CreateWidthsAttr().Set(Vt.FloatArray([1.0]))
+        prim.SetWidthsInterpolation(UsdGeom.Tokens.constant)
+        prim.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant).Set([(0, 1, 0)])
+
+
+def bulk_write(stage, points, offsets, prim_path='/World/Paths'):
+    usd_utils.write_paths(points, offsets, prim_path=prim_path, stage=stage)
+
+
+def timed(write, num_paths, redraws=3):
+    '''Time of the first draw and the mean time of redrawing moved paths onto the same prims'''
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, '/World')
+    points, offsets = make_paths(num_paths)
+
+    t0 = time.perf_counter()
+    write(stage, points, offsets)
+    first = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(redraws):
+        write(stage, points + (i + 1), offsets)
+    redraw = (time.perf_counter() - t0) / redraws
+
+    return first, redraw
+
+
+def main():
+    print(f'{"paths":>8} {"writer":>8} {"first (s)":>10} {"redraw (s)":>11}')
+    for num_paths in (1000, 10000):
+        for name, write in (('legacy', legacy_write), ('bulk', bulk_write)):
+            first, redraw = timed(write, num_paths)
+            print(f'{num_paths:>8} {name:>8} {first:>10.3f} {redraw:>11.3f}')
+
+
+if __name__ == '__main__':
+    main()
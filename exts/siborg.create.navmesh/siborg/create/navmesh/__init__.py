@@ -1 +1,7 @@
-from .extension import *
+try:
+    import omni.ext
+except ImportError:
+    # Outside of Kit (query workers, headless baking) only the navmesh modules are imported
+    pass
+else:
+    from .extension import *
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PathCache:
+    '''
+    In-memory LRU cache of found paths.
+
+    Start and end points are quantized to cells of `cell_size`, so queries between nearby points
+    (e.g. from the same spawn zone to the same exit) share one cached path. A hit is the path of
+    another pair in the same cells, with its first and last points moved to the queried start and
+    end (see `splice`), so the rest of the path is only as exact as the cell size. Entries are
+    evicted least recently used first to stay under `max_bytes`.
+
+    The cache is shared by the caller's thread and the async query thread, every access takes a lock.
+    '''
+
+    # Rough per-entry cost of the key and dict bookkeeping, on top of the path data
+    entry_overhead = 200
+
+    def __init__(self, cell_size=0.5, max_bytes=64 * 1024**2):
+        self.cell_size = cell_size
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+
+    def keys(self, starts, ends, path_mode, path_style):
+        '''
+        Keys of (N,3) start/end pairs, the quantized start and end cells plus the query mode and style
+        '''
+        cells = np.floor(np.hstack([starts, ends]) / self.cell_size).astype(np.int64)
+        return [(tuple(row), path_mode, path_style) for row in cells.tolist()]
+
+    @staticmethod
+    def splice(path, start, end):
+        '''Copy of a cached flat path with its first and last points moved to start and end'''
+        path = np.array(path, dtype=np.float32)
+        if len(path) >= 3:
+            path[:3] = start
+            path[-3:] = end
+        return path
+
+    def get(self, key):
+        with self._lock:
+            path = self._entries.get(key)
+            if path is not None:
+                self._entries.move_to_end(key)
+            return path
+
+    def put(self, key, path):
+        path = np.asarray(path, dtype=np.float32)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key).nbytes + self.entry_overhead
+
+            self._entries[key] = path
+            self.bytes += path.nbytes + self.entry_overhead
+
+            while self.bytes > self.max_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self.bytes -= old.nbytes + self.entry_overhead
+
+    def record(self, hits, misses, hit_time, miss_time):
+        '''Add the counts and time spent answering hits (lookups) and misses (native queries)'''
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.hit_time += hit_time
+            self.miss_time += miss_time
+
+    def clear(self):
+        '''Drop every cached path, e.g. after the navmesh was rebuilt'''
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            queries = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / queries if queries else 0.0,
+                'hit_latency': self.hit_time / self.hits if self.hits else 0.0,
+                'miss_latency': self.miss_time / self.misses if self.misses else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+            }
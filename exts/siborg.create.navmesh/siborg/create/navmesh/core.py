@@ -1,92 +1,472 @@
-from collections import defaultdict
-import os
+import functools
+import importlib.util
+import sys
+import time
 import numpy as np
-import os
 
 from . import pyrecast as rd
 
-from . import usd_utils
-import omni.physx
+from . import sampling
+from . import obstacles
+from .cache import PathCache
+
+
+def _lazy_import(name):
+    '''
+    Import a module on first attribute access. usd_utils pulls in pxr, so a query-only interface
+    (e.g. in a worker process) never pays for it, only collecting or writing geometry does
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+usd_utils = _lazy_import(__package__ + '.usd_utils')
+
+# Pairs (or points) per native call in the async queries. The native calls hold the GIL, so each
+# one stalls the event loop until it returns; a chunk of 2000 takes a few milliseconds on a plain
+# floor, and longer paths take longer
+ASYNC_CHUNK_SIZE = 2000
+
 
 class NavmeshInterface:
-    def __init__(self, up_axis='Y'): 
-        self.navmesh = rd.Navmesh()
+    def __init__(self, up_axis='Y', tile_size=None, path_cache=None, profiles=None): 
+        # With a tile size the navmesh is built in tiles, and prim edits only rebuild the tiles they touch
+        self.tiled = tile_size is not None
+
+        # With profiles ({name: agent settings}) one navmesh per agent profile is built from the same
+        # geometry, queries go through self.profile(name)
+        self.profiles = profiles
+        self._profile_views = {}
+
+        if self.tiled and profiles is not None:
+            raise ValueError('Agent profiles are not supported on a tiled navmesh')
+        self.navmesh = self._new_navmesh(tile_size)
         self.built = False
+        self.settings = {}
         self.input_prim = None
         self.input_vert = None
         self.input_tri = None
         self.random_points = None
         self.wall_outline = []
 
+        # Optional cache.PathCache, repeated queries between the same cells are answered from it,
+        # with the path of the first pair in those cells and the ends moved to the queried points
+        self.path_cache = path_cache
+
+        # pyrecast.SharedNavmesh the navmesh was attached from, in query worker processes
+        self.shared = None
+
+        # Dynamic obstacles (tiled mode only) by id, each is its own source of the tiled navmesh
+        self._obstacles = {}
+        self._next_obstacle_id = 0
+
         # if z_up is true, we will need to do some conversion before sending to 
         # recast, then, we will convert it back to y_up (all functions will need to do that)
         if up_axis == 'Z': self.z_up = True
         else: self.z_up = False  
 
-    def _convert_up_axis(self, vertices, inverse=False):
+    def _new_navmesh(self, tile_size=None):
+        '''Empty native navmesh of the kind this interface was created with'''
+        if self.tiled:
+            return rd.TiledNavmesh(tile_size)
+        if self.profiles is not None:
+            return rd.NavmeshSet(self.profiles)
+        return rd.Navmesh()
+
+    def _convert_up_axis(self, vertices, inverse=False, out=None):
         '''
         Convert all data between navmesh interface and end-user to be in the correct up axis
 
         pyrecast assumes y-up, so only change when z-up is true
         inverse = True will convert y-up output back to z-up
+
+        Always returns an (N,3) float32 array. out= writes the result into a preallocated (N,3) float32
+        buffer, which can be vertices itself to convert in place. Without out= a new buffer is only 
+        allocated if the input is already a float32 array (so the caller's data is never modified)
         '''
+        src = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+
+        if out is None:
+            # asarray already made a private copy for lists and other dtypes, convert that in place
+            is_copy = not (isinstance(vertices, np.ndarray) and np.may_share_memory(src, vertices))
+            if not self.z_up or is_copy:
+                out = src
+            else:
+                out = np.empty_like(src)
+
         if self.z_up == False:
-            return vertices
-        
-        vertices = np.array(vertices)
-        v_copy = np.empty(shape=vertices.shape)
+            if out is not src:
+                out[...] = src
+            return out
+
+        # The conversion is a fixed swap of y and z with one sign flip, only y needs saving when in place
+        y = src[:, 1]
+        if np.may_share_memory(src, out):
+            y = y.copy()
+
+        out[:, 0] = src[:, 0]
         if inverse:
-            # Convert data we have been given in y-up into the z-up of scene (e.g. output from recast)
-            v_copy[:, 0], v_copy[:, 1], v_copy[:, 2] = vertices[:, 0], -vertices[:, 2], vertices[:, 1]
+            # Convert data we have been given in y-up into the z-up of scene (e.g. output from recast), (x, -z, y)
+            np.negative(src[:, 2], out=out[:, 1])
+            out[:, 2] = y
         else: 
-            # Convert the up axis from Y to Z
-            v_copy[:, 0], v_copy[:, 1], v_copy[:, 2] = vertices[:, 0], vertices[:, 2], -vertices[:, 1]
+            # Convert the up axis from Y to Z, (x, z, -y)
+            out[:, 1] = src[:, 2]
+            np.negative(y, out=out[:, 2])
 
-        vertices = v_copy
-        return vertices
+        return out
 
     def get_random_points(self, num_points):
+        self._single_navmesh()
         if not self.built:
             return None
-        self.random_points = self.navmesh.get_random_points(num_points)
+        self.random_points = np.asarray(self.navmesh.get_random_points(num_points), dtype=np.float32).reshape(-1, 3)
         
-        # Check if we need to convert the up axis
-        self.random_points = self._convert_up_axis(self.random_points, inverse=True)
+        # Check if we need to convert the up axis, the points are ours so convert in place
+        self.random_points = self._convert_up_axis(self.random_points, inverse=True, out=self.random_points)
         
         return self.random_points
 
+    def sample_points(self, num_points, seed=None, bbox=None, polygons=None, chunk_size=65536):
+        '''
+        Generate reproducible random points spread evenly (by area) over the navmesh, in chunks
+
+        seed makes the samples reproducible
+        bbox = (min, max) in scene coordinates restricts the points to that box
+        polygons restricts the points to these triangles of get_navmesh_polygons (indices into navmesh_t)
+
+        Returns a generator of (N,3) float32 chunks, num_points in total
+        '''
+        self._single_navmesh()
+        if not self.built:
+            return None
+
+        v, t = self.get_navmesh_polygons()
+        triangles = v[t] if polygons is None else v[t[polygons]]
+
+        return sampling.sample_triangles(triangles, num_points, seed=seed, bbox=bbox, chunk_size=chunk_size)
+
     def load_mesh(self, prim):
-        self.input_vert, self.input_tri  = usd_utils.parent_and_children_as_mesh(prim)
+        vertices, triangles = usd_utils.parent_and_children_as_mesh(prim)
         self.input_prim = prim
-        
-        self.input_vert = self._convert_up_axis(self.input_vert)
+        self.load_geometry(vertices, triangles)
+
+    def load_geometry(self, vertices, triangles):
+        '''
+        Load (N,3) vertices in the stage's up axis and (M,3) triangles, e.g. collected with usd_utils.get_mesh
+        '''
+        self.input_vert = self._convert_up_axis(vertices)
+        self.input_tri = triangles
 
         self.navmesh.load_mesh(self.input_vert, self.input_tri)
+        # Loading a single mesh replaces every source of a tiled navmesh, obstacles included
+        for obstacle_id in self._obstacles:
+            self._set_obstacle_source(obstacle_id)
+        self._invalidate_paths()
 
     def build_navmesh(self, settings={}):
+        # Any cached path may be stale once the navmesh changes
+        self._invalidate_paths()
+        self.settings = dict(settings)
+
+        # The obstacle geometry depends on the agent height
+        agent_height = rd.merge_settings(settings)['agentHeight']
+        for obstacle_id in self._obstacles:
+            self._set_obstacle_source(obstacle_id, agent_height=agent_height)
+
         self.navmesh.build_navmesh(settings)
         self.built = True
 
-    def find_paths(self, starts, ends):
+    def build_replacement(self, vertices, triangles, settings=None):
+        '''
+        Build a new native navmesh from (N,3) vertices and (M,3) triangles already in recast space,
+        without touching the current one. Safe to run on a worker thread, see swap_navmesh.
+
+        settings defaults to the settings of the last build_navmesh. Not available in tiled mode,
+        where tiles are rebuilt and swapped in one by one instead
+        '''
+        if self.tiled:
+            raise RuntimeError('A tiled navmesh is rebuilt per tile, use update_prim or navmesh.rebuild_dirty')
+        if settings is None:
+            settings = self.settings
 
-        starts = [self._convert_up_axis(starts)]
-        ends = [self._convert_up_axis(ends)]
+        navmesh = self._new_navmesh()
+        navmesh.load_mesh(vertices, triangles)
+        navmesh.build_navmesh(settings)
+        return navmesh
+
+    def swap_navmesh(self, navmesh, vertices=None, triangles=None, settings=None):
+        '''
+        Swap in a navmesh made with build_replacement. Queries before the swap use the old navmesh
+        and queries after it the new one, none see a half built navmesh. Call it from the thread
+        the queries are made on.
+        '''
+        self.navmesh = navmesh
+        if vertices is not None:
+            self.input_vert, self.input_tri = vertices, triangles
+        if settings is not None:
+            self.settings = dict(settings)
+        self.built = True
 
-        paths = self.navmesh.find_paths(starts, ends)
-        path_pnts = np.asarray(paths).reshape(-1, 3)
-        path_pnts = self._convert_up_axis(path_pnts, inverse=True)
+        self._invalidate_paths()
+
+    def share(self, path=None):
+        '''
+        Publish the geometry and settings of the built navmesh for query worker processes, which build
+        their own navmesh from them with NavmeshInterface.attach
+
+        Returns the path of the published file, see pyrecast.shared
+        '''
+        if self.tiled or self.profiles is not None:
+            raise RuntimeError('Only a single navmesh can be shared, not a tiled navmesh or agent profiles')
+        if not self.built:
+            raise RuntimeError('Build the navmesh before sharing it')
+        return rd.publish_shared(self.navmesh, path, metadata={'up_axis': 'Z' if self.z_up else 'Y'})
+
+    @classmethod
+    def attach(cls, path, path_cache=None):
+        '''
+        Query interface on a navmesh published with share(), for a worker process. The geometry stays
+        in the shared mapping, but the binary can't load a built navmesh, so this still runs the full
+        native build in this process (from the published obj file, see pyrecast.SharedNavmesh.navmesh)
+        '''
+        shared = rd.SharedNavmesh(path)
+        interface = cls(up_axis=shared.metadata.get('up_axis', 'Y'), path_cache=path_cache)
+        interface.shared = shared
+        interface.navmesh = shared.navmesh()
+        interface.settings = shared.settings
+        interface.built = True
+        return interface
+
+    def _query_paths(self, starts, ends, query, path_mode, path_style):
+        '''
+        Run a native path query for (N,3) start/end pairs already in recast space, returns a list of paths
+
+        Pairs found in the path cache (if there is one) are answered from it, only the rest are queried.
+        A cached path was found for another pair in the same cells, its ends are moved to the queried points
+        '''
+        if self.path_cache is None:
+            return query(starts, ends)
+
+        start_time = time.perf_counter()
+        keys = self.path_cache.keys(starts, ends, path_mode, path_style)
+        paths = [self.path_cache.get(key) for key in keys]
+        missing = [i for i, path in enumerate(paths) if path is None]
+        for i, path in enumerate(paths):
+            if path is not None:
+                paths[i] = self.path_cache.splice(path, starts[i], ends[i])
+        lookup_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        if missing:
+            found = query(starts[missing], ends[missing])
+            tolerance = self._end_tolerance()
+            for i, path in zip(missing, found):
+                paths[i] = path
+                # Splicing a partial path would move its end onto the unreachable end, so it isn't cached
+                if len(path) < 3 or np.linalg.norm(np.asarray(path[-3:]) - ends[i]) <= tolerance:
+                    self.path_cache.put(keys[i], path)
+        query_time = time.perf_counter() - start_time
+
+        self.path_cache.record(len(paths) - len(missing), len(missing), lookup_time, query_time)
+        return paths
+
+    def _invalidate_paths(self):
+        if self.path_cache is not None:
+            self.path_cache.clear()
+        for view in self._profile_views.values():
+            view._invalidate_paths()
+
+    def profile(self, name):
+        '''
+        Interface to the navmesh of one agent profile, for queries (paths, closest points, polygons, ...)
+
+        See ProfileView, the view follows rebuilds and swaps of this interface
+        '''
+        if self.profiles is None:
+            raise RuntimeError('No agent profiles, create the NavmeshInterface with profiles')
+        if name not in self.profiles:
+            raise ValueError(f'Unknown agent profile {name!r}')
+
+        view = self._profile_views.get(name)
+        if view is None:
+            view = self._profile_views[name] = ProfileView(self, name)
+        return view
+
+    def _single_navmesh(self):
+        # With agent profiles there is a navmesh per profile, queries have to say which one
+        if self.profiles is not None:
+            raise RuntimeError('The navmesh has agent profiles, query one of them with profile(name)')
+
+    def profile_array_bytes(self):
+        '''Sizes of the numpy arrays behind the agent profiles, not their memory, see pyrecast.NavmeshSet.array_bytes'''
+        if self.profiles is None:
+            raise RuntimeError('No agent profiles, create the NavmeshInterface with profiles')
+        return self.navmesh.array_bytes()
+
+    def _end_tolerance(self):
+        # Detour moves the end onto the navmesh, up to the agent radius away from walls and about a climb step up or down
+        settings = rd.merge_settings(self.settings)
+        return settings['agentRadius'] + settings['agentMaxClimb']
+
+    def _path_arrays(self, paths, ends=None):
+        points, offsets, status = rd.pack_paths(paths, ends, self._end_tolerance())
+        points = self._convert_up_axis(points, inverse=True, out=points)
+        return points, offsets, status
+
+    def find_paths(self, starts, ends, path_mode=2, path_style=0):
+        self._single_navmesh()
+        starts = self._convert_up_axis(starts)
+        ends = self._convert_up_axis(ends)
+
+        query = functools.partial(self.navmesh.find_paths, pathMode=path_mode, pathStyle=path_style)
+        paths = self._query_paths(starts, ends, query, path_mode, path_style)
+
+        path_pnts, _, _ = rd.pack_paths(paths)
+        path_pnts = self._convert_up_axis(path_pnts, inverse=True, out=path_pnts)
 
         return path_pnts
 
+    def find_paths_batch(self, starts, ends, parallel=False, path_mode=2, path_style=0):
+        '''
+        Find a path for every start/end pair, returned as flat arrays instead of nested lists
+
+        parallel = True uses the openmp query of the native module
+
+        Returns (points, offsets, status): points is (P,3) float32 for all paths together, path i is 
+        points[offsets[i]:offsets[i+1]], and status[i] is rd.PATH_FOUND, rd.PATH_NOT_FOUND, or rd.PATH_PARTIAL
+        for a path that stops at the closest reachable point short of an unreachable end
+        '''
+        self._single_navmesh()
+        starts = self._convert_up_axis(starts)
+        ends = self._convert_up_axis(ends)
+
+        method = self.navmesh.find_paths_parallel if parallel else self.navmesh.find_paths
+        query = functools.partial(method, pathMode=path_mode, pathStyle=path_style)
+        paths = self._query_paths(starts, ends, query, path_mode, path_style)
+
+        return self._path_arrays(paths, ends)
+
+    def find_paths_parallel(self, starts, ends, num_threads=None, chunk_size=None, path_mode=2, path_style=0):
+        '''
+        Find paths for a batch of start/end pairs with the native openmp query, returned like find_paths_batch
+
+        num_threads sets the openmp thread count for this query only (None keeps the current setting)
+        chunk_size splits the batch into several native calls, which bounds how long each call holds on 
+        to the interpreter and lets results of large batches come back in pieces
+
+        With a path cache, pairs in already queried start and end cells get the cached path with its ends
+        moved to their start and end points, see cache.PathCache
+        '''
+        self._single_navmesh()
+        starts = self._convert_up_axis(starts)
+        ends = self._convert_up_axis(ends)
+
+        def query(starts, ends):
+            num_pairs = len(starts)
+            size = chunk_size or max(num_pairs, 1)
+
+            paths = []
+            for i in range(0, num_pairs, size):
+                paths.extend(self.navmesh.find_paths_parallel(starts[i:i + size], ends[i:i + size], 
+                                                              pathMode=path_mode, pathStyle=path_style, num_threads=num_threads))
+            return paths
+
+        paths = self._query_paths(starts, ends, query, path_mode, path_style)
+
+        return self._path_arrays(paths, ends)
+
+    def destroy(self):
+        '''Unmap a shared navmesh'''
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    async def find_paths_async(self, starts, ends, num_threads=None, chunk_size=ASYNC_CHUNK_SIZE):
+        '''
+        find_paths_parallel for callers on an event loop (e.g. the Kit UI), returned like find_paths_batch
+
+        The native query holds the GIL, so a worker thread would stall the loop just as much. The batch
+        is queried chunk_size pairs at a time on the calling thread instead, and the loop runs between
+        chunks, so each stall lasts one chunk. A navmesh swapped in meanwhile answers the later chunks
+        '''
+        # Only awaiting callers (e.g. the Kit UI) need asyncio, workers don't import it
+        import asyncio
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+
+        parts = []
+        for i in range(0, len(starts), chunk_size):
+            if parts:
+                await asyncio.sleep(0)
+            parts.append(self.find_paths_parallel(starts[i:i + chunk_size], ends[i:i + chunk_size], num_threads=num_threads))
+
+        if not parts:
+            return self._path_arrays([])
+        points = np.concatenate([part[0] for part in parts])
+        status = np.concatenate([part[2] for part in parts])
+        offsets = [np.zeros(1, dtype=parts[0][1].dtype)]
+        for _, part_offsets, _ in parts:
+            offsets.append(part_offsets[1:] + offsets[-1][-1])
+        return points, np.concatenate(offsets), status
+
+    def closest_points(self, points, search_extents=(10.0, 10.0, 10.0)):
+        '''
+        Snap (N,3) points (e.g. spawn positions or sensor readings) onto the navmesh
+
+        The binding snaps one point per native call, so this loops over the points
+
+        Returns (snapped, found): (N,3) float32 closest points, and an (N,) bool mask of found points. 
+        The binding returns no status, so found is a heuristic: a point counts as found if the snapped 
+        point is within search_extents of it along every axis. Points that are not found keep whatever 
+        the binding returned for them, which is uninitialized memory (e.g. 4.6e-41 or -3e23), not NaN
+        '''
+        self._single_navmesh()
+        points = self._convert_up_axis(points)
+        # Extents are sizes, so they only need the axes swapped, not the sign
+        extents = np.abs(self._convert_up_axis(np.asarray(search_extents, dtype=np.float32).reshape(1, 3)))
+
+        snapped = self.navmesh.get_closest_point(points)
+
+        with np.errstate(invalid='ignore'):
+            found = np.all(np.abs(snapped - points) <= extents, axis=1)
+
+        snapped = self._convert_up_axis(snapped, inverse=True, out=snapped)
+        return snapped, found
+
+    async def closest_points_async(self, points, search_extents=(10.0, 10.0, 10.0), chunk_size=ASYNC_CHUNK_SIZE):
+        '''
+        closest_points for callers on an event loop, chunk_size points at a time with the loop running
+        between chunks, see find_paths_async
+        '''
+        import asyncio
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+
+        snapped = np.empty((len(points), 3), dtype=np.float32)
+        found = np.empty(len(points), dtype=bool)
+        for i in range(0, len(points), chunk_size):
+            if i:
+                await asyncio.sleep(0)
+            snapped[i:i + chunk_size], found[i:i + chunk_size] = self.closest_points(points[i:i + chunk_size], search_extents)
+        return snapped, found
+
     def get_navmesh_raw_contours(self):
+        self._single_navmesh()
         rawvert, rawpolygons, _ = self.navmesh.get_navmesh_raw_contours()
         rawvert = self._convert_up_axis(rawvert, inverse=True)
         return rawvert, rawpolygons
 
     def get_navmesh_contours(self):
+        self._single_navmesh()
         vert, _, _ = self.navmesh.get_navmesh_contours()
 
-        vert = np.asarray(vert).reshape(-1, 3)
         # Convert if needed
         vert = self._convert_up_axis(vert, inverse=True)
         
@@ -98,96 +478,69 @@ class NavmeshInterface:
 
     def make_walls(self, vertices, edges, height):
 
-        # Extrude the walls up
-        vertices = np.array(vertices)  # Ensure vertices are a NumPy array
         vertices = self._convert_up_axis(vertices)
-        extruded_vertices = np.copy(vertices)
-        extruded_vertices[:, 1] += height  # Add height to the z-coordinate
-        side_triangles = []
-
-        # Go through each edge and create two triangles (square wall)
-        for edge in edges:
-            i, j = edge
-            A = vertices[i]
-            B = vertices[j]
-            A_prime = extruded_vertices[i]
-            B_prime = extruded_vertices[j]
-
-            triangle1 = [A, B, B_prime]
-            triangle2 = [A, B_prime, A_prime]
-            side_triangles.extend([triangle1, triangle2])
-
-        # Do the welding and extrusion
-        self.side_triangles = side_triangles
-        # Make faces
-        faces = []
-        verts = []
-        tri = 0
-        for i, face in enumerate(side_triangles):
-            for v in face:
-                verts.append(v)
-            faces.append([tri, tri+1, tri+2])
-            tri += 3
-
-        # weld faces and vertices to remove duplicates 
-        faces = np.asarray(faces)
-        v, inverse_indices = np.unique(verts, axis=0, return_inverse=True)
-        t = inverse_indices[faces.flatten()].reshape(faces.shape)
-
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+        # Weld the base vertices first, by index: only the vertices the edges use, and each position once
+        # (contours give every edge its own two vertices). Rows are compared as raw bytes, adding 0.0 
+        # turns -0.0 into 0.0 so they compare equal
+        used, edge_idx = np.unique(edges, return_inverse=True)
+        base = np.ascontiguousarray(vertices[used] + np.float32(0.0))
+        row_keys = base.view(np.dtype((np.void, base.dtype.itemsize * 3))).ravel()
+        _, first, weld = np.unique(row_keys, return_index=True, return_inverse=True)
+        base = base[first]
+        weld = weld.reshape(-1)[edge_idx.reshape(-1, 2)]
+
+        # Extrude the walls up, the extruded copy of base vertex k is vertex k + num_base
+        num_base = len(base)
+        extruded = base.copy()
+        extruded[:, 1] += height
+        v = np.concatenate([base, extruded])
+
+        # Every edge (A, B) makes a square wall of two triangles, (A, B, B') and (A, B', A')
+        a, b = weld[:, 0], weld[:, 1]
+        t = np.empty((2 * len(edges), 3), dtype=np.int64)
+        t[0::2] = np.stack([a, b, b + num_base], axis=1)
+        t[1::2] = np.stack([a, b + num_base, a + num_base], axis=1)
+
+        self.side_triangles = v[t]
         self.wall_v = v
         self.wall_t = t 
 
         return v, t
 
-    def make_outline(self):
-        # Go through the edges and make individual lines, it is what it is
+    def make_outline(self, prim_path="/World/Outline/WallOutline"):
+        # Put every contour edge into one BasisCurves prim, chaining consecutive edges into polylines
 
-        width = np.array([0.2], dtype=float)
+        width = 0.2
         color = (0.8,0.8,0.8)
 
-        # contour_edges = np.array(self.contour_edges)
-        # v, inverse_indices = np.unique(self.contour_verts, axis=0, return_inverse=True)
-        # e = inverse_indices[contour_edges.flatten()]
-        # e2 = e.reshape(contour_edges.shape)
-        # e3 = np.sort(e2, axis=1)
-
-        # # Use a set to keep track if a vertex is in the contour
-        # vertex_sets = []
+        verts = np.asarray(self.contour_verts, dtype=np.float32).reshape(-1, 3)
+        edges = np.asarray(self.contour_edges, dtype=np.int64).reshape(-1, 2)
+        A = verts[edges[:, 0]]
+        B = verts[edges[:, 1]]
+        self.wall_outline = np.stack([A, B], axis=1)
 
-        for idx, edge in enumerate(self.contour_edges):
-            i, j = edge
-            A = self.contour_verts[i]
-            B = self.contour_verts[j]
-            self.wall_outline.append([tuple(A), tuple(B)])
+        # A new curve starts wherever an edge does not begin at the end of the previous edge
+        new_curve = np.ones(len(edges), dtype=bool)
+        new_curve[1:] = np.any(A[1:] != B[:-1], axis=1)
 
-            # for jdx, vertex in enumerate([A, B]):
-            #     if vertex not in vertex_sets:
-            #         vertex_sets.append(vertex)
+        # Points of all curves back to back: the start of each curve, then the end of every edge
+        keep = np.stack([new_curve, np.ones(len(edges), dtype=bool)], axis=1).reshape(-1)
+        points = self.wall_outline.reshape(-1, 3)[keep]
 
-        # curves = defaultdict(list)
-        # curve_names = []
+        # Each curve has one point per edge plus its start point
+        curve_starts = np.flatnonzero(new_curve)
+        curve_vertex_counts = np.diff(np.append(curve_starts, len(edges))) + 1
 
-        # # Traverse edges, append to a list, and make a new list when a discontinuity is found
-        # for idx, edge in enumerate(self.wall_outline):
-        #     # check if the next edge is a discontinuity by it not having the same vertex as the current edge
-        #     if idx == 0:
-        #         curves[idx].extend(edge)
-        #         curve_names.append(idx)
-        #         continue
-        #     if (edge[0] not in curves[curve_names[-1]]) and (edge[1] not in curves[curve_names[-1]]):
+        # Clear the per-edge outline prims of earlier runs, then write the single curves prim
+        parent_path = prim_path.rsplit('/', 1)[0]
+        usd_utils.remove_children(parent_path, keep=[prim_path])
+        usd_utils.create_curves(points, curve_vertex_counts, prim_path=prim_path, width=width, color=color)
 
-        #         curves[idx].extend(edge)
-        #         curve_names.append(idx)
-        #     else:
-        #         curves[curve_names[-1]].extend(edge)
-
-
-        # print(curves)
-
-        for idx, curve in enumerate(self.wall_outline):
-            usd_utils.create_curve(curve, prim_path=f"/World/Outline/WallOutline{idx}", width=width, color=color)
-
-    def get_selected_prim(self):
+    def selected_prims(self):
+        '''Prims selected on the stage, kept as the input prims without collecting their geometry'''
+        import omni.usd
         self.stage = omni.usd.get_context().get_stage()
 
         # Get the selections from the stage
@@ -196,7 +549,13 @@ class NavmeshInterface:
         selected_paths = self._selection.get_selected_prim_paths()
         # Expects a list, so take first selection
         self.input_prim = [self.stage.GetPrimAtPath(x) for x in selected_paths]
+        return self.input_prim
 
+    def get_selected_prim(self):
+        self.selected_prims()
+
+        if self.tiled:
+            return self._load_tiled_prims(self.input_prim)
 
         self.input_vert, self.input_tri = usd_utils.get_all_stage_mesh(self.stage , self.input_prim)
 
@@ -208,25 +567,269 @@ class NavmeshInterface:
         self.input_vert = self._convert_up_axis(self.input_vert)
         
         self.navmesh.load_mesh(self.input_vert, self.input_tri)
+        self._invalidate_paths()
+        return True
+
+    def _load_tiled_prims(self, prims):
+        '''
+        Load each prim as its own source of the tiled navmesh, so the tiles it overlaps are tracked
+        '''
+        self._invalidate_paths()
+
+        paths = {str(prim.GetPath()) for prim in prims}
+        paths.update(self._obstacle_key(obstacle_id) for obstacle_id in self._obstacles)
+        for key in self.navmesh.sources:
+            if key not in paths:
+                self.navmesh.remove_source(key)
+
+        num_tris = 0
+        for prim in prims:
+            vert, tri = usd_utils.get_all_stage_mesh(prim.GetStage(), [prim])
+            self.navmesh.set_source(str(prim.GetPath()), self._convert_up_axis(vert), tri)
+            num_tris += len(tri)
+
+        if num_tris == 0:
+            print('No mesh found')
+            return False
         return True
 
+    def update_prim(self, prim):
+        '''
+        Re-collect a prim after its geometry or transform changed, and rebuild only the tiles it 
+        overlaps (before or after the change). Only available in tiled mode.
+
+        Returns the number of tiles rebuilt
+        '''
+        self._check_tiled('update_prim')
+
+        vert, tri = usd_utils.get_all_stage_mesh(prim.GetStage(), [prim])
+        self.navmesh.set_source(str(prim.GetPath()), self._convert_up_axis(vert), tri)
+
+        if not self.built:
+            return 0
+        self._invalidate_paths()
+        return self.navmesh.rebuild_dirty()
+
+    def _check_tiled(self, what):
+        if not self.tiled:
+            raise RuntimeError(f'{what} needs a tiled navmesh, create the NavmeshInterface with a tile_size')
+
+    @staticmethod
+    def _obstacle_key(obstacle_id):
+        return ('obstacle', obstacle_id)
+
+    def _add_obstacle(self, points, prim):
+        obstacle_id = self._next_obstacle_id
+        self._next_obstacle_id += 1
+        self._obstacles[obstacle_id] = {'points': np.asarray(points, dtype=np.float64).reshape(-1, 3), 'prim': prim, 'matrix': None}
+        self._set_obstacle_source(obstacle_id)
+        return obstacle_id
+
+    def _set_obstacle_source(self, obstacle_id, matrix=None, agent_height=None):
+        '''
+        (Re)build the blocking geometry of an obstacle and hand it to the tiled navmesh, which marks 
+        the tiles it covers (before and after) dirty
+        '''
+        obstacle = self._obstacles[obstacle_id]
+        points = obstacle['points']
+
+        if obstacle['prim'] is not None:
+            if matrix is None:
+                matrix = usd_utils.world_matrices([obstacle['prim']])[0]
+            obstacle['matrix'] = matrix
+            points = points @ matrix[:3, :3] + matrix[3, :3]
+
+        if agent_height is None:
+            agent_height = rd.merge_settings(self.navmesh.settings)['agentHeight']
+
+        vert, tri = obstacles.obstacle_prism(self._convert_up_axis(points), agent_height)
+        self.navmesh.set_source(self._obstacle_key(obstacle_id), vert, tri)
+
+    def add_cylinder_obstacle(self, position, radius, height, segments=16, prim=None):
+        '''
+        Add an upright cylinder obstacle standing on `position`, returns the obstacle id
+
+        With a prim, position is in the prim's space and the obstacle follows the prim (see update_obstacles).
+        The tiles it covers are rebuilt on the next update_obstacles
+        '''
+        self._check_tiled('Obstacles')
+        points = self._convert_up_axis(obstacles.cylinder_points(radius, height, segments), inverse=True)
+        return self._add_obstacle(points + np.asarray(position, dtype=np.float32), prim)
+
+    def add_box_obstacle(self, bmin, bmax, prim=None):
+        '''
+        Add an axis aligned box obstacle from its min and max corners, returns the obstacle id
+
+        With a prim, the corners are in the prim's space and the obstacle follows the prim
+        '''
+        self._check_tiled('Obstacles')
+        return self._add_obstacle(obstacles.box_points(bmin, bmax), prim)
+
+    def add_oriented_box_obstacle(self, center, half_extents, yaw, prim=None):
+        '''
+        Add a box obstacle turned by `yaw` radians around the up axis, returns the obstacle id
+
+        With a prim, center is in the prim's space and the obstacle follows the prim
+        '''
+        self._check_tiled('Obstacles')
+        half_extents = np.abs(self._convert_up_axis(half_extents))[0]
+        points = self._convert_up_axis(obstacles.oriented_box_points(half_extents, yaw), inverse=True)
+        return self._add_obstacle(points + np.asarray(center, dtype=np.float32), prim)
+
+    def add_prim_obstacle(self, prim):
+        '''
+        Add the bounding box of a prim as an obstacle that follows the prim, e.g. a forklift or a door,
+        returns the obstacle id
+        '''
+        self._check_tiled('Obstacles')
+        return self._add_obstacle(usd_utils.local_bound_points(prim), prim)
+
+    def remove_obstacle(self, obstacle_id):
+        '''Remove an obstacle, the tiles it covered are rebuilt on the next update_obstacles'''
+        if self._obstacles.pop(obstacle_id, None) is not None:
+            self.navmesh.remove_source(self._obstacle_key(obstacle_id))
+
+    @property
+    def pending_tiles(self):
+        '''Number of tiles waiting to be rebuilt after obstacle (or prim) changes'''
+        return len(self.navmesh.dirty_tiles) if self.tiled else 0
+
+    def update_obstacles(self, max_tiles=None):
+        '''
+        Follow moved prims of bound obstacles and rebuild the tiles obstacles changed, call once a frame
+
+        max_tiles is the per frame budget, at most that many tiles are rebuilt and the rest wait for the 
+        next call. Tiles are swapped in once built, so queries in between keep using the old tiles.
+
+        Returns the number of tiles rebuilt
+        '''
+        bound = []
+        for obstacle_id, obstacle in list(self._obstacles.items()):
+            if obstacle['prim'] is None:
+                continue
+            if not obstacle['prim'].IsValid():
+                # The prim was deleted, so is its obstacle
+                self.remove_obstacle(obstacle_id)
+                continue
+            bound.append((obstacle_id, obstacle))
+
+        matrices = usd_utils.world_matrices([obstacle['prim'] for _, obstacle in bound])
+        for (obstacle_id, obstacle), matrix in zip(bound, matrices):
+            if not np.array_equal(matrix, obstacle['matrix']):
+                self._set_obstacle_source(obstacle_id, matrix=matrix)
+
+        if not self.built:
+            return 0
+        rebuilt = self.navmesh.rebuild_dirty(max_tiles=max_tiles)
+        if rebuilt:
+            self._invalidate_paths()
+        return rebuilt
+
     def get_navmesh_triangles(self):
+        self._single_navmesh()
         triangles = self.navmesh.get_navmesh_triangles()
         return triangles
 
     def get_navmesh_polygons(self):
+        '''
+        Navmesh triangles as soup, every triangle has its own 3 vertices: (3T,3) vertices, (T,3) indices
+        '''
+        self._single_navmesh()
         trivert,_,_ = self.navmesh.get_navmesh_polygons()
-        trivert = np.asarray(trivert).reshape(-1,3)
+        # Converted straight from the returned data into a single float32 buffer
+        self.navmesh_v = self._convert_up_axis(trivert, inverse=True)
+        self.navmesh_t = np.arange(len(self.navmesh_v), dtype=np.int32).reshape(-1, 3)
+
+        return self.navmesh_v, self.navmesh_t
+
+    def get_navmesh_mesh(self):
+        '''
+        Navmesh triangles as a welded, indexed mesh, each vertex position is stored once
 
-        print(f'Got navmesh')
+        Triangles are in the same order as get_navmesh_polygons. The binding doesn't return the area ids
+        or flags of the polygons, so there are none here either.
 
-        v = trivert
-        t = []
-        for i in range(0, len(trivert), 3):
-            t.append([i,i+1,i+2])
-        self.navmesh_v = np.array(v, dtype=np.float32)
-        self.navmesh_t = np.array(t, dtype=np.int32)
+        The weld runs on the whole triangle soup at once, so peak memory is the soup plus the index
+        arrays of np.unique over it, a few times the size of the returned vertices.
 
-        self.navmesh_v = self._convert_up_axis(self.navmesh_v, inverse=True)
+        Returns:
+            vertices (V,3) float32, triangles (T,3) int32
+        '''
+        self._single_navmesh()
+        trivert, _, _ = self.navmesh.get_navmesh_polygons()
+        soup = self._convert_up_axis(trivert, inverse=True)
+
+        # Shared corners come out of recast bit for bit equal, so weld by comparing rows as raw bytes
+        # (adding 0.0 turns -0.0 into 0.0 so they compare equal)
+        soup += np.float32(0.0)
+        row_keys = soup.view(np.dtype((np.void, soup.dtype.itemsize * 3))).ravel()
+        _, first, weld = np.unique(row_keys, return_index=True, return_inverse=True)
+
+        vertices = soup[first]
+        triangles = weld.reshape(-1, 3).astype(np.int32)
+
+        return vertices, triangles
+
+
+class ProfileView:
+    '''
+    Queries on the navmesh of one agent profile of a NavmeshInterface, made with NavmeshInterface.profile
+
+    The view holds no navmesh of its own, it looks up the profile's navmesh on the parent on every
+    call, so it stays valid when the parent is rebuilt or swaps in a new navmesh set. It has its own
+    path cache (paths differ between agents) when the parent was created with one.
+    '''
+
+    def __init__(self, parent, name):
+        self._parent = parent
+        self.name = name
+        self.profiles = None
+        self.random_points = None
 
-        return self.navmesh_v, self.navmesh_t
\ No newline at end of file
+        self.path_cache = None
+        if parent.path_cache is not None:
+            self.path_cache = PathCache(parent.path_cache.cell_size, parent.path_cache.max_bytes)
+
+    @property
+    def navmesh(self):
+        return self._parent.navmesh[self.name]
+
+    @property
+    def built(self):
+        return self._parent.built
+
+    @property
+    def z_up(self):
+        return self._parent.z_up
+
+    @property
+    def settings(self):
+        # The parent's settings with the agent settings of the profile on top, like NavmeshSet.profile_settings
+        settings = dict(self._parent.settings)
+        settings.update(self._parent.profiles[self.name])
+        return settings
+
+    def _invalidate_paths(self):
+        if self.path_cache is not None:
+            self.path_cache.clear()
+
+    # The queries themselves are the ones of a single navmesh interface
+    _single_navmesh = NavmeshInterface._single_navmesh
+    _convert_up_axis = NavmeshInterface._convert_up_axis
+    _query_paths = NavmeshInterface._query_paths
+    _end_tolerance = NavmeshInterface._end_tolerance
+    _path_arrays = NavmeshInterface._path_arrays
+
+    get_random_points = NavmeshInterface.get_random_points
+    sample_points = NavmeshInterface.sample_points
+    find_paths = NavmeshInterface.find_paths
+    find_paths_batch = NavmeshInterface.find_paths_batch
+    find_paths_parallel = NavmeshInterface.find_paths_parallel
+    find_paths_async = NavmeshInterface.find_paths_async
+    closest_points = NavmeshInterface.closest_points
+    closest_points_async = NavmeshInterface.closest_points_async
+    get_navmesh_raw_contours = NavmeshInterface.get_navmesh_raw_contours
+    get_navmesh_contours = NavmeshInterface.get_navmesh_contours
+    get_navmesh_triangles = NavmeshInterface.get_navmesh_triangles
+    get_navmesh_polygons = NavmeshInterface.get_navmesh_polygons
+    get_navmesh_mesh = NavmeshInterface.get_navmesh_mesh
@@ -1,9 +1,14 @@
+import asyncio
+
 import omni.ext
+import omni.kit.app
 import omni.ui as ui
 from pxr import Gf
 
 from . import core
 from . import usd_utils
+from . import watcher
+from . import pipeline
 from pxr import Usd, UsdGeom
 import numpy as np
 
@@ -19,6 +24,10 @@ class SiborgCreateNavmeshExtension(omni.ext.IExt):
         self.navmesh_settings = {}
         self.start_prim = None
         self.end_prim = None
+        self.watcher = None
+        self.build = None
+        self.build_task = None
+        self.last_mesh = None
 
         # colors 
         s_red = {"background_color": cl(160,0,0)}
@@ -41,27 +50,93 @@ class SiborgCreateNavmeshExtension(omni.ext.IExt):
                     self.pth_btn.style = s_red
 
                 def assign_mesh():
-                    # get the selected prim
-                    # load the mesh
+                    # keep the selected prims, their geometry is collected by the build
                     reset_btns()
+                    stop_watching()
 
                     stage = omni.usd.get_context().get_stage()
                     self.up_axis = UsdGeom.GetStageUpAxis(stage)
                     self.navmesh.z_up = self.up_axis == UsdGeom.Tokens.z
 
-                    if self.navmesh.get_selected_prim():
+                    if self.navmesh.selected_prims():
                         self.assign_btn.style = s_done
                         self.bld_btn.style = s_yellow
 
-                def build_navmesh():
-                    # build the navmesh
-                    self.navmesh.build_navmesh(settings=self.navmesh_settings)
+                def show_progress(stage, fraction):
+                    # overall progress, each stage gets an equal share of the bar
+                    done = pipeline.STAGES.index(stage) + fraction
+                    self.progress.model.set_value(done / len(pipeline.STAGES))
+                    self.progress_label.text = f"{stage} {fraction * 100:.0f}%"
+
+                def build_done(task):
+                    # the task is kept until it is done, report what went wrong instead of losing it
+                    if not task.cancelled() and task.exception() is not None:
+                        self.progress_label.text = "build failed"
+                        print(f'Navmesh build failed: {task.exception()!r}')
+
+                async def run_build(build):
+                    try:
+                        swapped = await build.run()
+                    finally:
+                        if self.build is build:
+                            self.build = None
+                            self.bld_btn.text = "Build Navmesh"
+                    if not swapped:
+                        self.progress_label.text = "cancelled" if build.cancelled else "no mesh found"
+                        return
+
+                    self.progress_label.text = "done " + ", ".join(f"{name} {t:.2f}s" for name, t in build.stage_times.items())
+                    # remember which navmesh the mesh belongs to, the watcher may swap in another one
+                    self.last_mesh = (self.navmesh.navmesh, build.mesh)
                     self.bld_btn.style = s_done
                     self.rnd_pnts_btn.style = s_green
                     self.rnd_pth_btn.style = s_green
                     self.mesh_btn.style = s_yellow   
                     self.pth_btn.style = s_green 
+                    if self.watcher is None:
+                        self.watch_btn.style = s_yellow
+
+                def build_navmesh():
+                    # a second click while building cancels the build
+                    if self.build is not None:
+                        self.build.cancel()
+                        return
+                    if not self.navmesh.input_prim:
+                        print('No mesh assigned')
+                        return
 
+                    # build in stages with progress, queries keep using the previous navmesh until it is done
+                    try:
+                        self.build = pipeline.NavmeshBuild(self.navmesh, self.navmesh.input_prim, settings=self.navmesh_settings,
+                                                           progress_fn=show_progress, yield_fn=omni.kit.app.get_app().next_update_async)
+                    except ValueError as e:
+                        # e.g. a tiled navmesh, which is rebuilt per tile (update_prim, Watch Changes) instead
+                        self.progress_label.text = "tiled: rebuilt per tile" if self.navmesh.tiled else "not started"
+                        print(f'Navmesh build not started: {e}')
+                        return
+                    self.bld_btn.text = "Cancel Build"
+                    self.build_task = asyncio.ensure_future(run_build(self.build))
+                    self.build_task.add_done_callback(build_done)
+
+                def stop_watching():
+                    if self.watcher is not None:
+                        self.watcher.destroy()
+                        self.watcher = None
+                        self.watch_btn.style = s_red
+
+                def toggle_watching():
+                    # rebuild the navmesh when the assigned meshes are edited, the UI stalls for each rebuild
+                    if self.watcher is not None:
+                        stop_watching()
+                        self.watch_btn.style = s_yellow
+                        return
+                    if not self.navmesh.built:
+                        print('Navmesh not built')
+                        return
+                    # the visualization prims are written under /World, don't rebuild for those
+                    self.watcher = watcher.NavmeshWatcher(self.navmesh, ignore_paths=['/World/navmeshmesh', '/World/Path', '/World/Points', '/World/Outline'])
+                    self.watcher.start()
+                    self.watch_btn.style = s_done
 
                 def get_random_points():
                     # get random points
@@ -85,8 +160,11 @@ class SiborgCreateNavmeshExtension(omni.ext.IExt):
                 def visualize_navmesh(): 
                     # get the navmesh triangles
                     if self.navmesh.built:
-                        v, t, = self.navmesh.get_navmesh_polygons()
-                        v = v.flatten()
+                        # the build already extracted the mesh of the navmesh it swapped in
+                        if self.last_mesh is not None and self.last_mesh[0] is self.navmesh.navmesh:
+                            v, t = self.last_mesh[1]
+                        else:
+                            v, t = self.navmesh.get_navmesh_mesh()
                         # create a usd color of blue with transparency
                         color = Gf.Vec3f(0.051208995, 0.774935, 0.94585985)
                         opacity = 0.89
@@ -131,12 +209,17 @@ class SiborgCreateNavmeshExtension(omni.ext.IExt):
                     self.end_prim = self.stage.GetPrimAtPath(self.end_prim) 
 
                 with ui.VStack():
-                    self.assign_btn = ui.Button("Assign Mesh", clicked_fn=assign_mesh, style=s_yellow)
+                    self.assign_btn = ui.Button("Use Selection", clicked_fn=assign_mesh, style=s_yellow)
                     self.bld_btn = ui.Button("Build Navmesh", clicked_fn=build_navmesh, style=s_red)
                     self.mesh_btn = ui.Button("Create Mesh", clicked_fn=visualize_navmesh, style=s_red)
                     self.rnd_pnts_btn = ui.Button("Get Random Points", clicked_fn=get_random_points, style=s_red)
                     self.rnd_pth_btn = ui.Button("Get Random Path", clicked_fn=get_path, style=s_red)
                     self.pth_btn = ui.Button("Get Start-End Path", clicked_fn=get_specific_path, style=s_red)
+                    self.watch_btn = ui.Button("Watch Changes", clicked_fn=toggle_watching, style=s_red)
+
+                with ui.HStack(height=20):
+                    self.progress = ui.ProgressBar()
+                    self.progress_label = ui.Label("", width=160)
 
 
                 with ui.HStack(height=30):
@@ -192,4 +275,9 @@ class SiborgCreateNavmeshExtension(omni.ext.IExt):
 
     def on_shutdown(self):
         print("[siborg.create.navmesh] siborg create navmesh shutdown")
+        if self.watcher is not None:
+            self.watcher.destroy()
+        if self.build is not None:
+            self.build.destroy()
+        self.navmesh.destroy()
         self._window.destroy()
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def cylinder_points(radius, height, segments=16):
+    '''Corner points (2*segments,3) of a y-up cylinder standing on the origin'''
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    ring = np.stack([radius * np.cos(angles), np.zeros(segments), radius * np.sin(angles)], axis=1)
+    top = ring.copy()
+    top[:, 1] = height
+    return np.concatenate([ring, top])
+
+
+def box_points(bmin, bmax):
+    '''Corner points (8,3) of an axis aligned box'''
+    bmin, bmax = np.asarray(bmin, dtype=np.float64), np.asarray(bmax, dtype=np.float64)
+    corners = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing='ij')).reshape(3, -1).T
+    return bmin + corners * (bmax - bmin)
+
+
+def oriented_box_points(half_extents, yaw):
+    '''Corner points (8,3) of a y-up box centered on the origin and turned by `yaw` radians around y'''
+    half_extents = np.asarray(half_extents, dtype=np.float64)
+    corners = box_points(-half_extents, half_extents)
+    c, s = np.cos(yaw), np.sin(yaw)
+    rot = np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]])
+    return corners @ rot
+
+
+def convex_hull_xz(points):
+    '''Convex hull of (N,3) points projected on xz, (M,2) counter clockwise in (x, z) (monotone chain)'''
+    xz = np.unique(np.round(points[:, [0, 2]], 6), axis=0)
+    if len(xz) < 3:
+        return xz
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in xz:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in xz[::-1]:
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return np.array(lower[:-1] + upper[:-1])
+
+
+def obstacle_prism(points, agent_height):
+    '''
+    Blocking geometry for an obstacle given by its (N,3) corner points in recast space (y-up)
+
+    The obstacle becomes a prism over the convex hull of its footprint: vertical side walls over its
+    full height, which are never walkable, and a downward facing cap inside at half the agent height
+    (or the obstacle height, if lower). The cap is not walkable either as it faces down, and leaves
+    too little clearance for the floor under the obstacle to be walkable. So there is no walkable
+    island inside or on top of the obstacle, agents only step over it if it is below the max climb.
+
+    Returns (V,3) float32 vertices and (T,3) int32 triangles
+    '''
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    hull = convex_hull_xz(points)
+    if len(hull) < 3:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int32)
+
+    ymin, ymax = points[:, 1].min(), points[:, 1].max()
+    cap_y = ymin + min(ymax - ymin, 0.5 * agent_height)
+
+    k = len(hull)
+    rings = [np.column_stack([hull[:, 0], np.full(k, y), hull[:, 1]]) for y in (ymin, ymax, cap_y)]
+    vertices = np.concatenate(rings)
+
+    # Side walls, a quad between the bottom ring (0..k-1) and the top ring (k..2k-1) per hull edge
+    i = np.arange(k)
+    j = (i + 1) % k
+    sides = np.concatenate([np.stack([i, j, j + k], axis=1), np.stack([i, j + k, i + k], axis=1)])
+
+    # Cap (2k..3k-1), fanned from its first vertex. The hull is counter clockwise in (x, z), so with
+    # recast's normal (v1 - v0) x (v2 - v0) the fan (0, f, f+1) faces down
+    fan = np.arange(1, k - 1)
+    cap = 2 * k + np.stack([np.zeros_like(fan), fan, fan + 1], axis=1)
+
+    return vertices.astype(np.float32), np.concatenate([sides, cap]).astype(np.int32)
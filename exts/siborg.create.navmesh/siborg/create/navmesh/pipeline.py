@@ -0,0 +1,167 @@
+'''
+Staged, cancellable navmesh builds with progress reporting.
+
+A build runs in three stages: 'collect' reads the geometry from the stage on the loop thread in
+chunks of meshes, yielding to the loop between chunks, as the stage may be edited on that thread.
+'build' runs the native build on a worker thread, next to the current navmesh, and 'extract' pulls
+the navmesh mesh out of the new navmesh on the worker as well. Only then is the new navmesh swapped
+into the NavmeshInterface, which keeps answering queries with the previous navmesh until then.
+
+The native build holds the GIL, so the loop (Kit's UI) is stalled for about as long as the build
+and extract stages take, the worker only keeps the collect stage and the swap on the loop thread.
+Progress is reported between stages, not during them.
+'''
+
+import asyncio
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import usd_utils
+
+
+STAGES = ('collect', 'build', 'extract')
+
+
+class BuildCancelled(Exception):
+    pass
+
+
+class NavmeshBuild:
+    '''
+    One build of a core.NavmeshInterface from USD prims, run with `await build.run()`.
+
+    progress_fn(stage, fraction) is called on the loop thread as the build advances, with stage one
+    of STAGES and fraction the progress within that stage. cancel() stops the build at the next
+    chunk or stage boundary, the native build itself can't be interrupted so its result is dropped.
+    Tiled navmeshes are rebuilt per tile already, see NavmeshInterface.update_prim.
+    '''
+
+    def __init__(self, navmesh, prims, settings={}, progress_fn=None, extract=True, chunk_size=256,
+                 yield_fn=None, executor=None):
+        '''
+        navmesh is the NavmeshInterface to build, prims the prims to collect the geometry from.
+        Meshes are collected chunk_size at a time, with `await yield_fn()` in between (defaults to
+        asyncio.sleep(0), in Kit pass omni.kit.app.get_app().next_update_async so frames get drawn).
+        The build and extract stages run on executor, by default a worker of the build's own that
+        is shut down when the build ends, is cancelled or destroyed. With extract the welded navmesh
+        mesh (see get_navmesh_mesh) is kept in self.mesh, not for an interface with agent profiles,
+        which has a mesh per profile.
+        '''
+        if navmesh.tiled:
+            raise ValueError('A tiled navmesh is rebuilt per tile, use update_prim or update_obstacles')
+
+        self.navmesh = navmesh
+        self.prims = list(prims)
+        self.settings = dict(settings)
+        self.progress_fn = progress_fn
+        self.extract = extract and navmesh.profiles is None
+        self.chunk_size = chunk_size
+        self.yield_fn = yield_fn or (lambda: asyncio.sleep(0))
+        # Only shut the executor down if the build created it
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+
+        self.stage = None
+        self.cancelled = False
+        self.mesh = None
+        self.stage_times = {}
+
+    def cancel(self):
+        '''Stop the build, the navmesh interface keeps its current navmesh'''
+        self.cancelled = True
+        self._shutdown()
+
+    def destroy(self):
+        '''Cancel the build and release its worker'''
+        self.cancel()
+
+    def _shutdown(self):
+        # A native build already running finishes on the worker, its result is dropped
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _progress(self, stage, fraction):
+        self.stage = stage
+        if self.progress_fn is not None:
+            self.progress_fn(stage, fraction)
+
+    def _check_cancelled(self):
+        if self.cancelled:
+            raise BuildCancelled()
+
+    async def _collect(self):
+        meshes = usd_utils.find_meshes(self.prims)
+
+        # Instances of a prototype end up next to each other, so most chunks read each prototype once
+        meshes.sort(key=lambda prim: str(usd_utils.mesh_source(prim).GetPath()))
+
+        points, faces = [], []
+        offset = 0
+        for start in range(0, len(meshes), self.chunk_size):
+            self._check_cancelled()
+            p, f = usd_utils.get_mesh(meshes[start:start + self.chunk_size])
+            points.append(p)
+            faces.append(f + offset)
+            offset += len(p)
+
+            self._progress('collect', min(start + self.chunk_size, len(meshes)) / len(meshes))
+            await self.yield_fn()
+
+        if not points:
+            return np.empty((0, 3), dtype=np.float64), np.empty((0, 3), dtype=np.int32)
+        return np.concatenate(points), np.concatenate(faces)
+
+    def _build(self, vert, tri):
+        vert = self.navmesh._convert_up_axis(vert)
+        return self.navmesh.build_replacement(vert, tri, self.settings), vert
+
+    def _extract(self, new_navmesh):
+        # Read the new navmesh through a copy of the interface, the interface itself still has the old one
+        staged = copy.copy(self.navmesh)
+        staged.navmesh = new_navmesh
+        return staged.get_navmesh_mesh()
+
+    async def _run_stage(self, name, fn, *args):
+        self._check_cancelled()
+        self._progress(name, 0.0)
+        start = time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, fn, *args)
+
+        self.stage_times[name] = time.perf_counter() - start
+        self._progress(name, 1.0)
+        return result
+
+    async def run(self):
+        '''
+        Run every stage and swap the new navmesh in
+
+        Returns True if the navmesh was swapped in, False if the build was cancelled or there was
+        no geometry to build from
+        '''
+        try:
+            self._check_cancelled()
+            self._progress('collect', 0.0)
+            start = time.perf_counter()
+            vert, tri = await self._collect()
+            self.stage_times['collect'] = time.perf_counter() - start
+            if len(tri) == 0:
+                print('No mesh found')
+                return False
+
+            new_navmesh, vert = await self._run_stage('build', self._build, vert, tri)
+            if self.extract:
+                self.mesh = await self._run_stage('extract', self._extract, new_navmesh)
+            self._check_cancelled()
+        except BuildCancelled:
+            return False
+        finally:
+            self._shutdown()
+
+        self.navmesh.input_prim = self.prims
+        self.navmesh.swap_navmesh(new_navmesh, vert, tri, self.settings)
+        return True
@@ -1,7 +1,10 @@
 '''# python.exe .\setup.py build_ext --inplace'''
 
 
-import shutil
+import ctypes
+import ctypes.util
+import itertools
+import sys
 import tempfile
 from typing import List, Tuple, Dict, Any
 
@@ -11,6 +14,163 @@ from . import PyRecast as rd
 import os
 
 
+# Settings used for anything not given to `Navmesh.build_navmesh`
+DEFAULT_SETTINGS = {
+    "cellSize": 0.3,
+    "cellHeight": 0.2,
+    "agentHeight": 2.0,
+    "agentRadius": 0.6,
+    "agentMaxClimb": 0.9,
+    "agentMaxSlope": 45.0,
+    "regionMinSize": 8,
+    "regionMergeSize": 20,
+    "edgeMaxLen": 12.0,
+    "edgeMaxError": 1.3,
+    "vertsPerPoly": 6.0,
+    "detailSampleDist": 6.0,
+    "detailSampleMaxError": 1.0,
+    "partitionType": 0
+}
+
+
+def merge_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Return the full settings dict that a build with `settings` will use.
+
+    Args:
+        settings (Dict[str, Any]): User provided settings, overriding the defaults.
+    '''
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(settings)
+    return merged
+
+
+_openmp = None
+
+
+def _openmp_runtime():
+    '''
+    Handle to the OpenMP runtime PyRecast is linked against (already loaded along with it), None if not found.
+    '''
+    global _openmp
+    if _openmp is None:
+        name = 'vcomp140.dll' if sys.platform == 'win32' else (ctypes.util.find_library('gomp') or 'libgomp.so.1')
+        try:
+            _openmp = ctypes.CDLL(name)
+        except OSError:
+            _openmp = False
+    return _openmp or None
+
+
+def max_threads() -> int:
+    '''
+    Number of OpenMP threads the next parallel query from the calling thread will use, None if the
+    OpenMP runtime could not be found.
+    '''
+    runtime = _openmp_runtime()
+    if runtime is None:
+        return None
+    return runtime.omp_get_max_threads()
+
+
+def set_num_threads(num_threads: int) -> bool:
+    '''
+    Set the number of OpenMP threads used by the parallel queries started from the calling thread.
+
+    The binding doesn't expose this, so it is set on the OpenMP runtime directly. The setting is 
+    per calling thread, as in OpenMP, and stays until it is set again.
+
+    Args:
+        num_threads (int): Number of threads.
+
+    Returns:
+        bool: False if the OpenMP runtime could not be found (the setting is then ignored).
+    '''
+    runtime = _openmp_runtime()
+    if runtime is None:
+        return False
+    runtime.omp_set_num_threads(int(num_threads))
+    return True
+
+
+# Per-path status codes of `pack_paths`
+PATH_FOUND = 0
+PATH_NOT_FOUND = 1
+# Detour returns a path towards the closest reachable point when the end can't be reached
+PATH_PARTIAL = 2
+
+
+def pack_paths(paths: List[List[float]], ends: np.ndarray = None, tolerance: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Pack the nested path lists returned by `find_paths` into flat arrays (CSR style).
+
+    Path i is `points[offsets[i]:offsets[i+1]]`.
+
+    Args:
+        paths (List[List[float]]): One flat [x, y, z, x, y, z, ...] list per path.
+        ends (np.ndarray): Optional (N,3) requested end of each path. A path whose last point is 
+            farther than `tolerance` from its end stops short of it and gets PATH_PARTIAL.
+        tolerance (float): How far the last point of a complete path can be from its requested end,
+            Detour moves the end onto the navmesh first.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (P,3) float32 points, (N+1,) int64 offsets 
+            and (N,) int8 status codes (PATH_FOUND, PATH_NOT_FOUND or PATH_PARTIAL).
+    '''
+    num_paths = len(paths)
+    lengths = np.fromiter(map(len, paths), dtype=np.int64, count=num_paths) // 3
+
+    offsets = np.zeros(num_paths + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Stream the values straight from the nested lists into one buffer
+    total = int(offsets[-1]) * 3
+    points = np.fromiter(itertools.chain.from_iterable(paths), dtype=np.float32, count=total).reshape(-1, 3)
+
+    status = np.where(lengths > 0, PATH_FOUND, PATH_NOT_FOUND).astype(np.int8)
+
+    if ends is not None and num_paths:
+        found = np.flatnonzero(lengths > 0)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        gap = np.linalg.norm(points[offsets[found + 1] - 1] - ends[found], axis=1)
+        status[found[gap > tolerance]] = PATH_PARTIAL
+
+    return points, offsets, status
+
+
+def write_obj(vertices: np.ndarray, triangles: np.ndarray, chunk_size: int = 65536, directory: str = None) -> str:
+    '''
+    Write a mesh to a new obj file next to this module (or in `directory`), for `load_obj`. The caller
+    removes the file.
+
+    Rows are formatted in chunks straight into a uniquely named file, so there is no per-value python
+    loop, no temporary copy of the file, and concurrent loads (e.g. tiles built on several threads)
+    don't overwrite each other.
+
+    Args:
+        vertices (np.ndarray): (N,3) float32 array of vertices.
+        triangles (np.ndarray): (M,3) int32 array of triangle vertex indices.
+        chunk_size (int): Number of rows formatted per write.
+        directory (str): Directory to write to, defaults to the directory of this module.
+
+    Returns:
+        str: Path of the written file.
+    '''
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+    fd, file_path = tempfile.mkstemp(suffix='.obj', prefix='file_', dir=directory)
+
+    with os.fdopen(fd, 'w') as obj_file:
+        for start in range(0, len(vertices), chunk_size):
+            chunk = vertices[start:start + chunk_size]
+            obj_file.write(("v %.9g %.9g %.9g\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+        for start in range(0, len(triangles), chunk_size):
+            # obj indices are 1-based
+            chunk = triangles[start:start + chunk_size] + 1
+            obj_file.write(("f %d %d %d\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+    return file_path
+
 
 class Navmesh:
     '''
@@ -22,6 +182,11 @@ class Navmesh:
         Initializes a new instance of the NavmeshInterface class.
         '''
         self._navmesh = rd.NavmeshInterface()
+        self.vertices = None
+        self.triangles = None
+        self.settings = {}
+        # True once a build produced a navmesh that can be queried
+        self.built = False
 
     def load_obj(self, file_path: str) -> None:
         '''
@@ -31,43 +196,27 @@ class Navmesh:
             file_path (str): Path to the file with extension *.obj.
         '''
         self._navmesh.load_obj(file_path)
-    def load_mesh(self, vertices: List[float], triangles: List[float]) -> None:
+    def load_mesh(self, vertices: np.ndarray, triangles: np.ndarray) -> None:
         '''
         Load mesh from vertices and triangles.
 
+        The binary only loads geometry from obj files, so the data is converted once into contiguous
+        float32/int32 buffers, written to a temporary obj file with `write_obj` and loaded with
+        `load_obj`.
+
         Args:
-            vertices (List[float]): List of vertices.
-            triangles (List[float]): List of triangles.
+            vertices (np.ndarray): (N,3) array of vertices.
+            triangles (np.ndarray): (M,3) array of triangle vertex indices.
         '''
-        # It's not obvious how to pass vertices and triangles to the C++ code.
-        # so instead we make a temporary obj file out of the data and secretly pass that
-
-        # Create a temporary obj file in memory
-        # vertices/=100
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        triangles = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+        self.vertices, self.triangles = vertices, triangles
 
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.obj') as temp_file:
-            obj_file_path = temp_file.name
-            for vertex in vertices:
-                temp_file.write(f"v {vertex[0]} {vertex[1]} {vertex[2]}\n")
-            for triangle in triangles:
-                temp_file.write(f"f ")
-                for tri in triangle:
-                    temp_file.write(f"{tri+1} ")
-                temp_file.write(f"\n")
-
-        # get the path of the temporary obj file
-        obj_file_path = temp_file.name 
-        print(f'Temp file path: {obj_file_path}')
-
-        # Copy the temporary obj file to a real file
-        # Get the directory of the current file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # Create the relative path to the real file
-        real_file_path = os.path.join(current_dir, 'file.obj')
-        shutil.copy(obj_file_path, real_file_path)
-
-        self._navmesh.load_obj(real_file_path)
+        real_file_path = write_obj(vertices, triangles)
+        try:
+            self._navmesh.load_obj(real_file_path)
+        finally:
+            os.remove(real_file_path)
 
     def build_navmesh(self, settings: Dict[str, Any] = {}) -> None:
         '''
@@ -94,28 +243,26 @@ class Navmesh:
                 Default settings will be used if a key is not provided in the settings dictionary.
         '''
 
-        # Define the default settings in a dict
-        default_settings = {
-            "cellSize": 0.3,
-            "cellHeight": 0.2,
-            "agentHeight": 2.0,
-            "agentRadius": 0.6,
-            "agentMaxClimb": 0.9,
-            "agentMaxSlope": 45.0,
-            "regionMinSize": 8,
-            "regionMergeSize": 20,
-            "edgeMaxLen": 12.0,
-            "edgeMaxError": 1.3,
-            "vertsPerPoly": 6.0,
-            "detailSampleDist": 6.0,
-            "detailSampleMaxError": 1.0,
-            "partitionType": 0
-        }
-        
         # Overriding the default settings with the user provided settings
-        default_settings.update(settings)
+        default_settings = merge_settings(settings)
     
         self._navmesh.build_navmesh(default_settings)
+        self.settings = default_settings
+        self.built = self._init_query()
+
+    def _init_query(self) -> bool:
+        '''
+        Run one throwaway path query on the new build.
+
+        The binding only sets up its Detour query object in `find_paths`, and `get_closest_point`
+        crashes the interpreter if no `find_paths` ran since the last build. A failed build (e.g. no
+        walkable surface) gives no path list at all, which is also how it is detected here.
+
+        Returns:
+            bool: True if the navmesh was built and can be queried.
+        '''
+        origin = np.zeros(3, dtype=np.float32)
+        return len(self._navmesh.find_paths(origin, origin, [10.0, 10.0, 10.0], 2, 0)) > 0
 
     def get_navmesh_raw_contours(self) -> Tuple[List[float], List[int], List[int]]:
         '''
@@ -172,7 +319,7 @@ class Navmesh:
 
         return self._navmesh.find_paths(starts, ends, searchSize, pathMode, pathStyle)
 
-    def find_paths_parallel(self, starts, ends, searchSize=[10.0,10.0,10.0], pathMode=2, pathStyle=0) -> List[float]:
+    def find_paths_parallel(self, starts, ends, searchSize=[10.0,10.0,10.0], pathMode=2, pathStyle=0, num_threads=None) -> List[float]:
         '''
         Find paths in parallel (uses openmp on the c++ side) between start and end points on the navmesh.
 
@@ -182,6 +329,8 @@ class Navmesh:
             searchSize (List[float]): The search size.
             pathMode (int): The path mode.
             pathStyle (int): The path style.
+            num_threads (int): Number of openmp threads for this call only, if None the current openmp
+                setting of the calling thread is used.
 
         Returns:
             List[float]: A list containing the paths.
@@ -189,7 +338,40 @@ class Navmesh:
         starts = np.asarray(starts, dtype=np.float32).flatten()
         ends = np.asarray(ends, dtype=np.float32).flatten()
 
-        return self._navmesh.find_paths_parallel(starts, ends, searchSize, pathMode, pathStyle)
+        if num_threads is None:
+            return self._navmesh.find_paths_parallel(starts, ends, searchSize, pathMode, pathStyle)
+
+        # The thread count is global openmp state, put it back so later calls are not affected
+        previous = max_threads()
+        set_num_threads(num_threads)
+        try:
+            return self._navmesh.find_paths_parallel(starts, ends, searchSize, pathMode, pathStyle)
+        finally:
+            if previous is not None:
+                set_num_threads(previous)
+
+    def get_closest_point(self, points) -> np.ndarray:
+        '''
+        Snap points to the closest point on the navmesh.
+
+        The binding snaps one point per call, so this is a python loop over the points. It returns
+        no status either: a point with no polygon near it comes back as uninitialized floats (e.g.
+        4.6e-41 or -3e23), not as NaN.
+
+        Args:
+            points: (N,3) points, or a single point.
+
+        Returns:
+            np.ndarray: (N,3) float32 closest points on the navmesh.
+        '''
+        if not self.built:
+            raise RuntimeError('The navmesh is not built, or its build failed')
+
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        res = np.empty(points.shape, dtype=np.float32)
+        for i, point in enumerate(points):
+            res[i] = self._navmesh.get_closest_point(point)
+        return res
 
     def get_random_points(self, num_points: int) -> List[float]:
         '''
@@ -202,6 +384,22 @@ class Navmesh:
             List[float]: List of random points.
         '''
         res  = self._navmesh.get_random_points(num_points)
-        res = np.asarray(res).reshape(-1,3)
+        res = np.asarray(res, dtype=np.float32).reshape(-1,3)
         return res
-    
+
+
+
+def __getattr__(name: str) -> Any:
+    '''
+    Import the tiled, multi-profile and shared navmeshes on first use, a query worker only needs `Navmesh`.
+    '''
+    if name == 'TiledNavmesh':
+        from .tiled import TiledNavmesh
+        return TiledNavmesh
+    if name == 'NavmeshSet':
+        from .profiles import NavmeshSet
+        return NavmeshSet
+    if name in ('SharedNavmesh', 'publish_shared'):
+        from . import shared
+        return getattr(shared, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,126 @@
+'''
+Navmeshes for several agent profiles (e.g. forklifts, pedestrians, AMRs) built from the same geometry.
+
+Recast voxelizes per agent size (the walkable height, climb and radius erosion all work on the
+heightfield), and the binding has no hook to share a heightfield between builds. So what is shared is
+everything before that: the geometry is converted and handed to the native module once, and the
+profiles are then voxelized and built one after the other. The binding holds the GIL for a whole build,
+so building them on threads would not be any faster.
+'''
+
+import os
+from typing import Any, Dict, Iterator
+
+import numpy as np
+
+from . import Navmesh, DEFAULT_SETTINGS, merge_settings, write_obj
+
+
+# The build settings that describe the agent, the rest are shared by all profiles
+AGENT_KEYS = ('agentRadius', 'agentHeight', 'agentMaxClimb', 'agentMaxSlope')
+
+
+class NavmeshSet:
+    '''
+    One `Navmesh` per agent profile, loaded from the same geometry and built one after another.
+
+    Profiles are given by name, each with its own agent settings (any of `AGENT_KEYS`), e.g.
+    {'forklift': {'agentRadius': 1.2, 'agentHeight': 2.5}, 'pedestrian': {'agentRadius': 0.3}}.
+    The navmesh of a profile is `navmesh_set[name]`.
+    '''
+
+    def __init__(self, profiles: Dict[str, Dict[str, Any]]) -> None:
+        '''
+        Args:
+            profiles (Dict[str, Dict[str, Any]]): Agent settings of each profile by name.
+        '''
+        if not profiles:
+            raise ValueError('A navmesh set needs at least one profile')
+        for name, profile in profiles.items():
+            unknown = set(profile) - set(DEFAULT_SETTINGS)
+            if unknown:
+                raise ValueError(f'Unknown settings in profile {name!r}: {sorted(unknown)}')
+
+        self.profiles = {name: dict(profile) for name, profile in profiles.items()}
+        self.settings = {}
+        self.built = False
+
+        self._navmeshes = {name: Navmesh() for name in self.profiles}
+        self.vertices = None
+        self.triangles = None
+
+    def __getitem__(self, name: str) -> Navmesh:
+        return self._navmeshes[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._navmeshes)
+
+    def __len__(self) -> int:
+        return len(self._navmeshes)
+
+    def load_mesh(self, vertices: np.ndarray, triangles: np.ndarray) -> None:
+        '''
+        Load the same mesh into every profile, see `Navmesh.load_mesh`.
+
+        The buffers are converted once and shared, and the obj file is written once and loaded by
+        every profile.
+        '''
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        triangles = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+        self.vertices, self.triangles = vertices, triangles
+
+        for navmesh in self._navmeshes.values():
+            navmesh.vertices, navmesh.triangles = vertices, triangles
+
+        file_path = write_obj(vertices, triangles)
+        try:
+            for navmesh in self._navmeshes.values():
+                navmesh._navmesh.load_obj(file_path)
+        finally:
+            os.remove(file_path)
+
+    def profile_settings(self, name: str) -> Dict[str, Any]:
+        '''
+        Full settings a profile is built with: the defaults, the shared settings, then the profile.
+        '''
+        settings = dict(self.settings)
+        settings.update(self.profiles[name])
+        return merge_settings(settings)
+
+    def build_navmesh(self, settings: Dict[str, Any] = {}) -> None:
+        '''
+        Build every profile, one after the other, see `Navmesh.build_navmesh`.
+
+        Args:
+            settings (Dict[str, Any]): Settings shared by all profiles, the agent settings of each
+                profile override these.
+        '''
+        self.settings = dict(settings)
+        for name, navmesh in self._navmeshes.items():
+            navmesh.build_navmesh(self.profile_settings(name))
+        self.built = True
+
+    def array_bytes(self) -> Dict[str, Any]:
+        '''
+        Sizes of the numpy arrays behind the profiles, in bytes.
+
+        This is not the memory a profile holds. The binding doesn't report its allocations, so the
+        native heightfields and Detour navmesh data are not counted; measure the process RSS for those
+        (benchmarks/bench_profiles.py does). 'input' is the input mesh arrays, loaded once for all
+        profiles, and 'polygons' the polygon vertices of each built profile as `get_navmesh_polygons`
+        returns them (float32).
+
+        Returns:
+            Dict[str, Any]: {'input': bytes, 'polygons': {name: bytes}}
+        '''
+        input_bytes = 0
+        if self.vertices is not None:
+            input_bytes = self.vertices.nbytes + self.triangles.nbytes
+
+        polygons = {}
+        for name, navmesh in self._navmeshes.items():
+            polygons[name] = 0
+            if self.built:
+                trivert, _, _ = navmesh.get_navmesh_polygons()
+                polygons[name] = np.asarray(trivert, dtype=np.float32).nbytes
+        return {'input': input_bytes, 'polygons': polygons}
@@ -0,0 +1,207 @@
+'''
+Publish the build inputs of a navmesh (geometry and settings) once, for query worker processes.
+
+This does not share a built navmesh. The binary can't save or load one, so every worker still runs
+the full native build and holds its own navmesh, which dominates both the time to the first query
+and the memory of a worker (see benchmarks/bench_shared.py). What is shared is only what the build
+starts from: the publishing process writes the loaded geometry and the build settings of a built
+`Navmesh` into one file, which workers map read-only, so the arrays are not copied into every worker.
+
+The bundled binary only loads geometry from obj files. So the publisher also writes the obj file
+once, next to the shared file, and workers load it directly instead of each formatting its own.
+
+Files go to /dev/shm when it exists, so on Linux the blob never touches the disk.
+'''
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+
+from . import Navmesh, write_obj
+
+
+MAGIC = b'RCNAVSH1'
+
+# Arrays start on cache line boundaries
+ALIGN = 64
+
+
+def _shared_dir() -> str:
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def publish_shared(navmesh: Navmesh, path: str = None, metadata: Dict[str, Any] = None) -> str:
+    '''
+    Write a built navmesh to a file that worker processes attach to with `SharedNavmesh`.
+
+    The file is written under a temporary name and renamed into place last, after the obj file it
+    names is complete, so workers never map a half written file. Publishing again to the same path
+    swaps the navmesh for new attaches and removes the obj file of the previous one (workers that
+    attached to it but haven't built yet fall back to loading the mapped arrays).
+
+    Args:
+        navmesh (Navmesh): A built navmesh with its geometry loaded through `load_mesh`.
+        path (str): File to write, defaults to a new file in /dev/shm (or the temp directory).
+        metadata (Dict[str, Any]): Extra JSON serializable values for the workers, e.g. the up axis.
+
+    Returns:
+        str: Path of the published file, remove it with `SharedNavmesh.unlink`.
+    '''
+    if navmesh.vertices is None:
+        raise ValueError('The navmesh has no loaded geometry to publish, load it with load_mesh')
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.navshm', prefix='navmesh_', dir=_shared_dir())
+        os.close(fd)
+
+    previous_obj = _obj_path(path) if os.path.exists(path) else None
+
+    # Unique name, so it is complete before the header that names it is in place
+    obj_path = write_obj(navmesh.vertices, navmesh.triangles, directory=os.path.dirname(os.path.abspath(path)))
+    header = {'settings': navmesh.settings, 'metadata': metadata or {}, 'arrays': {}, 'obj': os.path.basename(obj_path)}
+
+    # Array offsets are relative to the data, which starts at the first aligned offset after the header
+    arrays = {'vertices': navmesh.vertices, 'triangles': navmesh.triangles}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = [offset, array.dtype.str, list(array.shape)]
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name][0])
+            f.write(np.ascontiguousarray(array).data)
+    os.replace(tmp_path, path)
+
+    if previous_obj is not None and os.path.exists(previous_obj):
+        os.remove(previous_obj)
+    return path
+
+
+def _read_header(data) -> Dict[str, Any]:
+    '''Header of a published file (bytes or a mapping of it), raises ValueError for other files'''
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a shared navmesh')
+    (header_size,) = struct.unpack_from('<Q', data, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(bytes(data[start:start + header_size]))
+    header['data_start'] = _aligned(start + header_size)
+    return header
+
+
+def _obj_path(path: str) -> str:
+    '''Obj file published with a shared file, None if there is none or the file is not a shared navmesh'''
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(len(MAGIC) + 8)
+            (header_size,) = struct.unpack_from('<Q', head, len(MAGIC))
+            header = _read_header(head + f.read(header_size))
+    except (OSError, ValueError, struct.error):
+        return None
+    if not header.get('obj'):
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(path)), header['obj'])
+
+
+class SharedNavmesh:
+    '''
+    Read-only view of the build inputs published with `publish_shared`, in a worker process.
+
+    `vertices` and `triangles` are numpy views straight onto the mapped file. `navmesh()` builds the
+    query object of this process from them on first use.
+    '''
+
+    def __init__(self, path: str) -> None:
+        '''
+        Args:
+            path (str): Path returned by `publish_shared`.
+        '''
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            header = _read_header(self._mmap)
+        except ValueError:
+            self._mmap.close()
+            raise ValueError(f'{path} is not a shared navmesh')
+
+        self.settings = header['settings']
+        self.metadata = header['metadata']
+        self.obj_path = os.path.join(os.path.dirname(os.path.abspath(path)), header['obj']) if header.get('obj') else None
+
+        data_start = header['data_start']
+        self._arrays = {}
+        for name, (offset, dtype, shape) in header['arrays'].items():
+            count = int(np.prod(shape))
+            self._arrays[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=data_start + offset).reshape(shape)
+        self._navmesh = None
+
+    @property
+    def vertices(self) -> np.ndarray:
+        return self._arrays['vertices']
+
+    @property
+    def triangles(self) -> np.ndarray:
+        return self._arrays['triangles']
+
+    def navmesh(self) -> Navmesh:
+        '''
+        The query object of this process, built from the shared geometry and settings on first use.
+
+        This runs the full native build in every worker, only the geometry is shared. It is loaded
+        from the published obj file, or from the mapped arrays if the obj file is gone after a new
+        publish.
+
+        Returns:
+            Navmesh: A navmesh ready for queries, the same one on every call.
+        '''
+        if self._navmesh is None:
+            navmesh = Navmesh()
+            if self.obj_path is not None and os.path.exists(self.obj_path):
+                navmesh.load_obj(self.obj_path)
+                navmesh.vertices, navmesh.triangles = self.vertices, self.triangles
+            else:
+                navmesh.load_mesh(self.vertices, self.triangles)
+            navmesh.build_navmesh(self.settings)
+            self._navmesh = navmesh
+        return self._navmesh
+
+    def close(self) -> None:
+        '''
+        Unmap the file, the query object stays usable as the native navmesh has its own copy.
+
+        If the caller still holds views of `vertices` or `triangles`, the mapping can't be closed
+        yet and is released with the last of those views instead.
+        '''
+        if self._navmesh is not None:
+            self._navmesh.vertices = self._navmesh.triangles = None
+        # The views hold on to the mapping, drop them first
+        self._arrays = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    @staticmethod
+    def unlink(path: str) -> None:
+        '''Remove a published navmesh and its obj file, workers that have it mapped keep their mapping'''
+        obj_path = _obj_path(path)
+        if obj_path is not None and os.path.exists(obj_path):
+            os.remove(obj_path)
+        if os.path.exists(path):
+            os.remove(path)
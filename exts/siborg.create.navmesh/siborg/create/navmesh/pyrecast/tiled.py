@@ -0,0 +1,888 @@
+'''
+Tiled navmesh built from independent per-tile navmeshes.
+
+The PyRecast binary only exposes a solo build, so tiling is done on the python side: the input
+geometry is split on a fixed xz grid (y-up, recast space), every tile is built as its own navmesh
+from the geometry overlapping it plus a border, and only tiles touched by changed geometry are rebuilt.
+
+Tiles are joined on the python side as well. Portals are the points on the edge between two tiles
+where both tile navmeshes are walkable at the same height, the legs between the portals of a tile are
+found on that tile, and paths from one tile to another follow the cheapest chain of legs.
+'''
+
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from . import Navmesh, merge_settings
+
+
+def clip_polygon(poly: np.ndarray, bmin: Tuple[float, float], bmax: Tuple[float, float]) -> np.ndarray:
+    '''
+    Clip a convex polygon against an axis aligned box in the xz plane (Sutherland-Hodgman).
+
+    Args:
+        poly (np.ndarray): (N,3) polygon vertices.
+        bmin (Tuple[float, float]): Minimum x, z of the box.
+        bmax (Tuple[float, float]): Maximum x, z of the box.
+
+    Returns:
+        np.ndarray: (M,3) vertices of the clipped polygon, M is 0 if nothing is left.
+    '''
+    for axis, lo, hi in ((0, bmin[0], bmax[0]), (2, bmin[1], bmax[1])):
+        for bound, sign in ((lo, 1.0), (hi, -1.0)):
+            if len(poly) == 0:
+                return poly
+            # Signed distance to the clip plane, positive is inside
+            d = sign * (poly[:, axis] - bound)
+            nxt = np.roll(poly, -1, axis=0)
+            d_nxt = np.roll(d, -1)
+
+            out = []
+            for p, q, dp, dq in zip(poly, nxt, d, d_nxt):
+                if dp >= 0:
+                    out.append(p)
+                if (dp >= 0) != (dq >= 0):
+                    out.append(p + (q - p) * (dp / (dp - dq)))
+            poly = np.asarray(out, dtype=np.float32).reshape(-1, 3)
+    return poly
+
+
+def clip_segments(segments: np.ndarray, bmin: Tuple[float, float], bmax: Tuple[float, float]) -> np.ndarray:
+    '''
+    Clip line segments against an axis aligned box in the xz plane (Liang-Barsky).
+
+    Args:
+        segments (np.ndarray): (N,2,3) segment end points.
+        bmin (Tuple[float, float]): Minimum x, z of the box.
+        bmax (Tuple[float, float]): Maximum x, z of the box.
+
+    Returns:
+        np.ndarray: (M,2,3) parts of the segments inside the box, segments fully outside are dropped.
+    '''
+    segments = np.asarray(segments, dtype=np.float32).reshape(-1, 2, 3)
+    p0 = segments[:, 0]
+    d = segments[:, 1] - p0
+    t0 = np.zeros(len(segments), dtype=np.float32)
+    t1 = np.ones(len(segments), dtype=np.float32)
+    keep = np.ones(len(segments), dtype=bool)
+
+    for axis, lo, hi in ((0, bmin[0], bmax[0]), (2, bmin[1], bmax[1])):
+        for bound, sign in ((lo, -1.0), (hi, 1.0)):
+            # Inside where q + t * p <= 0
+            q = sign * (p0[:, axis] - bound)
+            p = sign * d[:, axis]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = -q / p
+            keep &= (p != 0) | (q <= 0)
+            t0 = np.where(p < 0, np.maximum(t0, t), t0)
+            t1 = np.where(p > 0, np.minimum(t1, t), t1)
+
+    keep &= t1 > t0
+    p0, d, t0, t1 = p0[keep], d[keep], t0[keep, None], t1[keep, None]
+    return np.stack([p0 + t0 * d, p0 + t1 * d], axis=1)
+
+
+def triangle_heights(triangles: np.ndarray, points_xz: np.ndarray, eps: float = 1e-5) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Heights of triangles over points in the xz plane, wherever a triangle covers a point.
+
+    Args:
+        triangles (np.ndarray): (T,3,3) triangle vertices.
+        points_xz (np.ndarray): (S,2) x, z of the points.
+        eps (float): Tolerance on the barycentric coordinates, so points on a shared edge are covered.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Point index and height of every (point, triangle) cover.
+    '''
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    e1 = (b - a)[:, [0, 2]]
+    e2 = (c - a)[:, [0, 2]]
+    den = e1[:, 0] * e2[:, 1] - e2[:, 0] * e1[:, 1]
+    # Vertical triangles cover no area on xz
+    den = np.where(np.abs(den) > 1e-12, den, np.nan)
+
+    # Solve p - a = u * e1 + v * e2 for every point and triangle
+    d = points_xz[:, None, :] - a[None, :, [0, 2]]
+    u = (d[..., 0] * e2[:, 1] - e2[:, 0] * d[..., 1]) / den
+    v = (e1[:, 0] * d[..., 1] - d[..., 0] * e1[:, 1]) / den
+    with np.errstate(invalid='ignore'):
+        inside = (u >= -eps) & (v >= -eps) & (u + v <= 1 + eps)
+
+    point_idx, tri_idx = np.nonzero(inside)
+    u, v = u[point_idx, tri_idx], v[point_idx, tri_idx]
+    heights = a[tri_idx, 1] + u * (b[tri_idx, 1] - a[tri_idx, 1]) + v * (c[tri_idx, 1] - a[tri_idx, 1])
+    return point_idx, heights
+
+
+def edge_portals(triangles_a: np.ndarray, triangles_b: np.ndarray, axis: int, coord: float,
+                 lo: float, hi: float, spacing: float, climb: float) -> np.ndarray:
+    '''
+    Portals on the edge between two tiles: the middle of every stretch of the edge where the navmeshes
+    of both tiles are walkable at the same height.
+
+    The edge is sampled every `spacing`, a sample is walkable from both sides if the two navmeshes are
+    within `climb` of each other over it, and neighbouring samples at about the same height make up a
+    stretch. Floors above each other give separate stretches.
+
+    Args:
+        triangles_a (np.ndarray): (T,3,3) navmesh triangles of the first tile.
+        triangles_b (np.ndarray): (T,3,3) navmesh triangles of the second tile.
+        axis (int): 0 if the edge is at x = coord, 2 if it is at z = coord.
+        coord (float): Position of the edge along `axis`.
+        lo (float): Start of the edge along the other axis.
+        hi (float): End of the edge along the other axis.
+        spacing (float): Distance between samples along the edge.
+        climb (float): Height difference still walked over, the agent max climb.
+
+    Returns:
+        np.ndarray: (P,3) float32 portal points.
+    '''
+    num = max(1, int(np.ceil((hi - lo) / spacing)))
+    along = lo + (np.arange(num) + 0.5) * (hi - lo) / num
+    points_xz = np.empty((num, 2), dtype=np.float64)
+    points_xz[:, axis // 2] = coord
+    points_xz[:, 1 - axis // 2] = along
+
+    sample_heights = []
+    for triangles in (triangles_a, triangles_b):
+        triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        # Only triangles crossing the edge line can cover a sample
+        crossing = (triangles[:, :, axis].min(axis=1) <= coord) & (triangles[:, :, axis].max(axis=1) >= coord)
+        heights = [[] for _ in range(num)]
+        for i, height in zip(*(x.tolist() for x in triangle_heights(triangles[crossing], points_xz))):
+            heights[i].append(height)
+        sample_heights.append(heights)
+
+    # Chain the walkable samples into stretches, a stretch continues over the next sample at about its height
+    stretches = []
+    open_stretches = []
+    for i in range(num):
+        heights_b = sample_heights[1][i]
+        matched = []
+        for height in sample_heights[0][i]:
+            # Points on a shared triangle edge are covered twice, keep each height once
+            if any(abs(height - hb) <= climb for hb in heights_b) and all(abs(height - m) > climb for m in matched):
+                matched.append(height)
+
+        next_open = []
+        for height in matched:
+            for stretch in open_stretches:
+                if all(stretch is not taken for taken in next_open) and abs(stretch[-1][1] - height) <= climb:
+                    break
+            else:
+                stretch = []
+                stretches.append(stretch)
+            stretch.append((i, height))
+            next_open.append(stretch)
+        open_stretches = next_open
+
+    portals = np.empty((len(stretches), 3), dtype=np.float32)
+    for k, stretch in enumerate(stretches):
+        i, height = stretch[len(stretch) // 2]
+        portals[k, axis] = coord
+        portals[k, 1] = height
+        portals[k, 2 - axis] = along[i]
+    return portals
+
+
+def path_length(path: List[float]) -> float:
+    '''Length of a flat [x, y, z, x, y, z, ...] path'''
+    points = np.asarray(path, dtype=np.float64).reshape(-1, 3)
+    return float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+
+
+def shortest_route(graph: Dict[Hashable, List[Tuple[Hashable, float, List[float]]]],
+                   start_legs: Dict[Hashable, Tuple[float, List[float]]],
+                   end_legs: Dict[Hashable, Tuple[float, List[float]]]) -> Optional[List[float]]:
+    '''
+    Cheapest path from a start point to an end point through the portal graph (Dijkstra).
+
+    Args:
+        graph (Dict): For every portal, the (portal, cost, path) legs leaving it.
+        start_legs (Dict): (cost, path) from the start point to the portals it reaches.
+        end_legs (Dict): (cost, path) from the portals that reach the end point to the end point.
+
+    Returns:
+        Optional[List[float]]: The legs joined into one flat path, None if the end can't be reached.
+    '''
+    end = object()
+    counter = itertools.count()
+    heap = [(cost, next(counter), node, None, path) for node, (cost, path) in start_legs.items()]
+    heapq.heapify(heap)
+
+    # How every settled node was reached: (previous node, path of the leg)
+    reached = {}
+    while heap:
+        cost, _, node, previous, path = heapq.heappop(heap)
+        if node in reached:
+            continue
+        reached[node] = (previous, path)
+        if node is end:
+            break
+
+        if node in end_legs:
+            end_cost, end_path = end_legs[node]
+            heapq.heappush(heap, (cost + end_cost, next(counter), end, node, end_path))
+        for next_node, leg_cost, leg_path in graph.get(node, ()):
+            if next_node not in reached:
+                heapq.heappush(heap, (cost + leg_cost, next(counter), next_node, node, leg_path))
+
+    if end not in reached:
+        return None
+
+    legs = []
+    node = end
+    while node is not None:
+        node, path = reached[node]
+        legs.append(path)
+    legs.reverse()
+
+    # Consecutive legs meet at a portal, keep that point once
+    route = list(legs[0])
+    for path in legs[1:]:
+        route.extend(path[3:])
+    return route
+
+
+def _triangle_rows(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    '''Sorted (T,) rows of raw triangle corner bytes, equal for meshes with the same triangles in any order'''
+    corners = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)[np.asarray(triangles).reshape(-1, 3)]
+    # Adding 0.0 turns -0.0 into 0.0 so they compare equal
+    corners = np.ascontiguousarray(corners.reshape(-1, 9) + np.float32(0.0))
+    return np.sort(corners.view(np.dtype((np.void, corners.itemsize * 9))).ravel())
+
+
+class TiledNavmesh:
+    '''
+    Navmesh split into square tiles on the xz plane, with incremental per-tile rebuilds.
+
+    Geometry is added per source (e.g. one per USD prim) with `set_source`. The tiles each source
+    overlaps are tracked, so changing or removing a source only marks those tiles dirty and
+    `rebuild_dirty` only rebuilds them.
+
+    Paths with both ends in one tile are found on that tile. Other paths go through the portals
+    between tiles (see `edge_portals`): the start is joined to the portals of its tile, the end to
+    the portals of its tile, and the cheapest chain of portal to portal legs in between is taken.
+    Portals and legs are worked out on the first query that needs them and kept until a tile next
+    to them is rebuilt. Pairs with no path come back as an empty path.
+    '''
+
+    def __init__(self, tile_size: float = 32.0, border: float = None, portal_spacing: float = 1.0) -> None:
+        '''
+        Args:
+            tile_size (float): Width of a tile along x and z.
+            border (float): Extra geometry included around each tile, defaults to the agent radius plus
+                three cells so walkable areas are not eroded at the tile edges.
+            portal_spacing (float): Distance between the samples on tile edges that portals are found from.
+        '''
+        self.tile_size = tile_size
+        self.border = border
+        self.portal_spacing = portal_spacing
+        self.settings = {}
+
+        self._sources = {}
+        self._tile_sources = {}
+        self._tiles = {}
+        self._dirty = set()
+        # Bumped whenever a tile is marked dirty, so tiles built from an older snapshot are not swapped in
+        self._versions = {}
+
+        # Per tile navmesh triangles (raw and clipped to the tile), portals per tile edge, and
+        # portal to portal legs per tile, dropped when a tile next to them is rebuilt
+        self._tile_triangles = {}
+        self._tile_clipped = {}
+        self._portals = {}
+        self._legs = {}
+        self._graph = None
+
+    @property
+    def tiles(self) -> Dict[Tuple[int, int], Navmesh]:
+        '''Built tiles, keyed by (tx, tz) grid coordinates'''
+        return self._tiles
+
+    @property
+    def dirty_tiles(self) -> set:
+        return set(self._dirty)
+
+    def _border(self) -> float:
+        if self.border is not None:
+            return self.border
+        settings = merge_settings(self.settings)
+        return settings["agentRadius"] + 3 * settings["cellSize"]
+
+    def tile_bounds(self, tile: Tuple[int, int], border: float = 0.0) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        '''Return (bmin, bmax) of a tile in x and z, grown by `border`'''
+        tx, tz = tile
+        bmin = (tx * self.tile_size - border, tz * self.tile_size - border)
+        bmax = ((tx + 1) * self.tile_size + border, (tz + 1) * self.tile_size + border)
+        return bmin, bmax
+
+    def tile_of(self, points: np.ndarray) -> np.ndarray:
+        '''Return the (N,2) tile coordinates that (N,3) points fall in'''
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        return np.floor(points[:, [0, 2]] / self.tile_size).astype(np.int64)
+
+    def _assign_tiles(self, key: Hashable) -> None:
+        '''Work out the range of tiles every triangle of a source overlaps (including the border)'''
+        vertices, triangles, _ = self._sources[key]
+        border = self._border()
+
+        if len(triangles) == 0:
+            tile_range = np.empty((0, 4), dtype=np.int64)
+        else:
+            tri_xz = vertices[triangles][:, :, [0, 2]]
+            tmin = np.floor((tri_xz.min(axis=1) - border) / self.tile_size).astype(np.int64)
+            tmax = np.floor((tri_xz.max(axis=1) + border) / self.tile_size).astype(np.int64)
+            tile_range = np.hstack([tmin, tmax])
+
+        tiles = set()
+        for x0, z0, x1, z1 in np.unique(tile_range, axis=0).tolist():
+            tiles.update((tx, tz) for tx in range(x0, x1 + 1) for tz in range(z0, z1 + 1))
+
+        self._sources[key] = (vertices, triangles, tile_range)
+        for tile in tiles:
+            self._tile_sources.setdefault(tile, set()).add(key)
+        self._mark_dirty(tiles)
+
+    def _mark_dirty(self, tiles) -> None:
+        for tile in tiles:
+            self._dirty.add(tile)
+            self._versions[tile] = self._versions.get(tile, 0) + 1
+
+    def _unassign_tiles(self, key: Hashable) -> None:
+        for tile, keys in list(self._tile_sources.items()):
+            if key in keys:
+                keys.discard(key)
+                self._mark_dirty((tile,))
+                if not keys:
+                    del self._tile_sources[tile]
+
+    @property
+    def sources(self) -> List[Hashable]:
+        '''Keys of the geometry sources currently loaded'''
+        return list(self._sources)
+
+    def source_tiles(self, key: Hashable) -> set:
+        '''Return the tiles a source currently overlaps'''
+        return {tile for tile, keys in self._tile_sources.items() if key in keys}
+
+    def set_source(self, key: Hashable, vertices: np.ndarray, triangles: np.ndarray) -> None:
+        '''
+        Add or replace the geometry of a source, marking the tiles it overlaps (before and after) dirty.
+        Setting a source to the geometry it already has marks nothing dirty.
+
+        Args:
+            key (Hashable): Id of the source, e.g. a prim path.
+            vertices (np.ndarray): (N,3) vertices in y-up.
+            triangles (np.ndarray): (M,3) triangle vertex indices.
+        '''
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        triangles = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+
+        if key in self._sources:
+            old_vertices, old_triangles, _ = self._sources[key]
+            if np.array_equal(old_vertices, vertices) and np.array_equal(old_triangles, triangles):
+                return
+            self._unassign_tiles(key)
+        self._sources[key] = (vertices, triangles, None)
+        self._assign_tiles(key)
+
+    def remove_source(self, key: Hashable) -> None:
+        '''Remove the geometry of a source, marking the tiles it overlapped dirty'''
+        if key not in self._sources:
+            return
+        self._unassign_tiles(key)
+        del self._sources[key]
+
+    def split_source(self, key: Hashable, parts: Dict[Hashable, Tuple[np.ndarray, np.ndarray]]) -> None:
+        '''
+        Replace a source by several sources, e.g. a mesh loaded whole by the prims it was collected from.
+
+        If the parts hold the same triangles as the source, the built tiles are still up to date and
+        no tile is marked dirty. Otherwise the tiles of the source and of the parts are.
+
+        Args:
+            key (Hashable): Id of the source to replace, nothing is removed if there is none.
+            parts (Dict[Hashable, Tuple[np.ndarray, np.ndarray]]): (vertices, triangles) of each new source.
+        '''
+        dirty = set(self._dirty)
+        same = False
+        if key in self._sources and parts:
+            vertices, triangles, _ = self._sources[key]
+            same = np.array_equal(_triangle_rows(vertices, triangles),
+                                  np.sort(np.concatenate([_triangle_rows(v, t) for v, t in parts.values()])))
+
+        self.remove_source(key)
+        for part, (vertices, triangles) in parts.items():
+            self.set_source(part, vertices, triangles)
+        if same:
+            self._dirty = dirty
+
+    def load_mesh(self, vertices: np.ndarray, triangles: np.ndarray) -> None:
+        '''
+        Replace all geometry with a single mesh, same as `Navmesh.load_mesh`.
+        '''
+        for key in list(self._sources):
+            self.remove_source(key)
+        self.set_source(None, vertices, triangles)
+
+    def _clip_triangles(self, tri_pts: np.ndarray, bmin, bmax) -> np.ndarray:
+        '''
+        Clip (N,3,3) triangles to a box in xz, returns the (M,3,3) triangles that are left.
+
+        Triangles fully inside are kept as is, only the ones crossing the box are clipped and re-fanned.
+        '''
+        tri_xz = tri_pts[:, :, [0, 2]]
+        inside = np.all((tri_xz.min(axis=1) >= bmin) & (tri_xz.max(axis=1) <= bmax), axis=1)
+
+        out = [tri_pts[inside]]
+        for tri in tri_pts[~inside]:
+            poly = clip_polygon(tri, bmin, bmax)
+            if len(poly) < 3:
+                continue
+            # The clipped triangle is convex, so fan it back into triangles
+            fan = np.arange(1, len(poly) - 1)
+            out.append(np.stack([np.repeat(poly[:1], len(fan), axis=0), poly[fan], poly[fan + 1]], axis=1))
+
+        return np.concatenate(out).astype(np.float32)
+
+    def _overlapping_sources(self, tile: Tuple[int, int]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        return [self._sources[key] for key in self._tile_sources.get(tile, ())]
+
+    def _tile_geometry(self, tile: Tuple[int, int], sources: list = None, border: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Collect the geometry of every source overlapping a tile, clipped to the tile plus border.
+        sources and border default to the current ones, see `take_dirty` for a snapshot of them
+        '''
+        if sources is None:
+            sources = self._overlapping_sources(tile)
+        if border is None:
+            border = self._border()
+        bmin, bmax = self.tile_bounds(tile, border)
+        core_min, core_max = self.tile_bounds(tile)
+        tile_arr = np.asarray(tile, dtype=np.int64)
+
+        tris = []
+        for vertices, triangles, tile_range in sources:
+            in_tile = np.all((tile_range[:, :2] <= tile_arr) & (tile_arr <= tile_range[:, 2:]), axis=1)
+            tri_pts = vertices[triangles[in_tile]]
+            if len(tri_pts) == 0:
+                continue
+            tris.append(self._clip_triangles(tri_pts, bmin, bmax))
+
+        tri_pts = np.concatenate(tris) if tris else np.empty((0, 3, 3), dtype=np.float32)
+
+        # Tiles where the geometry only reaches into the border would build nothing of their own
+        tri_xz = tri_pts[:, :, [0, 2]]
+        touches_core = np.all((tri_xz.max(axis=1) > core_min) & (tri_xz.min(axis=1) < core_max), axis=1)
+        if not np.any(touches_core):
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int32)
+
+        # Triangle soup, every triangle gets its own three vertices
+        return tri_pts.reshape(-1, 3), np.arange(len(tri_pts) * 3, dtype=np.int32).reshape(-1, 3)
+
+    def _build_tile_navmesh(self, tile: Tuple[int, int], sources: list = None, settings: Dict[str, Any] = None,
+                            border: float = None) -> Navmesh:
+        '''Build the navmesh of a single tile, None if it has no geometry. Safe to run on a worker thread'''
+        vertices, triangles = self._tile_geometry(tile, sources, border)
+        if len(triangles) == 0:
+            return None
+
+        navmesh = Navmesh()
+        navmesh.load_mesh(vertices, triangles)
+        navmesh.build_navmesh(self.settings if settings is None else settings)
+        return navmesh
+
+    def _swap_tile(self, tile: Tuple[int, int], navmesh: Navmesh) -> None:
+        # Swap the finished tile in, so queries never see a half built one
+        if navmesh is None:
+            self._tiles.pop(tile, None)
+        else:
+            self._tiles[tile] = navmesh
+
+        # The portals on its edges change, and with them the legs of the tile and its neighbours
+        self._tile_triangles.pop(tile, None)
+        self._tile_clipped.pop(tile, None)
+        self._legs.pop(tile, None)
+        for other in self._neighbours(tile):
+            self._portals.pop((min(tile, other), max(tile, other)), None)
+            self._legs.pop(other, None)
+        self._graph = None
+
+    def _clear_tiles(self) -> None:
+        self._tiles = {}
+        self._tile_triangles = {}
+        self._tile_clipped = {}
+        self._portals = {}
+        self._legs = {}
+        self._graph = None
+
+    def build_tile(self, tile: Tuple[int, int]) -> None:
+        '''Build (or drop, if it has no geometry left) a single tile'''
+        self._dirty.discard(tile)
+        self._swap_tile(tile, self._build_tile_navmesh(tile))
+
+    def take_dirty(self, max_tiles: int = None) -> Dict[str, Any]:
+        '''
+        Take dirty tiles off the dirty set to build them elsewhere, see `build_tiles`.
+
+        The snapshot holds the sources of each tile and the settings as they are now, so sources set
+        while the tiles build don't change the build. The tiles they touch are marked dirty again.
+
+        Args:
+            max_tiles (int): Take at most this many tiles, the rest stay dirty.
+
+        Returns:
+            Dict[str, Any]: {'tiles': [(tile, sources)], 'versions': {tile: version}, 'settings': settings,
+                'border': border}
+        '''
+        dirty = sorted(self._dirty)
+        if max_tiles is not None:
+            dirty = dirty[:max_tiles]
+        self._dirty.difference_update(dirty)
+        return {
+            'tiles': [(tile, self._overlapping_sources(tile)) for tile in dirty],
+            'versions': {tile: self._versions.get(tile, 0) for tile in dirty},
+            'settings': dict(self.settings),
+            'border': self._border(),
+        }
+
+    def build_tiles(self, snapshot: Dict[str, Any]) -> Dict[Tuple[int, int], Navmesh]:
+        '''
+        Build the tiles of a `take_dirty` snapshot one after the other, without touching the built tiles.
+        Safe to run on a worker thread while queries and `set_source` calls go on.
+
+        The binding holds the GIL for a whole build, so tiles are not built on several threads.
+
+        Args:
+            snapshot (Dict[str, Any]): Tiles taken with `take_dirty`.
+
+        Returns:
+            Dict[Tuple[int, int], Navmesh]: The new navmesh of each tile (None if it has no geometry
+                left), swap them in with `apply_tiles`.
+        '''
+        settings, border = snapshot['settings'], snapshot['border']
+        return {tile: self._build_tile_navmesh(tile, sources, settings, border) for tile, sources in snapshot['tiles']}
+
+    def apply_tiles(self, built: Dict[Tuple[int, int], Navmesh], snapshot: Dict[str, Any] = None) -> int:
+        '''
+        Swap in tiles made with `build_tiles`, on the thread the queries are made on.
+
+        Args:
+            built (Dict[Tuple[int, int], Navmesh]): Tiles returned by `build_tiles`.
+            snapshot (Dict[str, Any]): The `take_dirty` snapshot they were built from. Tiles marked dirty
+                again since it was taken are skipped, their newer geometry is built by a later rebuild.
+
+        Returns:
+            int: Number of tiles swapped in.
+        '''
+        swapped = 0
+        for tile, navmesh in built.items():
+            if snapshot is not None and snapshot['versions'][tile] != self._versions.get(tile, 0):
+                continue
+            self._swap_tile(tile, navmesh)
+            swapped += 1
+        return swapped
+
+    def restore_dirty(self, snapshot: Dict[str, Any]) -> None:
+        '''Mark the tiles of a `take_dirty` snapshot dirty again, e.g. when their build failed'''
+        self._mark_dirty(tile for tile, _ in snapshot['tiles'])
+
+    def rebuild_dirty(self, max_tiles: int = None) -> int:
+        '''
+        Rebuild only the tiles whose geometry changed since they were last built, and swap them in.
+
+        To build on another thread, split this into `take_dirty`, `build_tiles` (on that thread) and
+        `apply_tiles`, which keeps the built tiles and the tile caches on the calling thread.
+
+        Args:
+            max_tiles (int): Rebuild at most this many tiles, the rest stay dirty for a later call
+                (e.g. to spread updates over frames). Queries keep using the old tiles until then.
+
+        Returns:
+            int: Number of tiles rebuilt.
+        '''
+        snapshot = self.take_dirty(max_tiles)
+        return self.apply_tiles(self.build_tiles(snapshot), snapshot)
+
+    def build_navmesh(self, settings: Dict[str, Any] = {}) -> None:
+        '''
+        Build every tile, same settings as `Navmesh.build_navmesh`.
+        '''
+        self.settings = dict(settings)
+
+        # The border depends on the settings, so redo the tile assignment
+        self._tile_sources = {}
+        self._clear_tiles()
+        for key in self._sources:
+            self._assign_tiles(key)
+
+        self.rebuild_dirty()
+
+    @staticmethod
+    def _neighbours(tile: Tuple[int, int]) -> List[Tuple[int, int]]:
+        tx, tz = tile
+        return [(tx - 1, tz), (tx + 1, tz), (tx, tz - 1), (tx, tz + 1)]
+
+    def _triangles(self, tile: Tuple[int, int]) -> np.ndarray:
+        '''(T,3,3) navmesh triangles of a built tile, including the part in its border'''
+        triangles = self._tile_triangles.get(tile)
+        if triangles is None:
+            trivert, _, _ = self._tiles[tile].get_navmesh_polygons()
+            triangles = np.asarray(trivert, dtype=np.float32).reshape(-1, 3, 3)
+            self._tile_triangles[tile] = triangles
+        return triangles
+
+    def _clipped_triangles(self, tile: Tuple[int, int]) -> np.ndarray:
+        '''(T,3,3) navmesh triangles of a built tile clipped to the tile, so neighbouring tiles don't overlap'''
+        clipped = self._tile_clipped.get(tile)
+        if clipped is None:
+            core_min, core_max = self.tile_bounds(tile)
+            clipped = self._clip_triangles(self._triangles(tile), core_min, core_max)
+            self._tile_clipped[tile] = clipped
+        return clipped
+
+    def tile_area(self, tile: Tuple[int, int]) -> float:
+        '''Walkable area of a built tile, without its border'''
+        clipped = self._clipped_triangles(tile)
+        cross = np.cross(clipped[:, 1] - clipped[:, 0], clipped[:, 2] - clipped[:, 0])
+        return float(0.5 * np.linalg.norm(cross, axis=1).sum())
+
+    def get_navmesh_polygons(self) -> Tuple[np.ndarray, None, None]:
+        '''
+        Get the triangles of every tile, clipped to the tile so the borders don't overlap.
+
+        Returns:
+            Tuple[np.ndarray, None, None]: Flat triangle soup vertices, like `Navmesh.get_navmesh_polygons`.
+        '''
+        verts = [self._clipped_triangles(tile).reshape(-1) for tile in self._tiles]
+        if not verts:
+            return np.empty(0, dtype=np.float32), None, None
+        return np.concatenate(verts), None, None
+
+    def _clipped_contours(self, method: str) -> Tuple[np.ndarray, List[int], List[int]]:
+        # Contours come as two vertices per edge, clip the edges of every tile to the tile
+        verts = []
+        for tile, navmesh in self._tiles.items():
+            vert, _, _ = getattr(navmesh, method)()
+            core_min, core_max = self.tile_bounds(tile)
+            verts.append(clip_segments(vert, core_min, core_max).reshape(-1))
+
+        if not verts:
+            return np.empty(0, dtype=np.float32), [], []
+        return np.concatenate(verts), [], []
+
+    def get_navmesh_contours(self) -> Tuple[np.ndarray, List[int], List[int]]:
+        '''
+        Get the contour edges of every tile, clipped to the tile so the borders don't overlap.
+        '''
+        return self._clipped_contours('get_navmesh_contours')
+
+    def get_navmesh_raw_contours(self) -> Tuple[np.ndarray, List[int], List[int]]:
+        '''
+        Get the raw contour edges of every tile, clipped to the tile so the borders don't overlap.
+        '''
+        return self._clipped_contours('get_navmesh_raw_contours')
+
+    def _edge_portals(self, key: Tuple[Tuple[int, int], Tuple[int, int]]) -> np.ndarray:
+        '''Portals between two neighbouring built tiles, key is (lower tile, upper tile)'''
+        portals = self._portals.get(key)
+        if portals is None:
+            lower, upper = key
+            axis = 0 if lower[0] != upper[0] else 2
+            bmin, bmax = self.tile_bounds(upper)
+            if axis == 0:
+                coord, lo, hi = bmin[0], bmin[1], bmax[1]
+            else:
+                coord, lo, hi = bmin[1], bmin[0], bmax[0]
+            climb = merge_settings(self.settings)["agentMaxClimb"]
+            portals = edge_portals(self._triangles(lower), self._triangles(upper), axis, coord, lo, hi,
+                                   self.portal_spacing, climb)
+            self._portals[key] = portals
+        return portals
+
+    def _tile_portals(self, tile: Tuple[int, int]) -> List[Tuple[Hashable, np.ndarray]]:
+        '''(portal id, point) of every portal on the edges of a built tile to its built neighbours'''
+        portals = []
+        for other in self._neighbours(tile):
+            if other not in self._tiles:
+                continue
+            key = (min(tile, other), max(tile, other))
+            portals.extend(((key, k), point) for k, point in enumerate(self._edge_portals(key)))
+        return portals
+
+    def _reaches(self, path: List[float], target: np.ndarray) -> bool:
+        # Detour returns a partial path towards unreachable targets, only count paths that get there
+        return len(path) >= 3 and np.linalg.norm(np.asarray(path[-3:]) - target) <= self.portal_spacing
+
+    def _tile_legs(self, tile: Tuple[int, int]) -> Dict[Tuple[Hashable, Hashable], Tuple[float, List[float]]]:
+        '''(cost, path) between every two connected portals of a built tile, found in one query'''
+        legs = self._legs.get(tile)
+        if legs is None:
+            legs = {}
+            portals = self._tile_portals(tile)
+            pairs = list(itertools.combinations(range(len(portals)), 2))
+            if pairs:
+                starts = np.array([portals[i][1] for i, _ in pairs])
+                ends = np.array([portals[j][1] for _, j in pairs])
+                for (i, j), path, end in zip(pairs, self._tiles[tile].find_paths(starts, ends), ends):
+                    if not self._reaches(path, end):
+                        continue
+                    cost = path_length(path)
+                    reverse = np.asarray(path, dtype=np.float32).reshape(-1, 3)[::-1].reshape(-1).tolist()
+                    legs[(portals[i][0], portals[j][0])] = (cost, list(path))
+                    legs[(portals[j][0], portals[i][0])] = (cost, reverse)
+            self._legs[tile] = legs
+        return legs
+
+    def _portal_graph(self) -> Dict[Hashable, List[Tuple[Hashable, float, List[float]]]]:
+        if self._graph is None:
+            graph = {}
+            for tile in self._tiles:
+                for (a, b), (cost, path) in self._tile_legs(tile).items():
+                    graph.setdefault(a, []).append((b, cost, path))
+            self._graph = graph
+        return self._graph
+
+    def _point_legs(self, points, tiles, idx, to_portals, method, *args, **kwargs):
+        '''
+        Legs between the points idx and the portals of the tile each one is in, one native query per tile
+
+        Returns {i: {portal id: (cost, path)}}, from the point to the portals if to_portals, else back
+        '''
+        legs = {i: {} for i in idx}
+        for tile in np.unique(tiles[idx], axis=0).tolist():
+            tile = tuple(tile)
+            if tile not in self._tiles:
+                continue
+            portals = self._tile_portals(tile)
+            if not portals:
+                continue
+            in_tile = idx[np.all(tiles[idx] == tile, axis=1)]
+
+            point_rows = np.repeat(points[in_tile], len(portals), axis=0)
+            portal_rows = np.tile(np.array([point for _, point in portals]), (len(in_tile), 1))
+            starts, ends = (point_rows, portal_rows) if to_portals else (portal_rows, point_rows)
+            paths = getattr(self._tiles[tile], method)(starts, ends, *args, **kwargs)
+
+            for row, path in enumerate(paths):
+                if self._reaches(path, ends[row]):
+                    i, (portal, _) = in_tile[row // len(portals)], portals[row % len(portals)]
+                    legs[i][portal] = (path_length(path), list(path))
+        return legs
+
+    def _find_paths(self, starts, ends, method, *args, **kwargs) -> List[List[float]]:
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        start_tiles = self.tile_of(starts)
+        end_tiles = self.tile_of(ends)
+
+        paths = [[] for _ in range(len(starts))]
+
+        # Pairs with both ends in the same (built) tile are answered by that tile, one native call per tile
+        same = np.all(start_tiles == end_tiles, axis=1)
+        for tile in np.unique(start_tiles[same], axis=0).tolist():
+            tile = tuple(tile)
+            if tile not in self._tiles:
+                continue
+            idx = np.flatnonzero(same & np.all(start_tiles == tile, axis=1))
+            tile_paths = getattr(self._tiles[tile], method)(starts[idx], ends[idx], *args, **kwargs)
+            for i, path in zip(idx, tile_paths):
+                paths[i] = path
+
+        # The rest, and same tile pairs that have to leave the tile (Detour gives a partial path for
+        # those), go through the portals
+        stitch = np.array([i for i, path in enumerate(paths) if not self._reaches(path, ends[i])], dtype=np.int64)
+        if len(stitch) == 0:
+            return paths
+
+        graph = self._portal_graph()
+        start_legs = self._point_legs(starts, start_tiles, stitch, True, method, *args, **kwargs)
+        end_legs = self._point_legs(ends, end_tiles, stitch, False, method, *args, **kwargs)
+        for i in stitch.tolist():
+            if start_legs[i] and end_legs[i]:
+                route = shortest_route(graph, start_legs[i], end_legs[i])
+                if route is not None:
+                    paths[i] = route
+
+        return paths
+
+    def find_paths(self, starts, ends, searchSize=[10.0,10.0,10.0], pathMode=2, pathStyle=0) -> List[List[float]]:
+        '''
+        Find paths between start and end points, see `Navmesh.find_paths`.
+
+        Paths across tiles are joined from legs found on each tile, the legs between portals are found
+        with the default path mode and style.
+        '''
+        return self._find_paths(starts, ends, 'find_paths', searchSize, pathMode, pathStyle)
+
+    def find_paths_parallel(self, starts, ends, searchSize=[10.0,10.0,10.0], pathMode=2, pathStyle=0, num_threads=None) -> List[List[float]]:
+        '''
+        Find paths with the openmp native query on each tile, see `Navmesh.find_paths_parallel`.
+        '''
+        return self._find_paths(starts, ends, 'find_paths_parallel', searchSize, pathMode, pathStyle, num_threads=num_threads)
+
+    def get_closest_point(self, points) -> np.ndarray:
+        '''
+        Snap points to the closest point on the navmesh of the tile they are in, see `Navmesh.get_closest_point`.
+
+        Points in tiles that were not built, or whose build failed, come back as NaN.
+        '''
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        tiles = self.tile_of(points)
+        res = np.full(points.shape, np.nan, dtype=np.float32)
+
+        for tile in np.unique(tiles, axis=0).tolist():
+            tile = tuple(tile)
+            if tile not in self._tiles or not self._tiles[tile].built:
+                continue
+            idx = np.flatnonzero(np.all(tiles == tile, axis=1))
+            res[idx] = self._tiles[tile].get_closest_point(points[idx])
+
+        return res
+
+    def _tile_random_points(self, tile: Tuple[int, int], num_points: int, max_rounds: int = 100) -> np.ndarray:
+        '''Native random points of a tile, only the ones inside the tile itself and not in its border'''
+        core_min, core_max = self.tile_bounds(tile)
+        found = []
+        count = 0
+        for _ in range(max_rounds):
+            points = np.asarray(self._tiles[tile].get_random_points(num_points - count), dtype=np.float32).reshape(-1, 3)
+            xz = points[:, [0, 2]]
+            points = points[np.all((xz >= core_min) & (xz < core_max), axis=1)]
+            found.append(points)
+            count += len(points)
+            if count >= num_points:
+                break
+        return np.concatenate(found)[:num_points]
+
+    def get_random_points(self, num_points: int, rng: np.random.Generator = None) -> np.ndarray:
+        '''
+        Return random points on the navmesh, spread evenly by area over the built tiles.
+
+        The number of points of each tile is drawn from `rng`, with the tiles weighted by their walkable
+        area. The points within a tile come from the native sampler, which is not seeded, and the ones
+        in the border of the tile are drawn again so borders are not sampled twice.
+
+        Args:
+            num_points (int): Number of random points to generate.
+            rng (np.random.Generator): Generator the points are spread over the tiles with, defaults
+                to a new unseeded one.
+
+        Returns:
+            np.ndarray: (N,3) float32 points.
+        '''
+        tiles = list(self._tiles)
+        areas = np.array([self.tile_area(tile) for tile in tiles], dtype=np.float64)
+        if num_points <= 0 or areas.sum() <= 0:
+            return np.empty((0, 3), dtype=np.float32)
+
+        if rng is None:
+            rng = np.random.default_rng()
+        counts = rng.multinomial(num_points, areas / areas.sum())
+
+        points = [self._tile_random_points(tile, int(n)) for tile, n in zip(tiles, counts) if n > 0]
+        return np.concatenate(points)
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+def triangle_areas(triangles):
+    '''Area of each of the (T,3,3) triangles'''
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    return 0.5 * np.linalg.norm(cross, axis=1)
+
+
+def sample_triangles(triangles, num_points, seed=None, bbox=None, chunk_size=65536):
+    '''Generate uniformly distributed random points on a set of triangles
+
+    Triangles are picked with probability proportional to their area, and points are spread
+    uniformly within each triangle, so the density is even over the whole surface. Points are
+    produced in chunks, so millions of samples never have to be in memory at once.
+
+    Args:
+        triangles (np.ndarray): (T,3,3) triangle vertices.
+        num_points (int): Total number of points to generate.
+        seed (int, optional): Seed for reproducible samples, by default None.
+        bbox ((min, max), optional): Only keep points inside this axis aligned box, by default None.
+        chunk_size (int, optional): Maximum number of points per chunk, by default 65536.
+
+    Yields:
+        np.ndarray: (N,3) float32 chunks of points, N <= chunk_size, num_points in total.
+    '''
+    rng = np.random.default_rng(seed)
+    triangles = np.asarray(triangles, dtype=np.float32).reshape(-1, 3, 3)
+
+    if bbox is not None:
+        bmin, bmax = (np.asarray(b, dtype=np.float32) for b in bbox)
+        # Only triangles touching the box can give points inside it
+        touching = np.all((triangles.max(axis=1) >= bmin) & (triangles.min(axis=1) <= bmax), axis=1)
+        triangles = triangles[touching]
+
+    areas = triangle_areas(triangles)
+    total_area = areas.sum()
+    if num_points > 0 and total_area <= 0:
+        raise ValueError('No navmesh area to sample points from')
+
+    cdf = np.cumsum(areas)
+
+    remaining = num_points
+    empty_rounds = 0
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+
+        # Pick triangles by area, then uniform barycentric coordinates (folded back into the triangle)
+        tri = triangles[np.minimum(np.searchsorted(cdf, rng.random(n) * total_area, side='right'), len(cdf) - 1)]
+        r = rng.random((n, 2), dtype=np.float32)
+        outside = r.sum(axis=1) > 1
+        r[outside] = 1 - r[outside]
+
+        points = tri[:, 0] + r[:, :1] * (tri[:, 1] - tri[:, 0]) + r[:, 1:] * (tri[:, 2] - tri[:, 0])
+
+        if bbox is not None:
+            # Triangles crossing the box edge give some points outside it, reject those and go again
+            points = points[np.all((points >= bmin) & (points <= bmax), axis=1)]
+            if len(points) == 0:
+                # The triangle bounds touch the box but the triangles themselves (almost) don't
+                empty_rounds += 1
+                if empty_rounds > 100:
+                    raise ValueError('No navmesh area inside the bounding box')
+                continue
+            empty_rounds = 0
+
+        remaining -= len(points)
+        yield points
@@ -1 +1,12 @@
-from .test_hello_world import *
\ No newline at end of file
+from .test_hello_world import *
+from .test_usd_utils import *
+from .test_tiled import *
+from .test_cache import *
+from .test_profiles import *
+from .test_obstacles import *
+from .test_shared import *
+from .test_core import *
+from .test_sampling import *
+from .test_pipeline import *
+from .test_imports import *
+from .test_bake_tool import *
@@ -0,0 +1,82 @@
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+
+import numpy as np
+
+import omni.kit.test
+from pxr import Usd, UsdGeom
+
+
+TOOL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'tools', 'bake_navmesh.py'))
+
+
+def load_tool():
+    '''tools/ is not a package, load the script as a module'''
+    spec = importlib.util.spec_from_file_location('bake_navmesh', TOOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_level(path, up_axis, size=20.0):
+    '''A level with one square floor, wound to face up in the given up axis'''
+    stage = Usd.Stage.CreateNew(path)
+    UsdGeom.SetStageUpAxis(stage, up_axis)
+    mesh = UsdGeom.Mesh.Define(stage, '/World/Floor')
+    if up_axis == UsdGeom.Tokens.z:
+        mesh.CreatePointsAttr([(0, 0, 0), (size, 0, 0), (size, size, 0), (0, size, 0)])
+    else:
+        mesh.CreatePointsAttr([(0, 0, 0), (0, 0, size), (size, 0, size), (size, 0, 0)])
+    mesh.CreateFaceVertexCountsAttr([4])
+    mesh.CreateFaceVertexIndicesAttr([0, 1, 2, 3])
+    stage.GetRootLayer().Save()
+
+
+class TestBakeTool(omni.kit.test.AsyncTestCase):
+
+    def setUp(self):
+        self.tool = load_tool()
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def bake(self, up_axis):
+        level = os.path.join(self.dir.name, f'level_{up_axis}.usda')
+        write_level(level, up_axis)
+        settings = self.tool.rd.merge_settings({})
+        return self.tool.bake_level(level, f'level_{up_axis}', self.dir.name, settings)
+
+    async def test_bake_level(self):
+        for up_axis in (UsdGeom.Tokens.y, UsdGeom.Tokens.z):
+            stats = self.bake(up_axis)
+            self.assertEqual(stats['status'], 'ok', stats.get('error'))
+            self.assertEqual(stats['up_axis'], up_axis)
+
+            # The navmesh is written in the stage's up axis, on the floor and eroded by about the agent radius
+            baked = np.load(stats['outputs'][0])
+            self.assertEqual(sorted(baked.files), ['triangles', 'vertices'])
+            up = 2 if up_axis == UsdGeom.Tokens.z else 1
+            self.assertTrue(np.all(np.abs(baked['vertices'][:, up]) < 0.5))
+            self.assertGreater(stats['walkable_area'], (20 - 4 * 0.6) ** 2)
+            self.assertLess(stats['walkable_area'], 20 ** 2)
+
+    async def test_missing_level_is_reported(self):
+        stats = self.tool.bake_level(os.path.join(self.dir.name, 'missing.usda'), 'missing', self.dir.name, {})
+        self.assertEqual(stats['status'], 'error')
+
+    async def test_set_overrides(self):
+        args = self.tool.parse_args(['levels', '--set', 'regionMinSize=12', '--set', 'agentRadius=0.25'])
+        self.assertEqual(args.overrides, {'regionMinSize': 12, 'agentRadius': 0.25})
+        self.assertIsInstance(args.overrides['regionMinSize'], int)
+
+    async def test_bad_set_is_a_usage_error(self):
+        for item in ('regionMinSize=8.5', 'agentRadius=wide', 'noSuchSetting=1', 'agentRadius'):
+            # argparse exits with 2 and prints the usage instead of a traceback
+            with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()) as stderr:
+                self.tool.parse_args(['levels', '--set', item])
+            self.assertEqual(raised.exception.code, 2)
+            self.assertIn('--set', stderr.getvalue())
@@ -0,0 +1,107 @@
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh.cache import PathCache
+from siborg.create.navmesh.core import NavmeshInterface
+
+
+class StraightNavmesh:
+    '''Stand-in for a native navmesh, paths are straight lines and every query is counted'''
+
+    def __init__(self):
+        self.queries = 0
+        self.builds = 0
+
+    def build_navmesh(self, settings={}):
+        self.builds += 1
+
+    def find_paths(self, starts, ends, pathMode=2, pathStyle=0):
+        self.queries += len(starts)
+        return [list(s) + list(e) for s, e in zip(starts, ends)]
+
+
+class TestPathCache(omni.kit.test.AsyncTestCase):
+
+    async def test_keys_quantize_to_cells(self):
+        cache = PathCache(cell_size=1.0)
+        starts = np.array([[0.1, 0, 0.1], [0.9, 0.5, 0.9], [1.1, 0, 0.1], [-0.1, 0, 0.1]])
+        ends = np.full((4, 3), 5.5)
+        keys = cache.keys(starts, ends, 2, 0)
+
+        # the first two start in the same cell, the others just across a cell border
+        self.assertEqual(keys[0], keys[1])
+        self.assertNotEqual(keys[0], keys[2])
+        self.assertNotEqual(keys[0], keys[3])
+        self.assertEqual(keys[3][0][:3], (-1, 0, 0))
+
+        # the mode and style are part of the key
+        self.assertNotEqual(keys[0], cache.keys(starts[:1], ends[:1], 1, 0)[0])
+
+    async def test_evicts_least_recently_used_by_bytes(self):
+        path = np.zeros(30, dtype=np.float32)
+        entry = path.nbytes + PathCache.entry_overhead
+        cache = PathCache(max_bytes=3 * entry)
+
+        for key in 'abc':
+            cache.put(key, path)
+        self.assertEqual(cache.bytes, 3 * entry)
+
+        # a lookup makes 'a' the most recent, so 'b' goes first
+        cache.get('a')
+        cache.put('d', path)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats['entries'], 3)
+
+        # replacing an entry doesn't count it twice
+        cache.put('a', np.zeros(3, dtype=np.float32))
+        self.assertEqual(cache.bytes, 2 * entry + 12 + PathCache.entry_overhead)
+
+        # an entry over the budget on its own is not kept
+        cache.put('e', np.zeros(10 * 30, dtype=np.float32))
+        self.assertEqual(cache.stats['entries'], 0)
+        self.assertEqual(cache.bytes, 0)
+
+    async def test_splice_moves_the_ends(self):
+        path = np.arange(9, dtype=np.float32)
+        spliced = PathCache.splice(path, [10, 11, 12], [20, 21, 22])
+        np.testing.assert_array_equal(spliced, [10, 11, 12, 3, 4, 5, 20, 21, 22])
+        # the cached path is left as it was
+        np.testing.assert_array_equal(path, np.arange(9))
+        self.assertEqual(len(PathCache.splice([], [0, 0, 0], [1, 1, 1])), 0)
+
+
+class TestInterfacePathCache(omni.kit.test.AsyncTestCase):
+
+    def _interface(self):
+        interface = NavmeshInterface(path_cache=PathCache(cell_size=1.0))
+        interface.navmesh = StraightNavmesh()
+        interface.built = True
+        return interface
+
+    async def test_hits_use_the_queried_ends(self):
+        interface = self._interface()
+        interface.find_paths([[0.2, 0, 0.2]], [[5.2, 0, 5.2]])
+        path = interface.find_paths([[0.7, 0, 0.7]], [[5.7, 0, 5.7]])
+
+        self.assertEqual(interface.navmesh.queries, 1)
+        self.assertEqual(interface.path_cache.stats['hits'], 1)
+        np.testing.assert_allclose(path, [[0.7, 0, 0.7], [5.7, 0, 5.7]], atol=1e-6)
+
+    async def test_rebuild_invalidates(self):
+        interface = self._interface()
+        starts, ends = [[0.5, 0, 0.5]], [[5.5, 0, 5.5]]
+        interface.find_paths(starts, ends)
+        interface.find_paths(starts, ends)
+        self.assertEqual(interface.navmesh.queries, 1)
+
+        interface.build_navmesh()
+        self.assertEqual(interface.path_cache.stats['entries'], 0)
+        interface.find_paths(starts, ends)
+        self.assertEqual(interface.navmesh.queries, 2)
+
+        # swapping in a navmesh built elsewhere drops the cached paths as well
+        interface.swap_navmesh(StraightNavmesh())
+        interface.find_paths(starts, ends)
+        self.assertEqual(interface.navmesh.queries, 1)
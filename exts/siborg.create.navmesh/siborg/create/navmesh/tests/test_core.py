@@ -0,0 +1,281 @@
+import asyncio
+import time
+
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh import pyrecast as rd
+from siborg.create.navmesh.cache import PathCache
+from siborg.create.navmesh.core import NavmeshInterface
+
+
+def loop_walls(interface, vertices, edges, height):
+    '''Reference wall extrusion, the original per-edge python loop with an np.unique weld'''
+    vertices = interface._convert_up_axis(np.array(vertices))
+    extruded_vertices = np.copy(vertices)
+    extruded_vertices[:, 1] += height
+
+    side_triangles = []
+    for i, j in edges:
+        A, B = vertices[i], vertices[j]
+        A_prime, B_prime = extruded_vertices[i], extruded_vertices[j]
+        side_triangles.extend([[A, B, B_prime], [A, B_prime, A_prime]])
+
+    verts = [v for face in side_triangles for v in face]
+    faces = np.arange(len(verts)).reshape(-1, 3)
+    v, inverse_indices = np.unique(verts, axis=0, return_inverse=True)
+    t = inverse_indices.reshape(-1)[faces.flatten()].reshape(faces.shape)
+    return v, t
+
+
+def plane(size):
+    '''A flat size x size floor of two triangles, corner at the origin'''
+    vertices = np.array([[0, 0, 0], [size, 0, 0], [size, 0, size], [0, 0, size]], dtype=np.float32)
+    return vertices, np.array([[0, 2, 1], [0, 3, 2]], dtype=np.int32)
+
+
+def contour_square(z_up):
+    '''Contour edges of a square with a dent, every edge with its own two vertices like get_navmesh_contours'''
+    corners = np.array([[0, 0, 0], [4, 0, 0], [4, 0, 4], [2, 0, 2], [0, 0, 4]], dtype=np.float32)
+    if z_up:
+        corners = corners[:, [0, 2, 1]]
+    vert = np.stack([corners, np.roll(corners, -1, axis=0)], axis=1).reshape(-1, 3)
+    edges = [[i, i + 1] for i in range(0, len(vert), 2)]
+    return vert, edges
+
+
+class TestConvertUpAxis(omni.kit.test.AsyncTestCase):
+
+    async def test_y_up_is_unchanged(self):
+        interface = NavmeshInterface(up_axis='Y')
+        points = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32)
+        out = interface._convert_up_axis(points)
+        np.testing.assert_array_equal(out, points)
+
+    async def test_z_up_round_trip(self):
+        interface = NavmeshInterface(up_axis='Z')
+        points = np.array([[1, 2, 3], [-4, 5, -6]], dtype=np.float32)
+
+        recast = interface._convert_up_axis(points)
+        np.testing.assert_array_equal(recast, [[1, 3, -2], [-4, -6, -5]])
+        # A float32 input is the caller's, it is never converted in place
+        np.testing.assert_array_equal(points, [[1, 2, 3], [-4, 5, -6]])
+
+        back = interface._convert_up_axis(recast, inverse=True)
+        np.testing.assert_array_equal(back, points)
+
+    async def test_in_place(self):
+        interface = NavmeshInterface(up_axis='Z')
+        points = np.array([[1, 2, 3], [-4, 5, -6]], dtype=np.float32)
+        buffer = points.copy()
+
+        out = interface._convert_up_axis(buffer, out=buffer)
+        self.assertIs(out, buffer)
+        out = interface._convert_up_axis(buffer, inverse=True, out=buffer)
+        np.testing.assert_array_equal(buffer, points)
+
+        # Lists and other dtypes are copied on the way in, the copy is converted and returned
+        out = interface._convert_up_axis(points.astype(np.float64).tolist())
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_array_equal(out, [[1, 3, -2], [-4, -6, -5]])
+
+
+class TestMakeWalls(omni.kit.test.AsyncTestCase):
+
+    def check_walls(self, up_axis):
+        interface = NavmeshInterface(up_axis=up_axis)
+        vert, edges = contour_square(up_axis == 'Z')
+
+        v, t = interface.make_walls(vert, edges, 2.5)
+        ref_v, ref_t = loop_walls(interface, vert, edges, 2.5)
+
+        # Same triangles in the same order, and each position welded to one vertex
+        np.testing.assert_array_equal(v[t], ref_v[ref_t])
+        self.assertEqual(len(v), len(ref_v))
+        self.assertEqual(len(np.unique(v, axis=0)), len(v))
+
+    async def test_matches_loop_y_up(self):
+        self.check_walls('Y')
+
+    async def test_matches_loop_z_up(self):
+        self.check_walls('Z')
+
+    async def test_negative_zero_is_welded(self):
+        interface = NavmeshInterface()
+        vert = np.array([[0, 0, 0], [1, 0, 0], [1, 0, 0], [-0.0, 0, 1]], dtype=np.float32)
+        v, t = interface.make_walls(vert, [[0, 1], [2, 3]], 1.0)
+        self.assertEqual(len(v), 6)
+
+
+class TestClosestPoints(omni.kit.test.AsyncTestCase):
+
+    def _interface(self):
+        interface = NavmeshInterface()
+        interface.navmesh.load_mesh(*plane(20))
+        interface.build_navmesh({})
+        return interface
+
+    async def test_snaps_on_a_fresh_build(self):
+        # No path query ran on this build, the binding needs one before it can snap
+        interface = self._interface()
+        snapped, found = interface.closest_points([[5, 1, 5], [10, 0.5, 12], [50, 0, 50]])
+
+        np.testing.assert_array_equal(found, [True, True, False])
+        np.testing.assert_allclose(snapped[:2, [0, 2]], [[5, 5], [10, 12]])
+        self.assertTrue(np.all(np.abs(snapped[:2, 1]) < 0.5))
+
+    async def test_snaps_after_a_rebuild(self):
+        interface = self._interface()
+        interface.find_paths([[2, 0, 2]], [[18, 0, 18]])
+        interface.navmesh.load_mesh(*plane(40))
+        interface.build_navmesh({})
+
+        snapped, found = interface.closest_points([[35, 0, 35]])
+        self.assertTrue(found[0])
+        np.testing.assert_allclose(snapped[0, [0, 2]], [35, 35])
+
+    async def test_needs_a_build(self):
+        navmesh = rd.Navmesh()
+        with self.assertRaises(RuntimeError):
+            navmesh.get_closest_point([[0, 0, 0]])
+
+        # A build without any walkable surface fails, and is refused too
+        vertices, triangles = plane(20)
+        navmesh.load_mesh(vertices, triangles[:, ::-1])
+        navmesh.build_navmesh({})
+        self.assertFalse(navmesh.built)
+        with self.assertRaises(RuntimeError):
+            navmesh.get_closest_point([[5, 0, 5]])
+
+
+class TestNavmeshMesh(omni.kit.test.AsyncTestCase):
+
+    async def test_welded_mesh(self):
+        interface = NavmeshInterface()
+        interface.navmesh.load_mesh(*plane(20))
+        interface.build_navmesh({})
+
+        vertices, triangles = interface.get_navmesh_mesh()
+        soup, _, _ = interface.navmesh.get_navmesh_polygons()
+
+        # Same triangles in the same order, each corner stored once
+        np.testing.assert_array_equal(vertices[triangles].reshape(-1, 3), np.reshape(soup, (-1, 3)))
+        self.assertEqual(len(np.unique(vertices, axis=0)), len(vertices))
+        self.assertEqual(vertices.dtype, np.float32)
+        self.assertEqual(triangles.dtype, np.int32)
+
+
+class TestAsyncQueries(omni.kit.test.AsyncTestCase):
+
+    def _interface(self):
+        interface = NavmeshInterface()
+        interface.navmesh.load_mesh(*plane(20))
+        interface.build_navmesh({})
+        return interface
+
+    async def _loop_gaps(self, query):
+        '''Run query while timing the gaps between turns of the event loop'''
+        gaps = []
+        done = False
+
+        async def tick():
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        result = await query
+        duration = time.perf_counter() - start
+        done = True
+        await ticker
+        return result, max(gaps), duration
+
+    async def test_find_paths_async_yields_between_chunks(self):
+        interface = self._interface()
+        rng = np.random.default_rng(0)
+        starts = rng.uniform(1, 19, (60000, 3)).astype(np.float32)
+        ends = rng.uniform(1, 19, (60000, 3)).astype(np.float32)
+        starts[:, 1] = ends[:, 1] = 0
+
+        (points, offsets, status), gap, duration = await self._loop_gaps(interface.find_paths_async(starts, ends))
+
+        # The loop kept running: no gap is longer than a chunk, a small part of the whole batch
+        self.assertLess(gap, duration / 5)
+        self.assertEqual(len(offsets), 60001)
+        self.assertEqual(offsets[-1], len(points))
+        self.assertTrue(np.all(status == rd.PATH_FOUND))
+
+        # Same paths as one synchronous batch
+        ref_points, ref_offsets, _ = interface.find_paths_parallel(starts[:3000], ends[:3000])
+        np.testing.assert_array_equal(offsets[:3001], ref_offsets)
+        np.testing.assert_array_equal(points[:ref_offsets[-1]], ref_points)
+
+    async def test_closest_points_async_yields_between_chunks(self):
+        interface = self._interface()
+        points = np.random.default_rng(1).uniform(1, 19, (40000, 3)).astype(np.float32)
+        points[:, 1] = 0
+
+        (snapped, found), gap, duration = await self._loop_gaps(interface.closest_points_async(points))
+
+        self.assertLess(gap, duration / 5)
+        self.assertTrue(np.all(found))
+        np.testing.assert_allclose(snapped[:, [0, 2]], points[:, [0, 2]])
+
+    async def test_empty_batch(self):
+        interface = self._interface()
+        points, offsets, status = await interface.find_paths_async(np.empty((0, 3)), np.empty((0, 3)))
+        self.assertEqual(points.shape, (0, 3))
+        np.testing.assert_array_equal(offsets, [0])
+
+
+class TestPackPaths(omni.kit.test.AsyncTestCase):
+
+    async def test_pack(self):
+        paths = [[0, 0, 0, 1, 0, 1], [], [2, 0, 2, 3, 0, 3, 4, 0, 4]]
+        points, offsets, status = rd.pack_paths(paths)
+
+        np.testing.assert_array_equal(offsets, [0, 2, 2, 5])
+        np.testing.assert_array_equal(status, [rd.PATH_FOUND, rd.PATH_NOT_FOUND, rd.PATH_FOUND])
+        self.assertEqual(points.shape, (5, 3))
+        self.assertEqual(points.dtype, np.float32)
+        np.testing.assert_array_equal(points[offsets[2]:offsets[3]], [[2, 0, 2], [3, 0, 3], [4, 0, 4]])
+
+    async def test_empty_batch(self):
+        points, offsets, status = rd.pack_paths([])
+        self.assertEqual(points.shape, (0, 3))
+        np.testing.assert_array_equal(offsets, [0])
+        self.assertEqual(len(status), 0)
+
+        points, offsets, status = rd.pack_paths([], np.empty((0, 3)))
+        self.assertEqual(len(status), 0)
+
+    async def test_partial(self):
+        paths = [[0, 0, 0, 1, 0, 1], [], [2, 0, 2, 3, 0, 3]]
+        ends = [[1, 0, 1.5], [5, 0, 5], [9, 0, 9]]
+        points, offsets, status = rd.pack_paths(paths, ends, tolerance=1.0)
+        np.testing.assert_array_equal(status, [rd.PATH_FOUND, rd.PATH_NOT_FOUND, rd.PATH_PARTIAL])
+
+    async def test_disconnected_floors(self):
+        # Two floors with a gap wider than the agent, paths across it stop at the edge of the first
+        vertices, triangles = plane(10)
+        vertices = np.concatenate([vertices, vertices + [14, 0, 0]])
+        triangles = np.concatenate([triangles, triangles + 4])
+
+        interface = NavmeshInterface(path_cache=PathCache())
+        interface.navmesh.load_mesh(vertices, triangles)
+        interface.build_navmesh({})
+
+        starts = [[2, 0, 5], [2, 0, 5], [16, 0, 5]]
+        ends = [[8, 0, 5], [20, 0, 5], [22, 0, 8]]
+        expected = [rd.PATH_FOUND, rd.PATH_PARTIAL, rd.PATH_FOUND]
+        # The second query is answered from the cache, where partial paths are not kept
+        for points, offsets, status in (interface.find_paths_batch(starts, ends),
+                                        interface.find_paths_parallel(starts, ends)):
+            np.testing.assert_array_equal(status, expected)
+            self.assertLess(points[offsets[2] - 1, 0], 10)
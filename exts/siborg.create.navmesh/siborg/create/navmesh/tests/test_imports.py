@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import omni.kit.test
+
+
+EXT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..'))
+
+PACKAGES = ('pxr', 'omni', 'asyncio', 'siborg.create.navmesh.pyrecast.tiled', 'siborg.create.navmesh.pyrecast.profiles')
+
+
+def imported_after(code):
+    '''Run code in a fresh interpreter without Kit, returns which of PACKAGES it imported'''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = EXT_ROOT
+    runner = code + '\nimport sys\nprint(" ".join(name for name in %r if name in sys.modules))' % (PACKAGES,)
+    result = subprocess.run([sys.executable, '-c', runner], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return set(result.stdout.split())
+
+
+class TestLazyImports(omni.kit.test.AsyncTestCase):
+
+    async def test_core_without_kit(self):
+        # A query worker imports neither USD, Kit, asyncio nor the navmesh kinds it doesn't use
+        self.assertEqual(imported_after('from siborg.create.navmesh import core, pyrecast'), set())
+
+    async def test_usd_loaded_on_first_use(self):
+        imported = imported_after('from siborg.create.navmesh import core\ncore.usd_utils.get_mesh')
+        self.assertEqual(imported, {'pxr'})
+
+    async def test_navmesh_kinds_loaded_on_first_use(self):
+        imported = imported_after('from siborg.create.navmesh import pyrecast\npyrecast.TiledNavmesh')
+        self.assertEqual(imported, {'siborg.create.navmesh.pyrecast.tiled'})
@@ -0,0 +1,94 @@
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh import obstacles
+from siborg.create.navmesh.core import NavmeshInterface
+
+
+def normals(vertices, triangles):
+    '''Unit normals with recast's winding, (v1 - v0) x (v2 - v0)'''
+    tri = vertices[triangles]
+    n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    return n / np.linalg.norm(n, axis=1, keepdims=True)
+
+
+class TestObstaclePrism(omni.kit.test.AsyncTestCase):
+
+    def check_prism(self, vertices, triangles, num_sides, cap_y):
+        # Two triangles per side wall, and a fan of num_sides - 2 triangles for the cap
+        self.assertEqual(len(triangles), 2 * num_sides + num_sides - 2)
+        self.assertEqual(vertices.dtype, np.float32)
+        self.assertEqual(triangles.dtype, np.int32)
+
+        n = normals(vertices, triangles)
+        walls, cap = n[:2 * num_sides], n[2 * num_sides:]
+        # The walls are vertical, the cap faces straight down
+        self.assertTrue(np.allclose(walls[:, 1], 0, atol=1e-6))
+        self.assertTrue(np.allclose(cap, [0, -1, 0], atol=1e-6))
+        self.assertTrue(np.allclose(vertices[triangles[2 * num_sides:]][..., 1], cap_y))
+
+    async def test_cylinder(self):
+        vertices, triangles = obstacles.obstacle_prism(obstacles.cylinder_points(1.0, 3.0, segments=8), agent_height=2.0)
+        self.check_prism(vertices, triangles, 8, cap_y=1.0)
+        self.assertTrue(np.allclose(np.linalg.norm(vertices[:, [0, 2]], axis=1), 1.0, atol=1e-6))
+
+    async def test_box(self):
+        vertices, triangles = obstacles.obstacle_prism(obstacles.box_points([1, 0, 2], [3, 4, 5]), agent_height=2.0)
+        self.check_prism(vertices, triangles, 4, cap_y=1.0)
+        self.assertTrue(np.allclose(vertices.min(axis=0), [1, 0, 2]))
+        self.assertTrue(np.allclose(vertices.max(axis=0), [3, 4, 5]))
+
+    async def test_low_box_caps_at_its_top(self):
+        vertices, triangles = obstacles.obstacle_prism(obstacles.box_points([0, 0, 0], [1, 0.3, 1]), agent_height=2.0)
+        self.check_prism(vertices, triangles, 4, cap_y=0.3)
+
+    async def test_oriented_box_footprint(self):
+        points = obstacles.oriented_box_points([2, 1, 1], np.pi / 4)
+        hull = obstacles.convex_hull_xz(points)
+        self.assertEqual(len(hull), 4)
+        # Turned by 45 degrees, the corners at (+-2, +-1) end up at sqrt(5) from the center
+        self.assertTrue(np.allclose(np.linalg.norm(hull, axis=1), np.sqrt(5)))
+
+
+class TestObstacleTiles(omni.kit.test.AsyncTestCase):
+
+    def _interface(self):
+        interface = NavmeshInterface(tile_size=10.0)
+        interface.navmesh.border = 0.5
+        return interface
+
+    async def test_needs_a_tiled_navmesh(self):
+        interface = NavmeshInterface()
+        with self.assertRaises(RuntimeError):
+            interface.add_cylinder_obstacle([0, 0, 0], 1.0, 2.0)
+        with self.assertRaises(RuntimeError):
+            interface.add_box_obstacle([0, 0, 0], [1, 1, 1])
+        with self.assertRaises(RuntimeError):
+            interface.add_oriented_box_obstacle([0, 0, 0], [1, 1, 1], 0.3)
+        self.assertEqual(interface._obstacles, {})
+
+    async def test_footprint_dirties_covered_tiles(self):
+        interface = self._interface()
+        navmesh = interface.navmesh
+
+        inside = interface.add_box_obstacle([12, 0, 12], [14, 2, 14])
+        self.assertEqual(navmesh.source_tiles(interface._obstacle_key(inside)), {(1, 1)})
+
+        # A cylinder across the edge between two tiles covers both
+        across = interface.add_cylinder_obstacle([20, 0, 15], 1.0, 2.0)
+        self.assertEqual(navmesh.source_tiles(interface._obstacle_key(across)), {(1, 1), (2, 1)})
+        self.assertEqual(interface.pending_tiles, 2)
+
+        navmesh._dirty.clear()
+        interface.remove_obstacle(inside)
+        self.assertEqual(navmesh.dirty_tiles, {(1, 1)})
+        self.assertNotIn(interface._obstacle_key(inside), navmesh.sources)
+
+    async def test_z_up_footprint(self):
+        interface = NavmeshInterface(up_axis='Z', tile_size=10.0)
+        interface.navmesh.border = 0.5
+
+        # Scene (x, y, z) is recast (x, z, -y), so scene y 12..14 is recast z -14..-12
+        obstacle_id = interface.add_box_obstacle([12, 12, 0], [14, 14, 2])
+        self.assertEqual(interface.navmesh.source_tiles(interface._obstacle_key(obstacle_id)), {(1, -2)})
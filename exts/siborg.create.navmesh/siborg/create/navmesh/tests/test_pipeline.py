@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import omni.kit.test
+from pxr import Usd, UsdGeom
+
+from siborg.create.navmesh import pipeline
+from siborg.create.navmesh.core import NavmeshInterface
+
+
+def floor_stage(size=20.0, count=3):
+    '''An in-memory stage with count square floors side by side along x, wound to face up'''
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    root = UsdGeom.Xform.Define(stage, '/World')
+    for i in range(count):
+        mesh = UsdGeom.Mesh.Define(stage, f'/World/Floor_{i}')
+        x = i * size
+        mesh.CreatePointsAttr([(x, 0, 0), (x, 0, size), (x + size, 0, size), (x + size, 0, 0)])
+        mesh.CreateFaceVertexCountsAttr([4])
+        mesh.CreateFaceVertexIndicesAttr([0, 1, 2, 3])
+    return stage, root.GetPrim()
+
+
+class TestNavmeshBuild(omni.kit.test.AsyncTestCase):
+
+    async def test_build_swaps_in(self):
+        stage, root = floor_stage()
+        interface = NavmeshInterface()
+        progress = []
+        build = pipeline.NavmeshBuild(interface, [root], chunk_size=1,
+                                      progress_fn=lambda stage, fraction: progress.append((stage, fraction)))
+
+        self.assertTrue(await build.run())
+        self.assertTrue(interface.built)
+        self.assertEqual(len(interface.input_tri), 6)
+        self.assertEqual(set(build.stage_times), set(pipeline.STAGES))
+        vertices, triangles = build.mesh
+        self.assertEqual(triangles.dtype, np.int32)
+        self.assertLess(triangles.max(), len(vertices))
+
+        # Each stage reports in order, collect once per chunk of meshes
+        self.assertEqual([s for s, _ in progress], ['collect'] * 4 + ['build', 'build', 'extract', 'extract'])
+        self.assertEqual(progress[3], ('collect', 1.0))
+
+        points, offsets, status = interface.find_paths_batch([[2, 0, 2]], [[58, 0, 18]])
+        np.testing.assert_allclose(points[-1, [0, 2]], [58, 18], atol=0.5)
+
+        # The build's own worker is released once it is done
+        self.assertTrue(build.executor._shutdown)
+
+    async def test_cancel_keeps_the_current_navmesh(self):
+        stage, root = floor_stage()
+        interface = NavmeshInterface()
+        await pipeline.NavmeshBuild(interface, [root]).run()
+        current = interface.navmesh
+
+        build = pipeline.NavmeshBuild(interface, [root], chunk_size=1)
+        task = asyncio.ensure_future(build.run())
+        await asyncio.sleep(0)
+        build.cancel()
+
+        self.assertFalse(await task)
+        self.assertTrue(build.cancelled)
+        self.assertIs(interface.navmesh, current)
+        self.assertTrue(build.executor._shutdown)
+
+    async def test_destroy_before_run(self):
+        stage, root = floor_stage()
+        build = pipeline.NavmeshBuild(NavmeshInterface(), [root])
+        build.destroy()
+        self.assertFalse(await build.run())
+
+    async def test_given_executor_is_not_shut_down(self):
+        stage, root = floor_stage()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            build = pipeline.NavmeshBuild(NavmeshInterface(), [root], executor=executor)
+            self.assertTrue(await build.run())
+            build.destroy()
+            self.assertFalse(executor._shutdown)
+
+    async def test_no_geometry(self):
+        stage = Usd.Stage.CreateInMemory()
+        root = UsdGeom.Xform.Define(stage, '/World').GetPrim()
+        interface = NavmeshInterface()
+        self.assertFalse(await pipeline.NavmeshBuild(interface, [root]).run())
+        self.assertFalse(interface.built)
+
+    async def test_tiled_is_refused(self):
+        stage, root = floor_stage()
+        with self.assertRaises(ValueError):
+            pipeline.NavmeshBuild(NavmeshInterface(tile_size=10.0), [root])
@@ -0,0 +1,45 @@
+import omni.kit.test
+
+from siborg.create.navmesh.cache import PathCache
+from siborg.create.navmesh.core import NavmeshInterface
+
+from .test_cache import StraightNavmesh
+
+
+class TestProfileViews(omni.kit.test.AsyncTestCase):
+
+    def _interface(self):
+        interface = NavmeshInterface(path_cache=PathCache(), profiles={'forklift': {'agentRadius': 1.2}, 'pedestrian': {}})
+        interface.navmesh = {'forklift': StraightNavmesh(), 'pedestrian': StraightNavmesh()}
+        interface.built = True
+        return interface
+
+    async def test_parent_queries_need_a_profile(self):
+        interface = self._interface()
+        with self.assertRaises(RuntimeError):
+            interface.find_paths([[0, 0, 0]], [[1, 0, 1]])
+        with self.assertRaises(RuntimeError):
+            interface.get_random_points(1)
+        with self.assertRaises(RuntimeError):
+            interface.closest_points([[0, 0, 0]])
+        with self.assertRaises(ValueError):
+            interface.profile('amr')
+
+    async def test_views_follow_the_parent(self):
+        interface = self._interface()
+        forklift = interface.profile('forklift')
+        self.assertIs(interface.profile('forklift'), forklift)
+
+        forklift.find_paths([[0, 0, 0]], [[1, 0, 1]])
+        self.assertEqual(interface.navmesh['forklift'].queries, 1)
+        self.assertEqual(interface.navmesh['pedestrian'].queries, 0)
+
+        # each profile caches its own paths
+        self.assertIsNot(forklift.path_cache, interface.profile('pedestrian').path_cache)
+        forklift.find_paths([[0, 0, 0]], [[1, 0, 1]])
+        self.assertEqual(forklift.path_cache.stats['hits'], 1)
+
+        # a swapped in set is used right away, with the cached paths dropped
+        interface.swap_navmesh({'forklift': StraightNavmesh(), 'pedestrian': StraightNavmesh()})
+        forklift.find_paths([[0, 0, 0]], [[1, 0, 1]])
+        self.assertEqual(interface.navmesh['forklift'].queries, 1)
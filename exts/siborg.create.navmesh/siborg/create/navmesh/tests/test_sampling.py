@@ -0,0 +1,48 @@
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh import sampling
+
+
+def floor_triangles():
+    '''Two flat triangles, the second one three times the area of the first'''
+    return np.array([
+        [[0, 0, 0], [1, 0, 0], [0, 0, 1]],
+        [[2, 0, 0], [5, 0, 0], [2, 0, 1]],
+    ], dtype=np.float32)
+
+
+class TestSampleTriangles(omni.kit.test.AsyncTestCase):
+
+    async def test_chunks_and_count(self):
+        chunks = list(sampling.sample_triangles(floor_triangles(), 1000, seed=1, chunk_size=300))
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+        self.assertEqual(chunks[0].dtype, np.float32)
+
+    async def test_reproducible(self):
+        a = np.concatenate(list(sampling.sample_triangles(floor_triangles(), 100, seed=7)))
+        b = np.concatenate(list(sampling.sample_triangles(floor_triangles(), 100, seed=7)))
+        np.testing.assert_array_equal(a, b)
+
+    async def test_points_lie_on_triangles_by_area(self):
+        points = np.concatenate(list(sampling.sample_triangles(floor_triangles(), 20000, seed=3)))
+        self.assertTrue(np.allclose(points[:, 1], 0))
+
+        first = (points[:, 0] <= 1) & (points[:, 0] + points[:, 2] <= 1 + 1e-5)
+        second = (points[:, 0] >= 2) & ((points[:, 0] - 2) / 3 + points[:, 2] <= 1 + 1e-5)
+        self.assertTrue(np.all(first | second))
+        self.assertAlmostEqual(first.mean(), 0.25, delta=0.02)
+
+    async def test_bbox(self):
+        bbox = ([2.5, -1, 0], [4, 1, 0.5])
+        points = np.concatenate(list(sampling.sample_triangles(floor_triangles(), 500, seed=5, bbox=bbox)))
+        self.assertEqual(len(points), 500)
+        self.assertTrue(np.all((points >= bbox[0]) & (points <= bbox[1])))
+
+    async def test_no_area(self):
+        flat = np.zeros((1, 3, 3), dtype=np.float32)
+        with self.assertRaises(ValueError):
+            list(sampling.sample_triangles(flat, 10))
+        with self.assertRaises(ValueError):
+            list(sampling.sample_triangles(floor_triangles(), 10, bbox=([10, 0, 10], [11, 1, 11])))
@@ -0,0 +1,108 @@
+import os
+import tempfile
+
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh.core import NavmeshInterface
+from siborg.create.navmesh.pyrecast import shared
+
+from .test_core import plane
+
+
+class BuiltNavmesh:
+    '''Stand-in for a built Navmesh, publishing only reads its geometry and settings'''
+
+    def __init__(self, num_vertices=7, settings=None):
+        self.vertices = np.arange(num_vertices * 3, dtype=np.float32).reshape(-1, 3)
+        self.triangles = np.arange(num_vertices - 2, dtype=np.int32)[:, None] + np.array([0, 1, 2], dtype=np.int32)
+        self.settings = settings or {'agentRadius': 0.3}
+
+
+class TestSharedNavmesh(omni.kit.test.AsyncTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'level.navshm')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    async def test_round_trip(self):
+        navmesh = BuiltNavmesh()
+        shared.publish_shared(navmesh, self.path, metadata={'up_axis': 'Z'})
+        attached = shared.SharedNavmesh(self.path)
+
+        np.testing.assert_array_equal(attached.vertices, navmesh.vertices)
+        np.testing.assert_array_equal(attached.triangles, navmesh.triangles)
+        self.assertEqual(attached.vertices.dtype, np.float32)
+        self.assertEqual(attached.triangles.dtype, np.int32)
+        self.assertEqual(attached.settings, navmesh.settings)
+        self.assertEqual(attached.metadata, {'up_axis': 'Z'})
+
+        # Arrays start on aligned offsets of the page aligned mapping, and are read-only views of it
+        self.assertEqual(attached.vertices.ctypes.data % shared.ALIGN, 0)
+        self.assertEqual(attached.triangles.ctypes.data % shared.ALIGN, 0)
+        self.assertFalse(attached.vertices.flags.writeable)
+
+        # The obj file is published next to it, and only the published files are left
+        self.assertTrue(os.path.exists(attached.obj_path))
+        self.assertEqual(sorted(os.listdir(self.dir.name)), sorted(['level.navshm', os.path.basename(attached.obj_path)]))
+        attached.close()
+
+    async def test_publish_again_swaps(self):
+        shared.publish_shared(BuiltNavmesh(), self.path)
+        first = shared.SharedNavmesh(self.path)
+        first_obj = first.obj_path
+
+        shared.publish_shared(BuiltNavmesh(num_vertices=11, settings={'agentRadius': 1.0}), self.path)
+        second = shared.SharedNavmesh(self.path)
+        self.assertEqual(len(second.vertices), 11)
+        self.assertEqual(second.settings, {'agentRadius': 1.0})
+        self.assertFalse(os.path.exists(first_obj))
+
+        # The earlier attach keeps its own mapping
+        self.assertEqual(len(first.vertices), 7)
+        first.close()
+        second.close()
+
+        shared.SharedNavmesh.unlink(self.path)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    async def test_close_with_held_views(self):
+        shared.publish_shared(BuiltNavmesh(), self.path)
+        attached = shared.SharedNavmesh(self.path)
+        vertices = attached.vertices
+        attached.close()
+        self.assertEqual(float(vertices[1, 0]), 3.0)
+
+    async def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a navmesh' * 10)
+        with self.assertRaises(ValueError):
+            shared.SharedNavmesh(self.path)
+
+    async def test_needs_loaded_geometry(self):
+        navmesh = BuiltNavmesh()
+        navmesh.vertices = None
+        with self.assertRaises(ValueError):
+            shared.publish_shared(navmesh, self.path)
+
+    async def test_attach_builds_from_the_published_geometry(self):
+        interface = NavmeshInterface()
+        interface.navmesh.load_mesh(*plane(20))
+        interface.build_navmesh({'agentRadius': 0.3})
+        interface.share(self.path)
+
+        # Once from the published obj file, once from the mapped arrays after the obj file is gone
+        for remove_obj in (False, True):
+            attached = NavmeshInterface.attach(self.path)
+            if remove_obj:
+                os.remove(attached.shared.obj_path)
+                attached = NavmeshInterface.attach(self.path)
+            self.assertEqual(attached.settings['agentRadius'], 0.3)
+
+            points, offsets, status = attached.find_paths_batch([[2, 0, 2]], [[18, 0, 18]])
+            np.testing.assert_allclose(points[-1, [0, 2]], [18, 18], atol=0.5)
+            attached.destroy()
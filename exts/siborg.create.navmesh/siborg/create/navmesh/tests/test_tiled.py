@@ -0,0 +1,316 @@
+import numpy as np
+
+import omni.kit.test
+
+from siborg.create.navmesh.pyrecast import tiled
+from siborg.create.navmesh.pyrecast.tiled import TiledNavmesh
+
+
+class FlatTile:
+    '''Stand-in for a tile navmesh: a flat floor over a rectangle in xz, paths are straight lines'''
+
+    def __init__(self, bmin, bmax, height=0.0):
+        self.bmin = np.asarray(bmin, dtype=np.float32)
+        self.bmax = np.asarray(bmax, dtype=np.float32)
+        self.height = height
+
+    def _corners(self):
+        (x0, z0), (x1, z1) = self.bmin, self.bmax
+        y = self.height
+        return np.array([[x0, y, z0], [x1, y, z0], [x1, y, z1], [x0, y, z1]], dtype=np.float32)
+
+    def _inside(self, points):
+        xz = points[:, [0, 2]]
+        return np.all((xz >= self.bmin - 1e-4) & (xz <= self.bmax + 1e-4), axis=1)
+
+    def get_navmesh_polygons(self):
+        a, b, c, d = self._corners()
+        return np.concatenate([a, b, c, a, c, d]).tolist(), None, None
+
+    def get_navmesh_contours(self):
+        corners = self._corners()
+        return np.stack([corners, np.roll(corners, -1, axis=0)], axis=1).reshape(-1).tolist(), None, None
+
+    def find_paths(self, starts, ends, *args, **kwargs):
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        ok = self._inside(starts) & self._inside(ends)
+        return [np.concatenate([s, e]).tolist() if found else [] for s, e, found in zip(starts, ends, ok)]
+
+    def get_random_points(self, num_points):
+        rng = np.random.default_rng(num_points)
+        xz = rng.uniform(self.bmin, self.bmax, size=(num_points, 2))
+        return np.column_stack([xz[:, 0], np.full(num_points, self.height), xz[:, 1]]).astype(np.float32)
+
+
+def flat_tiles(navmesh, tiles, border=1.0):
+    '''Swap flat floors covering each tile plus a border into a tiled navmesh'''
+    for tile in tiles:
+        bmin, bmax = navmesh.tile_bounds(tile, border)
+        navmesh._swap_tile(tile, FlatTile(bmin, bmax))
+
+
+def square(x0, z0, x1, z1):
+    vertices = np.array([[x0, 0, z0], [x1, 0, z0], [x1, 0, z1], [x0, 0, z1]], dtype=np.float32)
+    return vertices, np.array([[0, 1, 2], [0, 2, 3]], dtype=np.int32)
+
+
+def floor(*rects):
+    '''Walkable floor for real tile builds, one square per (x0, z0, x1, z1), wound the way recast walks on'''
+    vertices, triangles = [], []
+    for rect in rects:
+        v, t = square(*rect)
+        triangles.append(t[:, ::-1] + 4 * len(vertices))
+        vertices.append(v)
+    return np.concatenate(vertices), np.concatenate(triangles)
+
+
+class TestTileAssignment(omni.kit.test.AsyncTestCase):
+
+    async def test_tile_of(self):
+        navmesh = TiledNavmesh(tile_size=10.0)
+        tiles = navmesh.tile_of([[0, 5, 0], [9.9, 0, 10], [-0.1, 0, -10.1], [25, 0, -3]])
+        self.assertTrue(np.array_equal(tiles, [[0, 0], [0, 1], [-1, -2], [2, -1]]))
+
+    async def test_source_tiles_include_border(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        navmesh.set_source('floor', *square(2, 2, 9.5, 8))
+        # Within the border of the +x neighbour, not of the others
+        self.assertEqual(navmesh.source_tiles('floor'), {(0, 0), (1, 0)})
+        self.assertEqual(navmesh.dirty_tiles, {(0, 0), (1, 0)})
+
+    async def test_moving_a_source_dirties_old_and_new_tiles(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=0.5)
+        navmesh.set_source('box', *square(2, 2, 4, 4))
+        navmesh.set_source('floor', *square(30, 30, 34, 34))
+        navmesh._dirty.clear()
+
+        navmesh.set_source('box', *square(12, 2, 14, 4))
+        self.assertEqual(navmesh.dirty_tiles, {(0, 0), (1, 0)})
+        self.assertEqual(navmesh.source_tiles('box'), {(1, 0)})
+
+        navmesh._dirty.clear()
+        navmesh.remove_source('box')
+        self.assertEqual(navmesh.dirty_tiles, {(1, 0)})
+        self.assertEqual(navmesh.sources, ['floor'])
+
+    async def test_tile_geometry_is_clipped_to_border(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        navmesh.set_source('floor', *square(-20, -20, 20, 20))
+        vertices, triangles = navmesh._tile_geometry((0, 0))
+        self.assertGreater(len(triangles), 0)
+        self.assertAlmostEqual(float(vertices[:, [0, 2]].min()), -1.0, places=5)
+        self.assertAlmostEqual(float(vertices[:, [0, 2]].max()), 11.0, places=5)
+
+
+class TestTileSnapshots(omni.kit.test.AsyncTestCase):
+
+    async def test_unchanged_source_is_not_dirty(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=0.5)
+        navmesh.set_source('floor', *square(2, 2, 4, 4))
+        navmesh._dirty.clear()
+        navmesh.set_source('floor', *square(2, 2, 4, 4))
+        self.assertEqual(navmesh.dirty_tiles, set())
+
+    async def test_split_source(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=0.5)
+        left, right = square(2, 2, 4, 4), square(12, 2, 14, 4)
+        whole = (np.concatenate([left[0], right[0]]), np.concatenate([left[1], right[1] + 4]))
+        navmesh.set_source(None, *whole)
+        navmesh._dirty.clear()
+
+        # The same triangles split by prim, the built tiles are still up to date
+        navmesh.split_source(None, {'left': left, 'right': right})
+        self.assertEqual(navmesh.dirty_tiles, set())
+        self.assertEqual(sorted(navmesh.sources), ['left', 'right'])
+        self.assertEqual(navmesh.source_tiles('right'), {(1, 0)})
+
+        navmesh.set_source(None, *whole)
+        navmesh.remove_source('left')
+        navmesh.remove_source('right')
+        navmesh._dirty.clear()
+        navmesh.split_source(None, {'left': left, 'right': square(22, 2, 24, 4)})
+        self.assertEqual(navmesh.dirty_tiles, {(0, 0), (1, 0), (2, 0)})
+
+    async def test_snapshot_is_isolated(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=0.5)
+        navmesh.set_source('box', *square(2, 2, 4, 4))
+        snapshot = navmesh.take_dirty()
+        self.assertEqual([tile for tile, _ in snapshot['tiles']], [(0, 0)])
+        self.assertEqual(navmesh.dirty_tiles, set())
+
+        # Moving the box after the snapshot changes neither the snapshot nor the built tiles
+        navmesh.set_source('box', *square(5, 5, 6, 6))
+        (_, sources), = snapshot['tiles']
+        vertices, triangles = navmesh._tile_geometry((0, 0), sources, snapshot['border'])
+        self.assertAlmostEqual(float(vertices[:, 0].min()), 2.0)
+        self.assertEqual(navmesh.tiles, {})
+
+    async def test_stale_tiles_are_not_applied(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=0.5)
+        navmesh.set_source('box', *square(2, 2, 4, 4))
+        navmesh.set_source('floor', *square(12, 2, 14, 4))
+        snapshot = navmesh.take_dirty()
+
+        # The box moves while the snapshot builds, its tile is built again later
+        navmesh.set_source('box', *square(5, 5, 6, 6))
+        built = {(0, 0): FlatTile((0, 0), (10, 10)), (1, 0): FlatTile((10, 0), (20, 10))}
+        self.assertEqual(navmesh.apply_tiles(built, snapshot), 1)
+        self.assertEqual(set(navmesh.tiles), {(1, 0)})
+        self.assertEqual(navmesh.dirty_tiles, {(0, 0)})
+
+        # A failed build puts its tiles back
+        snapshot = navmesh.take_dirty()
+        navmesh.restore_dirty(snapshot)
+        self.assertEqual(navmesh.dirty_tiles, {(0, 0)})
+
+
+class TestClipping(omni.kit.test.AsyncTestCase):
+
+    async def test_clip_polygon(self):
+        poly = np.array([[-5, 0, -5], [5, 0, -5], [5, 0, 5], [-5, 0, 5]], dtype=np.float32)
+        clipped = tiled.clip_polygon(poly, (0, 0), (10, 10))
+        self.assertEqual(len(clipped), 4)
+        self.assertTrue(np.allclose(clipped[:, [0, 2]].min(axis=0), 0))
+        self.assertTrue(np.allclose(clipped[:, [0, 2]].max(axis=0), 5))
+
+        self.assertEqual(len(tiled.clip_polygon(poly, (20, 20), (30, 30))), 0)
+
+    async def test_clip_segments(self):
+        segments = np.array([
+            [[-5, 1, 5], [15, 1, 5]],   # crosses the box
+            [[2, 0, 2], [3, 0, 3]],     # inside
+            [[-5, 0, -5], [-1, 0, 20]], # outside
+            [[5, 0, 20], [5, 0, 30]],   # parallel to z, outside
+        ], dtype=np.float32)
+        clipped = tiled.clip_segments(segments, (0, 0), (10, 10))
+        self.assertEqual(len(clipped), 2)
+        self.assertTrue(np.allclose(clipped[0], [[0, 1, 5], [10, 1, 5]]))
+        self.assertTrue(np.allclose(clipped[1], segments[1]))
+
+    async def test_contours_do_not_overlap(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        flat_tiles(navmesh, [(0, 0), (1, 0)])
+        vert, _, _ = navmesh.get_navmesh_contours()
+        vert = np.asarray(vert).reshape(-1, 3)
+        self.assertTrue(np.all(vert[:, [0, 2]] >= 0) and np.all(vert[:, [0, 2]] <= [20, 10]))
+
+        # Each tile keeps the part of its floor inside it, so the total is the area of both tiles
+        soup, _, _ = navmesh.get_navmesh_polygons()
+        self.assertAlmostEqual(navmesh.tile_area((0, 0)) + navmesh.tile_area((1, 0)), 200.0, places=3)
+        self.assertEqual(len(soup) % 9, 0)
+
+
+class TestPortals(omni.kit.test.AsyncTestCase):
+
+    def floor(self, x0, z0, x1, z1, y=0.0):
+        return FlatTile((x0, z0), (x1, z1), y)
+
+    def edge(self, tile_a, tile_b):
+        return tiled.edge_portals(np.asarray(tile_a.get_navmesh_polygons()[0]).reshape(-1, 3, 3),
+                                  np.asarray(tile_b.get_navmesh_polygons()[0]).reshape(-1, 3, 3),
+                                  0, 10.0, 0.0, 10.0, spacing=1.0, climb=0.5)
+
+    async def test_one_portal_per_stretch(self):
+        portals = self.edge(self.floor(-1, -1, 11, 11), self.floor(9, -1, 21, 11))
+        self.assertEqual(len(portals), 1)
+        self.assertTrue(np.allclose(portals[0], [10, 0, 5.5]))
+
+        # Two openings along the edge give two portals
+        gap = [self.floor(9, -1, 21, 3), self.floor(9, 6, 21, 11)]
+        tris = np.concatenate([np.asarray(t.get_navmesh_polygons()[0]).reshape(-1, 3, 3) for t in gap])
+        a = np.asarray(self.floor(-1, -1, 11, 11).get_navmesh_polygons()[0]).reshape(-1, 3, 3)
+        portals = tiled.edge_portals(a, tris, 0, 10.0, 0.0, 10.0, spacing=1.0, climb=0.5)
+        self.assertEqual(len(portals), 2)
+        self.assertTrue(np.all(portals[:, 0] == 10))
+
+    async def test_no_portal_between_floors_at_different_heights(self):
+        self.assertEqual(len(self.edge(self.floor(-1, -1, 11, 11), self.floor(9, -1, 21, 11, y=2.0))), 0)
+        self.assertEqual(len(self.edge(self.floor(-1, -1, 11, 11), self.floor(12, -1, 21, 11))), 0)
+
+    async def test_shortest_route(self):
+        leg = lambda *points: np.asarray(points, dtype=np.float32).reshape(-1).tolist()
+        graph = {
+            'a': [('b', 1.0, leg([0, 0, 1], [0, 0, 2])), ('c', 5.0, leg([0, 0, 1], [0, 0, 9]))],
+            'b': [('c', 1.0, leg([0, 0, 2], [0, 0, 3]))],
+        }
+        route = tiled.shortest_route(graph, {'a': (1.0, leg([0, 0, 0], [0, 0, 1]))}, {'c': (1.0, leg([0, 0, 3], [0, 0, 4]))})
+        self.assertEqual(np.asarray(route).reshape(-1, 3)[:, 2].tolist(), [0, 1, 2, 3, 4])
+        self.assertIsNone(tiled.shortest_route(graph, {'c': (1.0, [])}, {'a': (1.0, [])}))
+
+
+class TestTiledQueries(omni.kit.test.AsyncTestCase):
+
+    async def test_paths_across_tiles(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        flat_tiles(navmesh, [(0, 0), (1, 0), (2, 0)])
+
+        paths = navmesh.find_paths([[2, 0, 5], [2, 0, 5]], [[25, 0, 5], [4, 0, 6]])
+        route = np.asarray(paths[0]).reshape(-1, 3)
+        self.assertTrue(np.allclose(route[0], [2, 0, 5]) and np.allclose(route[-1], [25, 0, 5]))
+        self.assertTrue(np.all(np.diff(route[:, 0]) > 0))
+        self.assertEqual(len(paths[1]), 6)
+
+        # Without the middle tile there is no way across
+        navmesh._swap_tile((1, 0), None)
+        self.assertEqual(navmesh.find_paths([[2, 0, 5]], [[25, 0, 5]]), [[]])
+
+    async def test_paths_go_around_unconnected_edges(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        flat_tiles(navmesh, [(0, 0), (0, 1), (1, 1)])
+        # The floor of (1,0) stops short of the edge to (0,0), it can only be entered from (1,1)
+        navmesh._swap_tile((1, 0), FlatTile((12, -1), (21, 11)))
+
+        route = np.asarray(navmesh.find_paths([[5, 0, 5]], [[15, 0, 5]])[0]).reshape(-1, 3)
+        self.assertTrue(np.allclose(route[-1], [15, 0, 5]))
+        self.assertGreater(route[:, 2].max(), 10)
+
+    async def test_closest_points_on_built_tiles(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        # Recast only walks on triangles wound the other way round
+        vertices, triangles = square(0, 0, 20, 10)
+        navmesh.set_source('floor', vertices, triangles[:, ::-1])
+        navmesh.rebuild_dirty()
+
+        points = [[5, 1, 5], [15, 0.5, 4], [35, 0, 5]]
+        snapped = navmesh.get_closest_point(points)
+        np.testing.assert_allclose(snapped[:2, [0, 2]], [[5, 5], [15, 4]])
+        # (3,0) has no tile
+        self.assertTrue(np.all(np.isnan(snapped[2])))
+
+    async def test_same_tile_pair_that_has_to_leave_the_tile(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        # Two strips across (0,0) and (1,0), only joined in (1,0)
+        navmesh.set_source('floor', *floor((0, 0, 20, 3), (0, 7, 20, 10), (12, 3, 20, 7)))
+        navmesh.rebuild_dirty()
+
+        # Detour's partial path inside (0,0) is not taken as the answer
+        route = np.asarray(navmesh.find_paths([[2, 0, 2]], [[2, 0, 8]])[0]).reshape(-1, 3)
+        np.testing.assert_allclose(route[-1], [2, 0, 8])
+        self.assertGreater(route[:, 0].max(), 12)
+
+    async def test_portals_are_dropped_with_their_tiles(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        flat_tiles(navmesh, [(0, 0), (1, 0)])
+        navmesh.find_paths([[2, 0, 5]], [[15, 0, 5]])
+        self.assertIn(((0, 0), (1, 0)), navmesh._portals)
+
+        navmesh._swap_tile((1, 0), None)
+        self.assertNotIn(((0, 0), (1, 0)), navmesh._portals)
+        self.assertNotIn((0, 0), navmesh._legs)
+
+    async def test_random_points_weighted_by_area(self):
+        navmesh = TiledNavmesh(tile_size=10.0, border=1.0)
+        flat_tiles(navmesh, [(0, 0)])
+        # A quarter of the area of the full tile
+        navmesh._swap_tile((1, 0), FlatTile((10, 0), (15, 5)))
+
+        points = navmesh.get_random_points(4000, rng=np.random.default_rng(0))
+        self.assertEqual(points.shape, (4000, 3))
+        in_first = np.count_nonzero(points[:, 0] < 10)
+        self.assertAlmostEqual(in_first / 4000, 0.8, delta=0.03)
+        # Nothing from the borders
+        self.assertTrue(np.all((points[:, [0, 2]] >= 0) & (points[:, [0, 2]] < [20, 10])))
+
+        again = navmesh.get_random_points(4000, rng=np.random.default_rng(0))
+        self.assertEqual(np.count_nonzero(again[:, 0] < 10), in_first)
@@ -0,0 +1,188 @@
+import numpy as np
+
+import omni.kit.test
+from pxr import Usd, UsdGeom
+
+from siborg.create.navmesh import usd_utils
+
+
+def loop_triangulate(FaceVertexIndices, FaceVertexCounts):
+    '''Reference fan triangulation, the original per-face python loop'''
+    faces = []
+    start = 0
+    for count in FaceVertexCounts:
+        end = start + count
+        faces.append(FaceVertexIndices[start:end])
+        start = end
+
+    triangle_faces = []
+    for face in faces:
+        if len(face) < 3:
+            newface = []
+        elif len(face) == 3:
+            newface = [face]
+        else:
+            v0 = face[0]
+            newface = [[v0, face[i], face[i + 1]] for i in range(1, len(face) - 1)]
+        triangle_faces.extend(newface)
+
+    return np.array(triangle_faces)
+
+
+class TestTriangulation(omni.kit.test.AsyncTestCase):
+
+    def check_matches_loop(self, indices, counts):
+        result = usd_utils.convert_to_triangle_mesh(indices, counts)
+        expected = loop_triangulate(indices, counts).reshape(-1, 3)
+
+        self.assertEqual(result.dtype, np.int32)
+        self.assertEqual(result.shape, expected.shape)
+        self.assertTrue(np.array_equal(result, expected))
+
+    async def test_all_triangles(self):
+        counts = [3, 3, 3]
+        indices = list(range(9))
+        self.check_matches_loop(indices, counts)
+
+    async def test_mixed_tri_quad_ngon(self):
+        counts = [3, 4, 5, 3, 8, 4]
+        indices = list(np.random.default_rng(0).integers(0, 50, size=sum(counts)))
+        self.check_matches_loop(indices, counts)
+
+    async def test_degenerate_faces_dropped(self):
+        counts = [2, 4, 1, 3, 0, 6]
+        indices = list(range(sum(counts)))
+        self.check_matches_loop(indices, counts)
+
+    async def test_large_random_mesh(self):
+        rng = np.random.default_rng(1)
+        counts = rng.integers(3, 9, size=2000)
+        indices = rng.integers(0, 10000, size=int(counts.sum()))
+        self.check_matches_loop(indices, counts)
+
+    async def test_empty(self):
+        result = usd_utils.convert_to_triangle_mesh([], [])
+        self.assertEqual(result.shape, (0, 3))
+
+
+def random_paths(lengths, seed=0):
+    '''Random paths in the (points, offsets) layout of NavmeshInterface.find_paths_batch'''
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    points = np.random.default_rng(seed).uniform(-10, 10, (offsets[-1], 3)).astype(np.float32)
+    return points, offsets
+
+
+class TestWriters(omni.kit.test.AsyncTestCase):
+
+    def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+
+    def path_points(self, path):
+        return np.array(UsdGeom.BasisCurves(self.stage.GetPrimAtPath(path)).GetPointsAttr().Get())
+
+    async def test_write_paths(self):
+        points, offsets = random_paths([3, 1, 4, 2])
+        written = usd_utils.write_paths(points, offsets, '/World/Paths', stage=self.stage)
+
+        # Paths of a single point can't be drawn and are skipped, the others keep their index
+        self.assertEqual([str(path) for path in written], ['/World/Paths/Path_0', '/World/Paths/Path_2', '/World/Paths/Path_3'])
+        self.assertTrue(self.stage.GetPrimAtPath('/World').IsDefined())
+        curves = UsdGeom.BasisCurves(self.stage.GetPrimAtPath('/World/Paths/Path_2'))
+        self.assertEqual(curves.GetTypeAttr().Get(), UsdGeom.Tokens.linear)
+        self.assertEqual(list(curves.GetCurveVertexCountsAttr().Get()), [4])
+        np.testing.assert_array_equal(self.path_points('/World/Paths/Path_2'), points[4:8])
+
+    async def test_write_paths_again_updates_in_place(self):
+        points, offsets = random_paths([3, 3, 3])
+        usd_utils.write_paths(points, offsets, '/World/Paths', stage=self.stage)
+        prim = self.stage.GetPrimAtPath('/World/Paths/Path_0')
+
+        # Fewer paths: the stale Path_i are removed, the kept ones get the new points
+        points, offsets = random_paths([5], seed=1)
+        usd_utils.write_paths(points, offsets, '/World/Paths', stage=self.stage)
+        children = [child.GetName() for child in self.stage.GetPrimAtPath('/World/Paths').GetChildren()]
+        self.assertEqual(children, ['Path_0'])
+        self.assertTrue(prim.IsValid())
+        np.testing.assert_array_equal(self.path_points('/World/Paths/Path_0'), points)
+
+        usd_utils.write_paths(np.empty((0, 3)), [0], '/World/Paths', stage=self.stage)
+        self.assertEqual(self.stage.GetPrimAtPath('/World/Paths').GetChildren(), [])
+
+    async def test_write_curves(self):
+        points, _ = random_paths([5])
+        usd_utils.write_curves(points, [2, 3], '/World/Curves', color=(1, 0, 0), width=2.0, stage=self.stage)
+        usd_utils.write_curves(points[:4], [4], '/World/Curves', stage=self.stage)
+
+        curves = UsdGeom.BasisCurves(self.stage.GetPrimAtPath('/World/Curves'))
+        self.assertEqual(list(curves.GetCurveVertexCountsAttr().Get()), [4])
+        np.testing.assert_array_equal(np.array(curves.GetPointsAttr().Get()), points[:4])
+        self.assertEqual(list(curves.GetWidthsAttr().Get()), [1.0])
+
+    async def test_write_points(self):
+        points = np.arange(12, dtype=np.float64).reshape(4, 3)
+        usd_utils.write_points(points, '/World/Points', width=0.5, stage=self.stage)
+        usd_utils.write_points(points[::2], '/World/Points', stage=self.stage)
+
+        prim = UsdGeom.Points(self.stage.GetPrimAtPath('/World/Points'))
+        np.testing.assert_array_equal(np.array(prim.GetPointsAttr().Get()), points[::2])
+        # Attributes not passed again are left as they were
+        self.assertEqual(list(prim.GetWidthsAttr().Get()), [0.5])
+
+    async def test_write_mesh(self):
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1]], dtype=np.float32)
+        triangles = np.array([[0, 2, 1], [0, 3, 2]])
+        usd_utils.write_mesh(vertices, triangles, '/World/Navmesh', color=(0, 0, 1), opacity=0.5, stage=self.stage)
+
+        mesh = UsdGeom.Mesh(self.stage.GetPrimAtPath('/World/Navmesh'))
+        np.testing.assert_array_equal(np.array(mesh.GetPointsAttr().Get()), vertices)
+        self.assertEqual(list(mesh.GetFaceVertexIndicesAttr().Get()), [0, 2, 1, 0, 3, 2])
+        self.assertEqual(list(mesh.GetFaceVertexCountsAttr().Get()), [3, 3])
+        self.assertAlmostEqual(mesh.GetDisplayOpacityAttr().Get()[0], 0.5)
+
+
+class TestPointsStream(omni.kit.test.AsyncTestCase):
+
+    def setUp(self):
+        self.stage = Usd.Stage.CreateInMemory()
+
+    def points_attr(self):
+        return UsdGeom.Points(self.stage.GetPrimAtPath('/World/Agents')).GetPointsAttr()
+
+    async def test_update(self):
+        stream = usd_utils.PointsStream(3, '/World/Agents', stage=self.stage)
+        self.assertEqual(len(self.points_attr().Get()), 3)
+
+        positions = np.arange(9, dtype=np.float32).reshape(3, 3)
+        self.assertTrue(stream.update(positions))
+        np.testing.assert_array_equal(np.array(self.points_attr().Get()), positions)
+        self.assertEqual(stream.stats['writes'], 1)
+
+    async def test_buffer_is_reused(self):
+        stream = usd_utils.PointsStream(4, '/World/Agents', stage=self.stage)
+        buffer = stream._buffer
+
+        # float64 and strided positions are converted into the same buffer every frame
+        for i in range(3):
+            positions = np.full((4, 3), i, dtype=np.float64)
+            stream.update(positions)
+            self.assertIs(stream._buffer, buffer)
+            np.testing.assert_array_equal(np.array(self.points_attr().Get()), positions)
+        stream.update(np.zeros((4, 6))[:, ::2])
+        self.assertIs(stream._buffer, buffer)
+
+        # Only a change in the number of agents reallocates it
+        stream.update(np.ones((6, 3)))
+        self.assertIsNot(stream._buffer, buffer)
+        self.assertEqual(len(self.points_attr().Get()), 6)
+
+    async def test_record_time_samples(self):
+        stream = usd_utils.PointsStream(2, '/World/Agents', record=True, decimation=2, stage=self.stage)
+        written = [stream.update(np.full((2, 3), frame, dtype=np.float32)) for frame in range(5)]
+        stream.finish()
+
+        self.assertEqual(written, [True, False, True, False, True])
+        self.assertEqual(self.points_attr().GetTimeSamples(), [0.0, 2.0, 4.0])
+        np.testing.assert_array_equal(np.array(self.points_attr().Get(Usd.TimeCode(2))), np.full((2, 3), 2))
+        self.assertEqual((self.stage.GetStartTimeCode(), self.stage.GetEndTimeCode()), (0.0, 4.0))
+        self.assertEqual(stream.stats['frames'], 5)
+        self.assertEqual(stream.stats['writes'], 3)
@@ -1,8 +1,15 @@
+import time
+
 import numpy as np
 from pxr import Usd, UsdGeom, Gf, Sdf, UsdShade, Vt
-import omni
 
 
+def _context_stage():
+    '''Stage of the current omni.usd context. omni is only imported here, so collecting geometry 
+    from a stage opened with plain pxr (e.g. headless baking) works without Kit'''
+    import omni.usd
+    return omni.usd.get_context().get_stage()
+
 def traverse_instanced_children(prim):
     """Get every Prim child beneath `prim`, even if `prim` is instanced.
 
@@ -56,6 +63,14 @@ def children_as_mesh(stage, parent_prim):
 
 def get_all_stage_mesh(stage, prims):
 
+    found_meshes = find_meshes(prims)
+    points, faces = get_mesh(found_meshes)
+   
+    return points, faces
+
+def find_meshes(prims):
+    '''Visible mesh prims among `prims` and their descendants, including instance proxies'''
+
     found_meshes = []
 
     # For each selected prim, go through its children and figure out if they are meshes
@@ -73,98 +88,150 @@ def get_all_stage_mesh(stage, prims):
             if x.IsA(UsdGeom.Mesh):
                 found_meshes.append(x)
 
-    points, faces = get_mesh(found_meshes)
-   
-    return points, faces
+    return found_meshes
+
+def mesh_source(prim):
+    '''The prim a mesh reads its points and topology from, the prototype mesh for instance proxies'''
+    return prim.GetPrimInPrototype() if prim.IsInstanceProxy() else prim
 
 def get_mesh(objs):
 
-    points, faces = [],[]
+    # One cache for the whole pass, so shared parent transforms are only computed once
+    xform_cache = UsdGeom.XformCache()
 
+    # Instance proxies of the same prototype mesh share their points and topology, so group 
+    # every mesh by its source prim, read and triangulate each source once, and keep the 
+    # world transform of every prim that uses it
+    sources = {}
+    transforms = {}
     for obj in objs:
-        f_offset = len(points)
-        # f, p = convert_to_mesh(obj)#usd_stage.GetPrimAtPath(obj))
-        f, p = meshconvert(obj)#usd_stage.GetPrimAtPath(obj))
-        
-        points.extend(p)
-        faces.extend(f+f_offset)
+        source = mesh_source(obj)
+        key = source.GetPath()
 
-    return points, faces
+        if key not in sources:
+            sources[key] = read_local_mesh(source)
+            transforms[key] = []
+        transforms[key].append(world_matrix(obj, xform_cache))
+
+    points, faces = [],[]
+    f_offset = 0
 
-def meshconvert(prim):
+    for key, (f, p) in sources.items():
+        if len(f) == 0:
+            continue
 
-    # Create an XformCache object to efficiently compute world transforms
-    xform_cache = UsdGeom.XformCache()
+        matrices = np.stack(transforms[key])
+        num_inst = len(matrices)
+
+        # Batched affine transform of the local points by every instance matrix, (instances, points, 3)
+        world_points = np.einsum('nj,kji->kni', p, matrices[:, :3, :3]) + matrices[:, np.newaxis, 3, :3]
+
+        # Each instance gets its own copy of the triangles, offset to its block of points
+        inst_offsets = f_offset + np.arange(num_inst, dtype=np.int32) * len(p)
+        inst_faces = f[np.newaxis, :, :] + inst_offsets[:, np.newaxis, np.newaxis]
+
+        points.append(world_points.reshape(-1, 3))
+        faces.append(inst_faces.reshape(-1, 3))
+        f_offset += num_inst * len(p)
+
+    if not points:
+        return np.empty((0, 3), dtype=np.float64), np.empty((0, 3), dtype=np.int32)
+
+    # Join the per-prototype arrays once at the end
+    return np.concatenate(points), np.concatenate(faces)
+
+def read_local_mesh(prim):
+    '''Read the points of a mesh prim in local space and triangulate its faces
 
+    Returns (triangles, points) as (N,3) int32 and (M,3) float64 arrays
+    '''
     # Get the mesh schema
     mesh = UsdGeom.Mesh(prim)
     
     # Get verts and triangles
     tris = mesh.GetFaceVertexIndicesAttr().Get()
     if not tris:
-        return [], []
+        return np.empty((0, 3), dtype=np.int32), np.empty((0, 3), dtype=np.float64)
     tris_cnt = mesh.GetFaceVertexCountsAttr().Get()
 
-    # Get the vertices in local space
-    points_attr = mesh.GetPointsAttr()
-    local_points = points_attr.Get()
-    
-    # Convert the VtVec3fArray to a NumPy array
-    points_np = np.array(local_points, dtype=np.float64)
-    
-    # Add a fourth component (with value 1.0) to make the points homogeneous
-    num_points = len(local_points)
-    ones = np.ones((num_points, 1), dtype=np.float64)
-    points_np = np.hstack((points_np, ones))
+    # Get the vertices in local space, and convert the VtVec3fArray to a NumPy array
+    local_points = mesh.GetPointsAttr().Get()
+    points_np = np.asarray(local_points, dtype=np.float64)
+
+    tri_list = convert_to_triangle_mesh(tris, tris_cnt)
 
-    # Compute the world transform for this prim
+    return tri_list, points_np
+
+def world_matrix(prim, xform_cache):
+    '''Local to world transform of a prim as a (4,4) numpy array (row vector convention)'''
     world_transform = xform_cache.GetLocalToWorldTransform(prim)
+    return np.array(world_transform, dtype=np.float64).reshape((4, 4))
 
-    # Convert the GfMatrix to a NumPy array
-    matrix_np = np.array(world_transform, dtype=np.float64).reshape((4, 4))
+def world_matrices(prims):
+    '''World transforms of many prims, see world_matrix, sharing one XformCache'''
+    xform_cache = UsdGeom.XformCache()
+    return [world_matrix(prim, xform_cache) for prim in prims]
 
-    # Transform all vertices to world space using matrix multiplication
-    world_points = np.dot(points_np, matrix_np)
+def local_bound_points(prim):
+    '''Corners (8,3) of the bounding box of a prim (and its children) in the prim's own space'''
+    bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), [UsdGeom.Tokens.default_, UsdGeom.Tokens.render])
+    bbox = bbox_cache.ComputeUntransformedBound(prim)
+    box_range = bbox.GetRange()
+    if box_range.IsEmpty():
+        return np.empty((0, 3), dtype=np.float64)
 
-    tri_list = convert_to_triangle_mesh(tris, tris_cnt)
-    # tri_list = tri_list.flatten()
+    matrix = np.array(bbox.GetMatrix(), dtype=np.float64).reshape((4, 4))
+    corners = np.array([box_range.GetCorner(i) for i in range(8)], dtype=np.float64)
+    return corners @ matrix[:3, :3] + matrix[3, :3]
+
+def meshconvert(prim, xform_cache=None):
+
+    # Create an XformCache object to efficiently compute world transforms, 
+    # callers converting many prims should pass in a shared one
+    if xform_cache is None:
+        xform_cache = UsdGeom.XformCache()
+
+    tri_list, points_np = read_local_mesh(prim)
+    matrix_np = world_matrix(prim, xform_cache)
 
-    world_points = world_points[:,:3]
+    # Transform all vertices to world space, USD matrices are affine and act on row vectors,
+    # so apply the 3x3 part and add the translation row (no homogeneous copy needed)
+    world_points = points_np @ matrix_np[:3, :3] + matrix_np[3, :3]
 
     return tri_list, world_points
 
 def convert_to_triangle_mesh(FaceVertexIndices, FaceVertexCounts):
     """
     Convert a list of vertices and a list of faces into a triangle mesh.
+
+    Faces are fan triangulated around their first vertex, faces with less than 3 vertices are dropped.
     
-    A list of triangle faces, where each face is a list of indices of the vertices that form the face.
+    Returns an (N,3) int32 array of triangle faces, where each row holds the indices of the vertices that form the face.
     """
-    
-    # Parse the face vertex indices into individual face lists based on the face vertex counts.
-
-    faces = []
-    start = 0
-    for count in FaceVertexCounts:
-        end = start + count
-        face = FaceVertexIndices[start:end]
-        faces.append(face)
-        start = end
-
-    # Convert all faces to triangles
-    triangle_faces = []
-    for face in faces:
-        if len(face) < 3:
-            newface = []  # Invalid face
-        elif len(face) == 3:
-            newface = [face]  # Already a triangle
-        else:
-            # Fan triangulation: pick the first vertex and connect it to all other vertices
-            v0 = face[0]
-            newface = [[v0, face[i], face[i + 1]] for i in range(1, len(face) - 1)]
+    indices = np.asarray(FaceVertexIndices, dtype=np.int32)
+    counts = np.asarray(FaceVertexCounts, dtype=np.int32)
 
-        triangle_faces.extend(newface)
-    
-    return np.array(triangle_faces)
+    # Fast path, everything is already a triangle
+    if len(counts) == 0 or np.all(counts == 3):
+        return indices.reshape(-1, 3)
+
+    # Offset of the first vertex of each face into the flat index list
+    face_starts = np.cumsum(counts) - counts
+
+    # A face with n vertices makes n-2 triangles, invalid faces make none
+    tris_per_face = np.maximum(counts - 2, 0)
+    num_tris = int(tris_per_face.sum())
+
+    # For every output triangle, which face it came from and its position in that face's fan
+    tri_face = np.repeat(np.arange(len(counts)), tris_per_face)
+    tri_local = np.arange(num_tris) - np.repeat(np.cumsum(tris_per_face) - tris_per_face, tris_per_face)
+
+    # Fan triangulation: the first vertex connected to every consecutive pair after it
+    v0 = face_starts[tri_face]
+    v1 = v0 + 1 + tri_local
+    triangle_faces = np.stack([indices[v0], indices[v1], indices[v1 + 1]], axis=1)
+
+    return triangle_faces
 
 
 def create_geompoints(boid_positions):
@@ -180,7 +247,7 @@ def create_geompoints(boid_positions):
     
     stage_loc = "/World/Points"
 
-    stage = omni.usd.get_context().get_stage()
+    stage = _context_stage()
     agent_point_prim = UsdGeom.Points.Define(stage, stage_loc)
     agent_point_prim.CreatePointsAttr()
 
@@ -191,7 +258,7 @@ def create_geompoints(boid_positions):
     point_color = (1, 0, 0)
     color_primvar.Set([point_color])
     
-    boid_positions = Vt.Vec3fArray.FromNumpy(np.asarray(boid_positions, dtype=float))
+    boid_positions = Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(boid_positions, dtype=np.float32))
 
     set_positions(agent_point_prim, boid_positions)
 
@@ -204,7 +271,7 @@ def set_positions(agent_point_prim, positions):
 def create_curve(nodes, prim_path="/World/Path", color=(0, 1, 0), width=np.array([1.0], dtype=float) ):
     '''Create and draw a BasisCurve on the stage following the nodes'''
 
-    stage = omni.usd.get_context().get_stage()
+    stage = _context_stage()
     prim = UsdGeom.BasisCurves.Define(stage, prim_path)
     prim.CreatePointsAttr(nodes)
 
@@ -234,18 +301,72 @@ def create_curve(nodes, prim_path="/World/Path", color=(0, 1, 0), width=np.array
 
 
 
+def create_curves(points, curve_vertex_counts, prim_path="/World/Paths", color=(0, 1, 0), width=1.0):
+    '''Create a single BasisCurves prim holding many linear curves
+
+    Parameters
+    ----------
+    points : (N,3) array
+        points of all curves, back to back
+    curve_vertex_counts : (M,) array
+        number of points in each curve, sums to N
+    prim_path : str, optional
+        by default "/World/Paths"
+    color : (r,g,b), optional
+        constant color of all curves, by default green
+    width : float, optional
+        constant width of all curves, by default 1.0
+    '''
+    stage = _context_stage()
+    prim = UsdGeom.BasisCurves.Define(stage, prim_path)
+
+    prim.CreateTypeAttr().Set(UsdGeom.Tokens.linear)
+    prim.CreatePointsAttr().Set(Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(points, dtype=np.float32)))
+    prim.CreateCurveVertexCountsAttr().Set(Vt.IntArray.FromNumpy(np.ascontiguousarray(curve_vertex_counts, dtype=np.int32)))
+
+    prim.CreateWidthsAttr().Set(Vt.FloatArray([width]))
+    prim.SetWidthsInterpolation(UsdGeom.Tokens.constant)
+
+    color_primvar = prim.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant)
+    color_primvar.Set([color])
+
+    return prim
+
+
+def remove_children(prim_path, keep=(), stage=None):
+    '''Remove every child prim of `prim_path` (in the current edit target) except the paths in `keep`'''
+    if stage is None:
+        stage = _context_stage()
+    layer = stage.GetEditTarget().GetLayer()
+
+    parent_spec = layer.GetPrimAtPath(prim_path)
+    if not parent_spec:
+        return
+
+    keep = {Sdf.Path(path) for path in keep}
+    stale = [child.name for child in parent_spec.nameChildren if child.path not in keep]
+
+    # One change notification for all of them instead of one per prim
+    with Sdf.ChangeBlock():
+        for name in stale:
+            del parent_spec.nameChildren[name]
+
+
 def create_mesh(prim_path, points, indices, colors=None, opacity=None, use_prevsrf=True):
     '''
     Create a mesh in USD
     '''
 
     time = Usd.TimeCode.Default()
-    stage = omni.usd.get_context().get_stage()
+    stage = _context_stage()
+
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+    indices = np.ascontiguousarray(indices, dtype=np.int32).reshape(-1)
 
     mesh = UsdGeom.Mesh.Define(stage, prim_path)
-    mesh.GetPointsAttr().Set(points, time)
-    mesh.GetFaceVertexIndicesAttr().Set(indices, time)
-    mesh.GetFaceVertexCountsAttr().Set([3] * len(indices), time)
+    mesh.GetPointsAttr().Set(Vt.Vec3fArray.FromNumpy(points), time)
+    mesh.GetFaceVertexIndicesAttr().Set(Vt.IntArray.FromNumpy(indices), time)
+    mesh.GetFaceVertexCountsAttr().Set(Vt.IntArray.FromNumpy(np.full(len(indices) // 3, 3, dtype=np.int32)), time)
 
     if use_prevsrf:
 
@@ -275,3 +396,259 @@ def create_mesh(prim_path, points, indices, colors=None, opacity=None, use_prevs
 
     return prim_path
 
+
+# Bulk writers
+#
+# The functions above go through UsdGeom.*.Define and set one attribute at a time, every call sends its
+# own change notification. The writers below author the prim and attribute specs directly in the edit
+# target layer inside one Sdf.ChangeBlock, fill them from numpy without going through Python lists and
+# update existing prims in place, so redrawing thousands of paths each tick is one recomposition.
+
+def _define_ancestors(stage, layer, prim_path):
+    '''Make sure every ancestor of `prim_path` is a defined prim, else the new prims would sit under overs'''
+    for path in Sdf.Path(prim_path).GetParentPath().GetPrefixes():
+        prim = stage.GetPrimAtPath(path)
+        if prim and prim.IsDefined():
+            continue
+        spec = Sdf.CreatePrimInLayer(layer, path)
+        spec.specifier = Sdf.SpecifierDef
+        if not spec.typeName:
+            spec.typeName = 'Xform'
+
+
+def _prim_spec(layer, prim_path, type_name):
+    '''Get or create the prim spec at `prim_path` as a def of `type_name`'''
+    spec = Sdf.CreatePrimInLayer(layer, prim_path)
+    spec.specifier = Sdf.SpecifierDef
+    if spec.typeName != type_name:
+        spec.typeName = type_name
+    return spec
+
+
+def _set_attr(prim_spec, name, value_type, value, variability=Sdf.VariabilityVarying, interpolation=None):
+    '''Set the default value of an attribute spec, creating the spec only if it does not exist yet'''
+    attr = prim_spec.attributes.get(name)
+    if attr is None:
+        attr = Sdf.AttributeSpec(prim_spec, name, value_type, variability)
+        if interpolation is not None:
+            attr.SetInfo('interpolation', interpolation)
+    attr.default = value
+    return attr
+
+
+def _curves_spec(layer, prim_path, points, counts, color, width):
+    spec = _prim_spec(layer, prim_path, 'BasisCurves')
+    _set_attr(spec, 'type', Sdf.ValueTypeNames.Token, UsdGeom.Tokens.linear, Sdf.VariabilityUniform)
+    _set_attr(spec, 'points', Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(points))
+    _set_attr(spec, 'curveVertexCounts', Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(counts))
+    _set_attr(spec, 'widths', Sdf.ValueTypeNames.FloatArray, Vt.FloatArray([width]),
+              interpolation=UsdGeom.Tokens.constant)
+    _set_attr(spec, 'primvars:displayColor', Sdf.ValueTypeNames.Color3fArray, Vt.Vec3fArray([Gf.Vec3f(*color)]),
+              interpolation=UsdGeom.Tokens.constant)
+    return spec
+
+
+def write_paths(points, offsets, prim_path="/World/Paths", color=(0, 1, 0), width=1.0, stage=None):
+    '''Author one linear BasisCurves prim per path under `prim_path`, all in a single change block
+
+    Paths are written to `{prim_path}/Path_{i}`. Prims that already exist are updated in place, and
+    children left over from an earlier call with more paths are removed.
+
+    Parameters
+    ----------
+    points : (P,3) array
+        points of all paths back to back, as returned by NavmeshInterface.find_paths_batch
+    offsets : (N+1,) array
+        path i is points[offsets[i]:offsets[i+1]]
+    prim_path : str, optional
+        parent of the path prims, by default "/World/Paths"
+    color : (r,g,b), optional
+        by default green
+    width : float, optional
+        by default 1.0
+    stage : Usd.Stage, optional
+        by default the stage of the current omni.usd context
+
+    Returns
+    -------
+    list of Sdf.Path
+        the path prims, empty paths are skipped
+    '''
+    if stage is None:
+        stage = _context_stage()
+    layer = stage.GetEditTarget().GetLayer()
+
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    root = Sdf.Path(prim_path)
+
+    _define_ancestors(stage, layer, root.AppendChild('Path_0'))
+
+    written = []
+    with Sdf.ChangeBlock():
+        for i in range(len(offsets) - 1):
+            start, end = offsets[i], offsets[i + 1]
+            if end - start < 2:
+                continue
+            path = root.AppendChild(f'Path_{i}')
+            _curves_spec(layer, path, points[start:end], np.array([end - start], dtype=np.int32), color, width)
+            written.append(path)
+
+        remove_children(root, keep=written, stage=stage)
+    return written
+
+
+def write_curves(points, curve_vertex_counts, prim_path="/World/Paths", color=(0, 1, 0), width=1.0, stage=None):
+    '''Same as create_curves, but authored at the Sdf level and updated in place when the prim exists'''
+    if stage is None:
+        stage = _context_stage()
+    layer = stage.GetEditTarget().GetLayer()
+
+    _define_ancestors(stage, layer, prim_path)
+    with Sdf.ChangeBlock():
+        _curves_spec(layer, prim_path,
+                     np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3),
+                     np.ascontiguousarray(curve_vertex_counts, dtype=np.int32),
+                     color, width)
+    return Sdf.Path(prim_path)
+
+
+def write_points(points, prim_path="/World/Points", color=(1, 0, 0), width=None, stage=None):
+    '''Author (or update) a Points prim from an (N,3) array in a single change block'''
+    if stage is None:
+        stage = _context_stage()
+    layer = stage.GetEditTarget().GetLayer()
+
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+
+    _define_ancestors(stage, layer, prim_path)
+    with Sdf.ChangeBlock():
+        spec = _prim_spec(layer, prim_path, 'Points')
+        _set_attr(spec, 'points', Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(points))
+        _set_attr(spec, 'primvars:displayColor', Sdf.ValueTypeNames.Color3fArray, Vt.Vec3fArray([Gf.Vec3f(*color)]),
+                  interpolation=UsdGeom.Tokens.constant)
+        if width is not None:
+            _set_attr(spec, 'widths', Sdf.ValueTypeNames.FloatArray, Vt.FloatArray([width]),
+                      interpolation=UsdGeom.Tokens.constant)
+    return Sdf.Path(prim_path)
+
+
+def write_mesh(points, indices, prim_path="/World/Navmesh", color=None, opacity=None, stage=None):
+    '''Author (or update) a triangle mesh in a single change block
+
+    Parameters
+    ----------
+    points : (N,3) array
+        vertices
+    indices : (T,3) or (3T,) array
+        triangle vertex indices
+    color : (r,g,b), optional
+        constant display color, by default None
+    opacity : float, optional
+        constant display opacity, by default None
+    '''
+    if stage is None:
+        stage = _context_stage()
+    layer = stage.GetEditTarget().GetLayer()
+
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 3)
+    indices = np.ascontiguousarray(indices, dtype=np.int32).reshape(-1)
+    counts = np.full(len(indices) // 3, 3, dtype=np.int32)
+
+    _define_ancestors(stage, layer, prim_path)
+    with Sdf.ChangeBlock():
+        spec = _prim_spec(layer, prim_path, 'Mesh')
+        _set_attr(spec, 'points', Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(points))
+        _set_attr(spec, 'faceVertexIndices', Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(indices))
+        _set_attr(spec, 'faceVertexCounts', Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(counts))
+        if color is not None:
+            _set_attr(spec, 'primvars:displayColor', Sdf.ValueTypeNames.Color3fArray,
+                      Vt.Vec3fArray([Gf.Vec3f(*color)]), interpolation=UsdGeom.Tokens.constant)
+        if opacity is not None:
+            _set_attr(spec, 'primvars:displayOpacity', Sdf.ValueTypeNames.FloatArray, Vt.FloatArray([opacity]),
+                      interpolation=UsdGeom.Tokens.constant)
+    return Sdf.Path(prim_path)
+
+
+class PointsStream:
+    '''
+    Push agent positions to a Points prim every frame.
+
+    The prim is authored once, then each update sets the positions through a cached attribute handle,
+    no prim lookups or primvar setup per frame. Positions that are not already contiguous float32 are
+    converted into a preallocated buffer instead of a new array every frame. With `record=True` the
+    positions are written as time samples instead of the default value, so a playback can be scrubbed
+    afterwards. Only every `decimation`-th frame is written.
+    '''
+
+    def __init__(self, num_points, prim_path="/World/Points", color=(1, 0, 0), width=None,
+                 record=False, decimation=1, stage=None):
+        if stage is None:
+            stage = _context_stage()
+
+        self.stage = stage
+        self.record = record
+        self.decimation = max(1, int(decimation))
+
+        self._buffer = np.zeros((num_points, 3), dtype=np.float32)
+        write_points(self._buffer, prim_path, color=color, width=width, stage=stage)
+        self._attr = UsdGeom.Points(stage.GetPrimAtPath(prim_path)).GetPointsAttr()
+
+        self.frames = 0
+        self.writes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+        self._times = None
+
+    def update(self, positions, time_code=None):
+        '''
+        Write (N,3) `positions` for this frame, returns False if the frame was skipped by decimation
+
+        `time_code` is the time sample to write to when recording, by default the frame number.
+        '''
+        frame = self.frames
+        self.frames += 1
+        if frame % self.decimation:
+            return False
+
+        t0 = time.perf_counter()
+
+        positions = np.asarray(positions).reshape(-1, 3)
+        if positions.dtype != np.float32 or not positions.flags.c_contiguous:
+            if len(positions) != len(self._buffer):
+                # Agents were added or removed, this is the only time the buffer is reallocated
+                self._buffer = np.empty((len(positions), 3), dtype=np.float32)
+            np.copyto(self._buffer, positions, casting='unsafe')
+            positions = self._buffer
+
+        value = Vt.Vec3fArray.FromNumpy(positions)
+        if self.record:
+            time_code = frame if time_code is None else time_code
+            self._attr.Set(value, Usd.TimeCode(time_code))
+            self._times = (time_code, time_code) if self._times is None else (self._times[0], time_code)
+        else:
+            self._attr.Set(value)
+
+        latency = time.perf_counter() - t0
+        self.writes += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._total_latency += latency
+        return True
+
+    def finish(self):
+        '''When recording, set the stage time range to the recorded samples so it can be played back'''
+        if self.record and self._times is not None:
+            self.stage.SetStartTimeCode(self._times[0])
+            self.stage.SetEndTimeCode(self._times[1])
+
+    @property
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'writes': self.writes,
+            'last_latency': self.last_latency,
+            'mean_latency': self._total_latency / self.writes if self.writes else 0.0,
+            'max_latency': self.max_latency,
+        }
@@ -0,0 +1,294 @@
+'''
+Keep a navmesh up to date with edits on the USD stage.
+
+The watcher listens to the ObjectsChanged notices of the stage and keeps the tracked prims (the
+prims the geometry was collected from) whose subtree or ancestors changed. Notices are coalesced
+over a debounce window, then only the changed prims are collected again and the navmesh is rebuilt
+on a worker thread. The new navmesh (or the new tiles) is swapped in on the thread the notices came
+from, so queries see either the old or the new navmesh, never a half built one, and the worker never
+touches state the loop thread uses.
+
+The worker does not make a refresh free: the native build holds the GIL, so every refresh stalls
+the loop (Kit's UI) for about as long as the rebuild takes. The debounce is what keeps this in
+check: a burst of edits costs one rebuild once it settles, and a long drag one rebuild per
+max_delay, instead of one per notice. Raise both for scenes with slow rebuilds. Tiled navmeshes keep
+each stall down to the tiles the edit touched.
+'''
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pxr import Sdf, Tf, Usd
+
+from . import usd_utils
+
+
+# Properties whose change moves or reshapes geometry, edits to anything else (e.g. colors) are ignored
+GEOMETRY_PROPERTIES = {'points', 'faceVertexIndices', 'faceVertexCounts', 'visibility', 'xformOpOrder'}
+
+
+def is_geometry_change(path):
+    '''True if a changed path (a prim or a property) can change the collected geometry'''
+    if not path.IsPropertyPath():
+        return True
+    return path.name in GEOMETRY_PROPERTIES or path.name.startswith('xformOp:')
+
+
+class NavmeshWatcher:
+    '''
+    Rebuild a core.NavmeshInterface when its tracked prims change on the stage, debounced.
+
+    In tiled mode only the tiles the changed prims overlap are rebuilt (each swapped in once built),
+    otherwise only the changed prims are collected again and the whole navmesh is rebuilt next to
+    the current one and swapped in when done.
+
+    Debounced flushes are scheduled on an asyncio loop (Kit's main loop). Without a running loop
+    call flush() to rebuild, and wait() to block until the rebuild is swapped in.
+    '''
+
+    def __init__(self, navmesh, prims=None, debounce=0.5, max_delay=2.0, ignore_paths=(), loop=None):
+        '''
+        navmesh is a NavmeshInterface with loaded geometry, prims the prims to track (defaults to
+        the prims it was loaded from). Notices are flushed `debounce` seconds after the last one,
+        or at the latest `max_delay` seconds after the first, so a long drag still refreshes.
+        Changes under ignore_paths (e.g. the prims the navmesh is visualized with) are skipped.
+        '''
+        if prims is None:
+            prims = navmesh.input_prim
+        if prims is None:
+            raise ValueError('No prims to track, load the navmesh geometry first')
+        if isinstance(prims, Usd.Prim):
+            prims = [prims]
+
+        self.navmesh = navmesh
+        self.stage = prims[0].GetStage()
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.ignore_paths = [Sdf.Path(path) for path in ignore_paths]
+        self._roots = [prim.GetPath() for prim in prims]
+        self._loop = loop
+
+        # Recast space geometry of every root, so an edit only collects the changed roots again
+        self._geometry = {}
+        self._pending = set()
+        self._first_notice = None
+        self._timer = None
+        self._listener = None
+
+        # One build at a time, notices arriving meanwhile are flushed once it is swapped in
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+        # Tiles taken for the running tiled rebuild, put back as dirty if it doesn't get swapped in
+        self._snapshot = None
+
+        self.rebuilds = 0
+        self.last_rebuild_time = 0.0
+
+    @property
+    def watching(self):
+        return self._listener is not None
+
+    @property
+    def pending(self):
+        '''Paths of the tracked prims waiting to be collected again'''
+        return set(self._pending)
+
+    @property
+    def busy(self):
+        '''True while a rebuild runs or waits to be swapped in'''
+        return self._future is not None
+
+    def _loop_running(self):
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        '''Collect the tracked prims and start listening to the stage'''
+        if self.watching:
+            return
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+
+        for root in self._roots:
+            self._geometry[root] = self._collect(root)
+
+        if self.navmesh.tiled:
+            # Every root becomes its own source, replacing the single source of load_mesh. Sources that
+            # keep their geometry don't mark tiles dirty, so the first edit only rebuilds what it touches
+            self.navmesh.navmesh.split_source(None, {str(root): geometry for root, geometry in self._geometry.items()})
+
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, self.stage)
+
+    def stop(self):
+        '''Stop listening, pending changes are dropped and a running rebuild still gets swapped in'''
+        if self._listener is not None:
+            self._listener.Revoke()
+            self._listener = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+
+    def _collect(self, root):
+        '''Collect the geometry of a tracked prim, converted to recast space'''
+        prim = self.stage.GetPrimAtPath(root)
+        if not prim.IsValid():
+            # The prim was deleted, so is its geometry
+            return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int32)
+
+        vert, tri = usd_utils.get_all_stage_mesh(self.stage, [prim])
+        return self.navmesh._convert_up_axis(vert), np.asarray(tri, dtype=np.int32).reshape(-1, 3)
+
+    def _affected_roots(self, paths):
+        roots = set()
+        for path in paths:
+            prim_path = path.GetPrimPath()
+            if any(prim_path.HasPrefix(ignored) for ignored in self.ignore_paths):
+                continue
+            # An edit inside a tracked prim, or on one of its ancestors (e.g. a parent transform)
+            roots.update(root for root in self._roots if prim_path.HasPrefix(root) or root.HasPrefix(prim_path))
+        return roots
+
+    def _on_objects_changed(self, notice, stage):
+        paths = list(notice.GetResyncedPaths())
+        paths.extend(path for path in notice.GetChangedInfoOnlyPaths() if is_geometry_change(path))
+
+        roots = self._affected_roots(paths)
+        if not roots:
+            return
+
+        now = time.perf_counter()
+        if not self._pending:
+            self._first_notice = now
+        self._pending.update(roots)
+        self._schedule(now)
+
+    def _schedule(self, now):
+        if not self._loop_running():
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = min(self.debounce, max(0.0, self._first_notice + self.max_delay - now))
+        self._timer = self._loop.call_later(delay, self.flush)
+
+    def flush(self):
+        '''
+        Collect the changed prims again and start a rebuild on the worker thread
+
+        Returns the future of the rebuild, or None if nothing changed or a rebuild is still running
+        (the changes are then flushed once that one is swapped in)
+        '''
+        self._timer = None
+        if self._future is not None and self._future.done() and not self._loop_running():
+            self.wait()
+        if not self._pending or self.busy:
+            return None
+
+        roots, self._pending = self._pending, set()
+        for root in roots:
+            self._geometry[root] = self._collect(root)
+
+        if self.navmesh.tiled:
+            # Only marks the overlapped tiles dirty. They are taken with their sources here, built on the
+            # worker and swapped in on this thread, so the worker never touches the tiled navmesh itself
+            tiled = self.navmesh.navmesh
+            for root in roots:
+                vert, tri = self._geometry[root]
+                tiled.set_source(str(root), vert, tri)
+            self._snapshot = tiled.take_dirty()
+            future = self._executor.submit(self._rebuild_tiles, self._snapshot)
+        else:
+            vert, tri = self._merged_geometry()
+            future = self._executor.submit(self._rebuild, vert, tri, dict(self.navmesh.settings))
+
+        self._future = future
+        if self._loop_running():
+            future.add_done_callback(self._on_rebuilt)
+        return future
+
+    def _merged_geometry(self):
+        '''All tracked geometry as one mesh, in the order of the tracked prims'''
+        verts, tris = [], []
+        offset = 0
+        for root in self._roots:
+            vert, tri = self._geometry[root]
+            verts.append(vert)
+            tris.append(tri + offset)
+            offset += len(vert)
+        return np.concatenate(verts), np.concatenate(tris)
+
+    def _rebuild(self, vert, tri, settings):
+        start = time.perf_counter()
+        navmesh = self.navmesh.build_replacement(vert, tri, settings)
+        return navmesh, vert, tri, time.perf_counter() - start
+
+    def _rebuild_tiles(self, snapshot):
+        start = time.perf_counter()
+        tiles = self.navmesh.navmesh.build_tiles(snapshot)
+        return (tiles, snapshot), None, None, time.perf_counter() - start
+
+    def _on_rebuilt(self, future):
+        # Runs on the worker thread, swap on the loop thread so queries there never race the swap
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._finish, future)
+
+    def _finish(self, future):
+        if future.exception() is not None:
+            self._drop_rebuild()
+            print(f'Navmesh refresh failed: {future.exception()}')
+        else:
+            self._future = None
+            self._swap(future.result())
+
+        if self._pending:
+            self._schedule(time.perf_counter())
+
+    def _drop_rebuild(self):
+        self._future = None
+        if self._snapshot is not None:
+            self.navmesh.navmesh.restore_dirty(self._snapshot)
+            self._snapshot = None
+
+    def _swap(self, result):
+        self._snapshot = None
+        built, vert, tri, build_time = result
+        if self.navmesh.tiled:
+            # built is ({tile: navmesh}, snapshot) of the rebuilt tiles
+            self.navmesh.navmesh.apply_tiles(*built)
+            self.navmesh._invalidate_paths()
+        else:
+            self.navmesh.swap_navmesh(built, vert, tri)
+
+        self.rebuilds += 1
+        self.last_rebuild_time = build_time
+
+    def wait(self, timeout=None):
+        '''
+        Without a running event loop, block until the running rebuild is done and swap it in
+        (rebuild errors are raised here)
+        '''
+        future = self._future
+        if future is None or self._loop_running():
+            return
+        try:
+            result = future.result(timeout)
+        except Exception:
+            # Still running after the timeout, or failed
+            if future.done():
+                self._drop_rebuild()
+            raise
+        self._future = None
+        self._swap(result)
+
+    def destroy(self):
+        '''
+        Stop watching without waiting for a running rebuild, which is dropped instead of swapped in
+        (in tiled mode its tiles are left dirty)
+        '''
+        self.stop()
+        self._loop = None
+        self._drop_rebuild()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,220 @@
+'''
+Headless navmesh baking over many USD files, without Kit.
+
+Every level (USD file) is opened with plain pxr, its visible meshes are collected with usd_utils,
+and the navmesh is built with core.NavmeshInterface and the given settings. Per level it writes
+`<name>.npz` with the navmesh as an indexed mesh in the stage's up axis (vertices, triangles), and
+a `summary.json` with the stats of every level. Levels are baked in parallel, one per worker process.
+
+Runs with any python that has pxr (e.g. the usd-core package) and the PyRecast binaries (3.10):
+    python tools/bake_navmesh.py levels/ -o baked/ --settings settings.json --jobs 8
+
+Exits with 1 if any level failed (including levels lost to a crashed worker), so it can gate a
+nightly job. summary.json is written either way.
+'''
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from pxr import Usd, UsdGeom
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from siborg.create.navmesh import core, usd_utils
+from siborg.create.navmesh import pyrecast as rd
+
+
+USD_EXTENSIONS = ('.usd', '.usda', '.usdc', '.usdz')
+
+
+def find_levels(inputs):
+    '''USD files given directly or found (recursively) in the given directories, sorted'''
+    levels = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            for ext in USD_EXTENSIONS:
+                levels.update(glob.glob(os.path.join(path, '**', '*' + ext), recursive=True))
+        else:
+            levels.add(path)
+    return sorted(os.path.abspath(level) for level in levels)
+
+
+def level_names(levels):
+    '''Output name of every level, the file name unless two levels share it'''
+    stems = [os.path.splitext(os.path.basename(level))[0] for level in levels]
+    if len(set(stems)) == len(stems):
+        return stems
+
+    # Fall back to the path relative to the common directory, flattened
+    root = os.path.commonpath([os.path.dirname(level) for level in levels])
+    return [os.path.splitext(os.path.relpath(level, root))[0].replace(os.sep, '__') for level in levels]
+
+
+def walkable_area(vertices, triangles, z_up):
+    '''Area of the navmesh triangles projected on the ground plane'''
+    tri = vertices[triangles].astype(np.float64)
+    u, v = (0, 1) if z_up else (0, 2)
+    e1 = tri[:, 1] - tri[:, 0]
+    e2 = tri[:, 2] - tri[:, 0]
+    return float(0.5 * np.abs(e1[:, u] * e2[:, v] - e1[:, v] * e2[:, u]).sum())
+
+
+def bake_level(level, name, out_dir, settings, prim_paths=()):
+    '''
+    Bake the navmesh of one USD file, runs in a worker process
+
+    prim_paths restricts the geometry to these prims (and their children), by default every prim
+    under the pseudo root is used. Failures are reported in the returned stats, not raised.
+
+    Returns a dict of stats for the summary
+    '''
+    stats = {'level': name, 'usd': level, 'status': 'ok', 'outputs': []}
+    try:
+        start = time.perf_counter()
+        stage = Usd.Stage.Open(level, Usd.Stage.LoadAll)
+        if stage is None:
+            raise RuntimeError(f'Could not open {level}')
+        z_up = UsdGeom.GetStageUpAxis(stage) == UsdGeom.Tokens.z
+        stats['up_axis'] = 'Z' if z_up else 'Y'
+        stats['open_time'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if prim_paths:
+            prims = [stage.GetPrimAtPath(path) for path in prim_paths]
+            missing = [path for path, prim in zip(prim_paths, prims) if not prim.IsValid()]
+            if missing:
+                raise RuntimeError(f'Prims not found: {missing}')
+        else:
+            prims = list(stage.GetPseudoRoot().GetChildren())
+        meshes = usd_utils.find_meshes(prims)
+        vertices, triangles = usd_utils.get_mesh(meshes)
+        stats['collect_time'] = time.perf_counter() - start
+        stats['meshes'] = len(meshes)
+        stats['input_vertices'] = len(vertices)
+        stats['input_triangles'] = len(triangles)
+
+        if len(triangles) == 0:
+            stats['status'] = 'empty'
+            return stats
+
+        start = time.perf_counter()
+        navmesh = core.NavmeshInterface(up_axis='Z' if z_up else 'Y')
+        navmesh.load_geometry(vertices, triangles)
+        navmesh.build_navmesh(settings)
+        stats['build_time'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        nav_v, nav_t = navmesh.get_navmesh_mesh()
+        stats['navmesh_vertices'] = len(nav_v)
+        stats['navmesh_triangles'] = len(nav_t)
+        stats['walkable_area'] = walkable_area(nav_v, nav_t, z_up)
+
+        mesh_path = os.path.join(out_dir, name + '.npz')
+        np.savez_compressed(mesh_path, vertices=nav_v, triangles=nav_t)
+        stats['outputs'].append(mesh_path)
+        stats['write_time'] = time.perf_counter() - start
+
+    except Exception as e:
+        stats['status'] = 'error'
+        stats['error'] = f'{type(e).__name__}: {e}'
+
+    return stats
+
+
+def bake(levels, out_dir, settings=None, prim_paths=(), jobs=None):
+    '''
+    Bake every level on a pool of `jobs` processes (defaults to the number of cores) and write
+    summary.json to out_dir. settings override pyrecast.DEFAULT_SETTINGS
+
+    Returns the summary dict
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    names = level_names(levels)
+    merged = rd.merge_settings(settings or {})
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(bake_level, level, name, out_dir, merged, tuple(prim_paths)): (level, name)
+                   for level, name in zip(levels, names)}
+        for future in as_completed(futures):
+            try:
+                stats = future.result()
+            except Exception as e:
+                # The worker died (e.g. a crash in the native build breaks the whole pool), so bake_level
+                # could not report it. Every level still waiting fails the same way
+                level, name = futures[future]
+                stats = {'level': name, 'usd': level, 'status': 'error', 'outputs': [], 'error': f'{type(e).__name__}: {e}'}
+            results.append(stats)
+
+            detail = stats.get('error', f'{stats.get("navmesh_triangles", 0)} triangles')
+            print(f'[{len(results)}/{len(levels)}] {stats["level"]}: {stats["status"]}, {detail}')
+
+    results.sort(key=lambda stats: stats['level'])
+    summary = {
+        'settings': merged,
+        'levels': results,
+        'baked': sum(stats['status'] == 'ok' for stats in results),
+        'empty': sum(stats['status'] == 'empty' for stats in results),
+        'failed': sum(stats['status'] == 'error' for stats in results),
+        'wall_time': time.perf_counter() - start,
+        'build_time': sum(stats.get('build_time', 0.0) for stats in results),
+    }
+
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Bake navmeshes for USD files without Kit')
+    parser.add_argument('inputs', nargs='+', help='USD files, or directories searched for USD files')
+    parser.add_argument('-o', '--out', default='baked_navmeshes', help='Output directory')
+    parser.add_argument('--settings', help='JSON file with build settings (see pyrecast.DEFAULT_SETTINGS)')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='Override one build setting')
+    parser.add_argument('--prim', action='append', default=[], help='Only use the geometry under this prim path')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes')
+    args = parser.parse_args(argv)
+
+    # --set values take the type of the default, so a typo fails here and not in every worker
+    args.overrides = {}
+    for item in args.set:
+        key, sep, value = item.partition('=')
+        if not sep:
+            parser.error(f'--set expects KEY=VALUE, got {item!r}')
+        if key not in rd.DEFAULT_SETTINGS:
+            parser.error(f'--set: unknown setting {key!r}')
+        kind = type(rd.DEFAULT_SETTINGS[key])
+        try:
+            args.overrides[key] = kind(value)
+        except ValueError:
+            parser.error(f'--set: {key} expects {kind.__name__}, got {value!r}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    settings = {}
+    if args.settings:
+        with open(args.settings) as f:
+            settings.update(json.load(f))
+    settings.update(args.overrides)
+
+    levels = find_levels(args.inputs)
+    if not levels:
+        raise SystemExit('No USD files found')
+
+    summary = bake(levels, args.out, settings, args.prim, args.jobs)
+    print(f'baked {summary["baked"]}, empty {summary["empty"]}, failed {summary["failed"]} '
+          f'in {summary["wall_time"]:.1f} s')
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())